@@ -0,0 +1,27 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def run_tasks_inline(settings):
+    # Background tasks run when enqueued, so tests see their effects
+    settings.TASKS_BACKEND = "immediate"
+
+
+@pytest.fixture(autouse=True)
+def clear_rate_limits():
+    # Each test starts with full token buckets
+    from users.throttling import bucket_store
+
+    bucket_store.clear()
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    # A "replica" alias for the routing tests (see job.tests): a mirror,
+    # i.e. a second connection to the test database, set up with it
+    from django.db import connections
+
+    connections.settings["replica"] = {
+        **connections.settings["default"],
+        "TEST": {"MIRROR": "default"},
+    }
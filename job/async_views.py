@@ -0,0 +1,171 @@
+"""
+Async versions of the job list and detail endpoints.
+
+Selected with `JOB_ASYNC_VIEWS` (see job.urls). Under ASGI, GET requests
+are served on the event loop: the response cache is read with the async
+cache API and rows are fetched with the async ORM, then encoded by
+FastJobSerializer, so the output is byte-identical to the sync views.
+Writes, non-JSON formats and error responses are handed to the sync DRF
+views, which render them exactly as before.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from my_job_board.routers import replica_reads
+
+from .cache import (
+    LIST_SCOPE,
+    aget_version,
+    build_response,
+    cache_entry,
+    detail_scope,
+    get_cache,
+    get_not_modified,
+    get_validators,
+    is_fresh,
+)
+from .filters import JobFilterBackend
+from .models import Job
+from .pagination import JobCursorPagination
+from .serializers import get_fast_job_serializer, get_sparse_fields
+from .views import JobListCreateView, JobRetrieveUpdateDestroyView
+
+sync_job_list_create = JobListCreateView.as_view()
+sync_job_detail = JobRetrieveUpdateDestroyView.as_view()
+
+
+def get_json_request(request):
+    """
+    A DRF request for a plain JSON GET, or None when the sync view must
+    answer: other methods and formats, failed authentication or
+    throttled requests.
+    """
+    if request.method != "GET":
+        return None
+    if request.GET.get(api_settings.URL_FORMAT_OVERRIDE, "json") != "json":
+        return None
+    accept = request.headers.get("Accept", "*/*")
+    if (
+        "text/html" in accept  # Browsable API
+        or "indent" in accept
+        or not ("application/json" in accept or "*/*" in accept)
+    ):
+        return None
+
+    drf_request = Request(
+        request,
+        authenticators=[
+            authenticator()
+            for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    if "Authorization" in request.headers:
+        try:
+            drf_request.user  # Claims based, no query (users.authentication)
+        except APIException:
+            return None
+    for throttle in api_settings.DEFAULT_THROTTLE_CLASSES:
+        if not throttle().allow_request(drf_request, None):
+            return None  # The sync view answers with a 429
+    return drf_request
+
+
+async def serve_cached(request, scope, render):
+    """
+    Serve from the job response cache, rendering with `render()` (async,
+    returns the JSON content or None to fall back) on a miss.
+    """
+    version, modified = await aget_version(scope)
+    if version is None:
+        content = await render()
+        return None if content is None else json_response(content)
+
+    etag, key = get_validators(request, scope, version)
+    last_modified = int(modified)
+    not_modified = get_not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    cache = get_cache()
+    cached = await cache.aget(key)
+    if not is_fresh(cached):
+        content = await render()
+        if content is None:
+            return None
+        cached, timeout = cache_entry(
+            content.encode(), "application/json", etag, last_modified
+        )
+        await cache.aset(key, cached, timeout=timeout)
+    return build_response(request, cached)
+
+
+def json_response(content):
+    return HttpResponse(content, content_type="application/json")
+
+
+@csrf_exempt  # Like DRF views, which enforce CSRF for session auth only
+async def job_list_create(request):
+    """
+    List jobs (async) or create one (sync view).
+    """
+    drf_request = get_json_request(request)
+    if drf_request is None:
+        return await sync_to_async(sync_job_list_create)(request)
+
+    async def render():
+        paginator = JobCursorPagination()
+        try:
+            serializer = get_fast_job_serializer(
+                get_sparse_fields(drf_request.query_params)
+            )
+            queryset = JobFilterBackend().filter_queryset(
+                drf_request, Job.objects.all(), None
+            )
+            page = await paginator.apaginate_queryset(
+                queryset.values_list(*serializer.columns, named=True),
+                drf_request,
+            )
+        except APIException:
+            return None  # Invalid filter, fieldset or cursor
+        return paginator.get_paginated_json(serializer.render(page))
+
+    with replica_reads():
+        response = await serve_cached(request, LIST_SCOPE, render)
+    if response is None:
+        return await sync_to_async(sync_job_list_create)(request)
+    return response
+
+
+@csrf_exempt
+async def job_detail(request, pk):
+    """
+    Retrieve a job (async), or update or delete it (sync view).
+    """
+    drf_request = get_json_request(request)
+    if drf_request is None:
+        return await sync_to_async(sync_job_detail)(request, pk=pk)
+
+    async def render():
+        try:
+            serializer = get_fast_job_serializer(
+                get_sparse_fields(drf_request.query_params)
+            )
+        except APIException:
+            return None  # Unknown fields
+        row = await (
+            Job.objects.filter(pk=pk)
+            .values_list(*serializer.columns, named=True)
+            .afirst()
+        )
+        return None if row is None else serializer.render_one(row)
+
+    with replica_reads():
+        response = await serve_cached(request, detail_scope(pk), render)
+    if response is None:
+        return await sync_to_async(sync_job_detail)(request, pk=pk)
+    return response
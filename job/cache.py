@@ -0,0 +1,230 @@
+"""
+Response cache for the job read endpoints.
+
+Rendered GET responses are stored under keys that embed a version
+counter per scope ("list" for listings, "detail:<pk>" for one job).
+Job signals bump the counters of the scopes a change affects, so stale
+entries are never read again and simply expire, instead of flushing the
+whole cache. The same counters back the ETag and Last-Modified headers,
+which lets conditional GETs be answered with a 304 before any query or
+serialization happens.
+
+In views reading from replicas, cache misses are rendered from a
+replica, which may lag behind the version the response is stored under.
+Such responses are only cached for `JOB_CACHE_REPLICA_TIMEOUT` seconds,
+about the replication lag tolerated anyway, and get an ETag of their
+own (and no Last-Modified), so that conditional GETs never validate a
+lagging body for longer than that. Clients pinned to the primary after
+a write (see my_job_board.routers) are not served those: they render
+the response from the primary, for everyone, and read their own writes.
+"""
+
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from my_job_board.routers import is_pinned, reads_may_use_replica
+
+LIST_SCOPE = "list"
+
+
+def get_cache():
+    return caches[settings.JOB_CACHE_ALIAS]
+
+
+def detail_scope(pk):
+    return f"detail:{pk}"
+
+
+def _version_keys(scope):
+    return f"job:version:{scope}", f"job:modified:{scope}"
+
+
+def get_version(scope):
+    """
+    Return the (version, last modified timestamp) of a cache scope.
+    """
+    cache = get_cache()
+    version_key, modified_key = _version_keys(scope)
+    values = cache.get_many([version_key, modified_key])
+    if version_key in values and modified_key in values:
+        return values[version_key], values[modified_key]
+
+    # Seed with the clock so validators issued before a cache restart or
+    # eviction never match the new counter.
+    now = time.time()
+    cache.add(version_key, time.time_ns(), timeout=None)
+    cache.add(modified_key, now, timeout=None)
+    return cache.get(version_key), cache.get(modified_key, now)
+
+
+async def aget_version(scope):
+    """
+    Async version of get_version().
+    """
+    cache = get_cache()
+    version_key, modified_key = _version_keys(scope)
+    values = await cache.aget_many([version_key, modified_key])
+    if version_key in values and modified_key in values:
+        return values[version_key], values[modified_key]
+
+    now = time.time()
+    await cache.aadd(version_key, time.time_ns(), timeout=None)
+    await cache.aadd(modified_key, now, timeout=None)
+    return await cache.aget(version_key), await cache.aget(modified_key, now)
+
+
+def bump_version(scope):
+    """
+    Invalidate every cached response of a scope.
+    """
+    cache = get_cache()
+    version_key, modified_key = _version_keys(scope)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.add(version_key, time.time_ns(), timeout=None)
+    cache.set(modified_key, time.time(), timeout=None)
+
+
+def normalize_query(request):
+    """
+    Canonical form of the query string: sorted keys and values, blanks
+    dropped, so equivalent URLs share one cache entry.
+    """
+    params = sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        for value in values
+        if value != ""
+    )
+    return urlencode(params)
+
+
+def get_validators(request, scope, version):
+    """
+    The ETag of the response to `request` and its cache key.
+    """
+    # Pagination links are absolute, so the host is part of the key
+    variant = hashlib.sha1(
+        f"{request.scheme}://{request.get_host()}{request.path}?"
+        f"{normalize_query(request)}".encode()
+    ).hexdigest()
+    etag = quote_etag(f"{version:x}-{variant[:16]}")
+    return etag, f"job:response:{scope}:{version}:{variant}"
+
+
+def get_not_modified(request, etag, last_modified):
+    """
+    A 304 response if the client's validators match, else None.
+    """
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+
+
+def cache_entry(content, content_type, etag, last_modified):
+    """
+    The cache entry of a response just rendered, and its timeout. Call
+    where it was rendered, to tell whether it was read from a replica.
+    """
+    if reads_may_use_replica():
+        # Never equal to the ETag of the version, nor to the next render
+        etag = f'{etag[:-1]}-r{time.time_ns():x}"'
+        return (
+            (content, content_type, etag, None),
+            settings.JOB_CACHE_REPLICA_TIMEOUT,
+        )
+    return (
+        (content, content_type, etag, last_modified),
+        settings.JOB_CACHE_TIMEOUT,
+    )
+
+
+def is_fresh(cached):
+    """
+    Whether a cache entry may be served to this client: clients pinned
+    to the primary don't get responses read from a replica, which may
+    predate their own writes; theirs replace them.
+    """
+    return cached is not None and (cached[3] is not None or not is_pinned())
+
+
+def build_response(request, cached):
+    """
+    The response of a cache entry, or a 304 if the client has it.
+    """
+    content, content_type, etag, last_modified = cached
+    not_modified = get_not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    response = HttpResponse(content, content_type=content_type)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+class CachedResponseMixin:
+    """
+    Serve GET responses from the job response cache.
+
+    Views define `get_cache_scope()`; only JSON responses are cached.
+    """
+
+    def get_cache_scope(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return super().get(request, *args, **kwargs)
+
+        scope = self.get_cache_scope()
+        version, modified = get_version(scope)
+        if version is None:
+            # Cache disabled (e.g. DummyCache)
+            return super().get(request, *args, **kwargs)
+
+        etag, key = get_validators(request, scope, version)
+        last_modified = int(modified)
+        not_modified = get_not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        cache = get_cache()
+        cached = cache.get(key)
+        if not is_fresh(cached):
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if isinstance(response, Response):
+                content = request.accepted_renderer.render(
+                    response.data,
+                    request.accepted_media_type,
+                    self.get_renderer_context(),
+                )
+                content_type = request.accepted_renderer.media_type
+            else:
+                content = response.content
+                content_type = response["Content-Type"]
+            cached, timeout = cache_entry(
+                content, content_type, etag, last_modified
+            )
+            cache.set(key, cached, timeout=timeout)
+
+        return build_response(request, cached)
@@ -0,0 +1,157 @@
+"""
+Change feed of jobs, for mirrors syncing incrementally.
+
+Every save or delete of a job appends a JobChange row (see job.signals)
+in the same transaction; its autoincrement `seq` orders the changes.
+Clients read /api/jobs/changes/?after=<seq> from 0, then from the last
+`seq` they got, and fetch the current version of the changed jobs, so a
+sync costs the number of changes, not the size of the table.
+
+A change superseded by a later one of the same job is of no use to any
+client (a cursor before the old change is also before the new one), so
+compact_job_changes() deletes them, keeping the table about one row per
+job, deleted jobs included: deletions are tombstones.
+
+Sequence numbers taken in the transaction of a change would be in
+insert order, not commit order: with concurrent writers (PostgreSQL), a
+long transaction's change could commit after cursors moved past its
+number, and be skipped for good. Changes are therefore first written to
+PendingJobChange, in the transaction of the change, and moved to the
+feed once committed by publish_job_changes(), in a short transaction of
+its own (after each commit, and by compact_job_changes() for changes
+left by a crashed process). get_job_changes() still holds back changes
+younger than `JOB_CHANGES_SETTLE_TIME` seconds, for publications
+committing out of order.
+"""
+
+import contextlib
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import partial, update_wrapper
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from job.models import JobChange, PendingJobChange
+
+_change_batch = ContextVar("change_batch", default=None)
+
+
+def record_job_change(job_id, deleted, using):
+    change = PendingJobChange(job_id=job_id, deleted=deleted)
+    batch = _change_batch.get()
+    if batch is None:
+        change.save(using=using)
+        queue_publication(using)
+    else:
+        batch.append(change)
+
+
+@contextlib.contextmanager
+def batched_job_changes(using):
+    """
+    Insert the changes recorded in the block with a single query.
+    """
+    batch = []
+    token = _change_batch.set(batch)
+    try:
+        yield
+    finally:
+        _change_batch.reset(token)
+    if batch:
+        PendingJobChange.objects.using(using).bulk_create(batch)
+        queue_publication(using)
+
+
+def queue_publication(using):
+    # Once per transaction, however many jobs it changed; a failure
+    # leaves the changes to the next publication
+    callbacks = connections[using].run_on_commit
+    if not any(
+        getattr(callback, "func", None) is publish_job_changes
+        for _, callback, _ in callbacks
+    ):
+        # Named like the function, which Django logs robust failures by
+        publish = update_wrapper(
+            partial(publish_job_changes, using), publish_job_changes
+        )
+        transaction.on_commit(publish, using=using, robust=True)
+
+
+def publish_job_changes(using=None):
+    """
+    Move the committed pending changes to the feed, numbering them now.
+    Returns the number of changes published.
+    """
+    using = using or router.db_for_write(JobChange)
+    with transaction.atomic(using=using):
+        # Rows a concurrent publication is moving are left to it
+        pending = list(
+            PendingJobChange.objects.using(using)
+            .select_for_update(skip_locked=True)
+            .order_by("id")
+            .values_list("id", "job_id", "deleted", named=True)
+        )
+        JobChange.objects.using(using).bulk_create(
+            JobChange(job_id=change.job_id, deleted=change.deleted)
+            for change in pending
+        )
+        PendingJobChange.objects.using(using).filter(
+            id__in=[change.id for change in pending]
+        ).delete()
+    return len(pending)
+
+
+def settled_before():
+    # Changes numbered before this time have all committed
+    return timezone.now() - timedelta(seconds=settings.JOB_CHANGES_SETTLE_TIME)
+
+
+def last_settled_seq():
+    """
+    Sequence number of the last settled change: a reader loading the
+    jobs now misses none of the changes after it.
+    """
+    last = JobChange.objects.filter(
+        changed_at__lte=settled_before()
+    ).aggregate(Max("seq"))["seq__max"]
+    return last or 0
+
+
+def get_job_changes(after, limit):
+    """
+    The changes after sequence number `after`, at most `limit` of them,
+    with the latest one of each job only. Returns (changes, last seq,
+    whether more changes follow).
+    """
+    rows = list(
+        JobChange.objects.filter(
+            seq__gt=after, changed_at__lte=settled_before()
+        )
+        .order_by("seq")
+        .values_list("seq", "job_id", "deleted", named=True)[: limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    latest = {row.job_id: row for row in rows}
+    changes = sorted(latest.values(), key=lambda row: row.seq)
+    last_seq = rows[-1].seq if rows else after
+    return changes, last_seq, has_more
+
+
+def compact_job_changes(using=None):
+    """
+    Delete the changes superseded by a later change of the same job,
+    after publishing any left pending. Returns the number of rows deleted.
+    """
+    publish_job_changes(using)
+    superseded = JobChange.objects.using(using).filter(
+        Exists(
+            JobChange.objects.using(using).filter(
+                job_id=OuterRef("job_id"), seq__gt=OuterRef("seq")
+            )
+        )
+    )
+    return superseded.delete()[0]
@@ -0,0 +1,208 @@
+"""
+Precomputed job counts per contract type, location and salary bucket.
+
+The JobFacetCount table holds one row per facet value. Job signals (see
+job.signals) apply the difference between a job's facet values before
+and after each save or delete, so /api/jobs/facets/ reads a few small
+rows instead of aggregating the jobs table; batched_facet_counts()
+applies the differences of many jobs at once. reconcile_facet_counts()
+(the reconcile_job_facets command) recomputes the counts from the jobs
+and fixes any drift, e.g. after raw SQL or queryset.update() calls,
+which send no signals.
+"""
+
+import bisect
+import contextlib
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Value, When
+
+from job.models import Job, JobFacetCount
+
+_facet_batch = ContextVar("facet_batch", default=None)
+
+FACETS = (
+    JobFacetCount.CONTRACT_TYPE,
+    JobFacetCount.LOCATION,
+    JobFacetCount.SALARY,
+)
+
+
+def salary_buckets():
+    """
+    (label, lower bound, upper bound) of each bucket, in salary order.
+    """
+    bounds = [None, *settings.JOB_FACET_SALARY_BUCKETS, None]
+    buckets = []
+    for low, high in zip(bounds, bounds[1:]):
+        if low is None:
+            label = f"<{high}"
+        elif high is None:
+            label = f"{low}+"
+        else:
+            label = f"{low}-{high}"
+        buckets.append((label, low, high))
+    return buckets
+
+
+def salary_bucket(salary):
+    index = bisect.bisect_right(settings.JOB_FACET_SALARY_BUCKETS, salary)
+    return salary_buckets()[index][0]
+
+
+def job_facets(job):
+    """
+    The (facet, value) pairs a job is counted under.
+    """
+    facets = [
+        (JobFacetCount.CONTRACT_TYPE, job.contract_type),
+        (JobFacetCount.LOCATION, job.location),
+    ]
+    if job.salary is not None:
+        facets.append((JobFacetCount.SALARY, salary_bucket(job.salary)))
+    return facets
+
+
+def update_facet_counts(before, after, using):
+    """
+    Move one job's counts from the `before` to the `after` facet values.
+    """
+    deltas = Counter(after)
+    deltas.subtract(before)
+    batch = _facet_batch.get()
+    if batch is None:
+        apply_facet_deltas(deltas, using)
+    else:
+        batch.update(deltas)
+
+
+@contextlib.contextmanager
+def batched_facet_counts(using):
+    """
+    Apply the count changes of the block with one update per facet value.
+    """
+    batch = Counter()
+    token = _facet_batch.set(batch)
+    try:
+        yield
+    finally:
+        _facet_batch.reset(token)
+    apply_facet_deltas(batch, using)
+
+
+def apply_facet_deltas(deltas, using):
+    """
+    Add the (facet, value) -> delta counts to the table.
+    """
+    # In a fixed order, so concurrent transactions lock rows alike
+    for (facet, value), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        rows = JobFacetCount.objects.using(using).filter(
+            facet=facet, value=value
+        )
+        if rows.update(count=F("count") + delta):
+            continue
+        try:
+            with transaction.atomic(using=using):
+                JobFacetCount.objects.using(using).create(
+                    facet=facet, value=value, count=delta
+                )
+        except IntegrityError:
+            # Created by a concurrent transaction in between
+            rows.update(count=F("count") + delta)
+
+
+def get_facet_counts(using=None):
+    """
+    Job counts per facet value, leaving out empty values. Salary buckets
+    are in salary order, other values by decreasing count.
+    """
+    counts = {facet: {} for facet in FACETS}
+    rows = (
+        JobFacetCount.objects.using(using)
+        .filter(count__gt=0)
+        .order_by("-count", "value")
+        .values_list("facet", "value", "count")
+    )
+    for facet, value, count in rows:
+        counts.setdefault(facet, {})[value] = count
+
+    salaries = counts[JobFacetCount.SALARY]
+    counts[JobFacetCount.SALARY] = {
+        label: salaries[label]
+        for label, _, _ in salary_buckets()
+        if label in salaries
+    }
+    return counts
+
+
+def count_jobs(using=None):
+    """
+    Job counts per (facet, value), aggregated from the jobs table.
+    """
+    jobs = Job.objects.using(using)
+    counts = Counter()
+    for facet in (JobFacetCount.CONTRACT_TYPE, JobFacetCount.LOCATION):
+        for value, count in (
+            jobs.order_by().values_list(facet).annotate(n=Count("id"))
+        ):
+            counts[facet, value] = count
+
+    bucket = Case(
+        *(
+            When(salary__lt=high, then=Value(label))
+            for label, _, high in salary_buckets()
+            if high is not None
+        ),
+        default=Value(salary_buckets()[-1][0]),
+    )
+    for value, count in (
+        jobs.filter(salary__isnull=False)
+        .order_by()
+        .annotate(bucket=bucket)
+        .values_list("bucket")
+        .annotate(n=Count("id"))
+    ):
+        counts[JobFacetCount.SALARY, value] = count
+    return counts
+
+
+def reconcile_facet_counts(using=None):
+    """
+    Recompute the facet counts from the jobs and correct the table.
+    Returns the (facet, value, stored count, actual count) of each fix.
+    """
+    fixes = []
+    with transaction.atomic(using=using):
+        # Lock the counts first: concurrent job saves wait for us, so
+        # their updates apply on top of the recomputed counts
+        stored = {
+            (row.facet, row.value): row
+            for row in JobFacetCount.objects.using(using)
+            .select_for_update()
+            .order_by("facet", "value")
+        }
+        actual = count_jobs(using)
+
+        for key in sorted(stored.keys() | actual.keys()):
+            row = stored.get(key)
+            count = actual.get(key, 0)
+            if row is None:
+                JobFacetCount.objects.using(using).create(
+                    facet=key[0], value=key[1], count=count
+                )
+                fixes.append((*key, 0, count))
+            elif row.count != count:
+                fixes.append((*key, row.count, count))
+                if count:
+                    row.count = count
+                    row.save(update_fields=["count"])
+                else:
+                    row.delete()
+            elif not count:
+                row.delete()  # Stale empty value
+    return fixes
@@ -0,0 +1,242 @@
+import json
+import random
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from job.models import Job
+from my_job_board.benchmark import (
+    find_regressions,
+    http_request,
+    local_server,
+    measure_concurrent,
+    measure_in_process,
+    throwaway_database,
+)
+
+PASSWORD = "bench-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the job and user endpoints on a seeded throwaway "
+        "database, optionally failing on regressions against a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--jobs", type=int, default=10_000)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Requests per endpoint",
+        )
+        parser.add_argument(
+            "--auth-requests",
+            type=int,
+            default=10,
+            help="Requests for the token endpoint (password hashing)",
+        )
+        parser.add_argument(
+            "--mode",
+            choices=["inprocess", "server", "both"],
+            default="both",
+            help="Drive the test client, a local HTTP server or both",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Client threads in server mode",
+        )
+        parser.add_argument(
+            "--output", type=Path, help="Write the results to this file"
+        )
+        parser.add_argument(
+            "--baseline", type=Path, help="Baseline JSON to compare against"
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed regression ratio before failing (default 20%%)",
+        )
+
+    def handle(self, *args, **kwargs):
+        self.requests = max(2, kwargs["requests"])
+        self.auth_requests = max(2, kwargs["auth_requests"])
+        modes = (
+            ["inprocess", "server"]
+            if kwargs["mode"] == "both"
+            else [kwargs["mode"]]
+        )
+
+        results = {}
+        with throwaway_database():
+            self.seed(kwargs["users"], kwargs["jobs"])
+            if "inprocess" in modes:
+                results["inprocess"] = self.run_in_process()
+            if "server" in modes:
+                results["server"] = self.run_server(kwargs["concurrency"])
+
+        self.report(results)
+        report = {
+            "config": {
+                "users": kwargs["users"],
+                "jobs": kwargs["jobs"],
+                "requests": self.requests,
+                "concurrency": kwargs["concurrency"],
+            },
+            "results": results,
+        }
+        if kwargs["output"]:
+            kwargs["output"].write_text(json.dumps(report, indent=2) + "\n")
+
+        if kwargs["baseline"]:
+            baseline = json.loads(kwargs["baseline"].read_text())
+            regressions = find_regressions(
+                results, baseline["results"], kwargs["threshold"]
+            )
+            if regressions:
+                raise CommandError(
+                    "Performance regressions:\n" + "\n".join(regressions)
+                )
+            self.stdout.write("No regressions against the baseline.")
+
+    def seed(self, user_count, job_count):
+        User = get_user_model()
+        password = make_password(PASSWORD)  # Hash once for every user
+        User.objects.bulk_create(
+            User(email=f"bench{i}@example.com", password=password)
+            for i in range(user_count)
+        )
+        self.user = User.objects.get(email="bench0@example.com")
+        user_ids = list(User.objects.values_list("id", flat=True))
+
+        rng = random.Random(0)
+        contract_types = [choice for choice, _ in Job.CONTRACT_TYPE]
+        Job.objects.bulk_create(
+            (
+                Job(
+                    owner_id=rng.choice(user_ids),
+                    title=f"Job {i}",
+                    location=rng.choice(["Paris", "Lyon", "Remote"]),
+                    description="Lorem ipsum dolor sit amet. " * 8,
+                    salary=rng.randrange(25_000, 90_000),
+                    contract_type=rng.choice(contract_types),
+                )
+                for i in range(job_count)
+            ),
+            batch_size=1_000,
+        )
+        self.job_ids = list(Job.objects.values_list("id", flat=True))
+        self.refresh = str(RefreshToken.for_user(self.user))
+        self.access = str(RefreshToken.for_user(self.user).access_token)
+
+    def endpoints(self):
+        """
+        (name, method, path, body, needs auth) for each benchmarked call.
+        """
+        rng = random.Random(1)
+        return [
+            ("job-list", "GET", reverse("job-list-create"), None, False),
+            (
+                "job-detail",
+                "GET",
+                lambda: reverse("job-detail", args=[rng.choice(self.job_ids)]),
+                None,
+                False,
+            ),
+            (
+                "job-create",
+                "POST",
+                reverse("job-list-create"),
+                {
+                    "title": "Benchmark job",
+                    "location": "Paris",
+                    "description": "Created by benchmark_api",
+                    "contract_type": "cdi",
+                },
+                True,
+            ),
+            (
+                "token",
+                "POST",
+                reverse("token_obtain_pair"),
+                {"email": self.user.email, "password": PASSWORD},
+                False,
+            ),
+            (
+                "token-refresh",
+                "POST",
+                reverse("token_refresh"),
+                {"refresh": self.refresh},
+                False,
+            ),
+        ]
+
+    def request_count(self, name):
+        return self.auth_requests if name == "token" else self.requests
+
+    def run_in_process(self):
+        client = Client()
+        headers = {"Authorization": f"Bearer {self.access}"}
+        results = {}
+        for name, method, path, body, auth in self.endpoints():
+
+            def call():
+                url = path() if callable(path) else path
+                if method == "GET":
+                    response = client.get(url)
+                else:
+                    response = client.post(
+                        url,
+                        body,
+                        content_type="application/json",
+                        headers=headers if auth else {},
+                    )
+                assert response.status_code < 300, (name, response.content)
+
+            results[name] = measure_in_process(call, self.request_count(name))
+        return results
+
+    def run_server(self, concurrency):
+        results = {}
+        with local_server() as address:
+            for name, method, path, body, auth in self.endpoints():
+                headers = {"Content-Type": "application/json"}
+                if auth:
+                    headers["Authorization"] = f"Bearer {self.access}"
+                payload = json.dumps(body) if body else None
+
+                def call():
+                    url = path() if callable(path) else path
+                    status, content = http_request(
+                        address, method, url, payload, headers
+                    )
+                    assert status < 300, (name, content)
+
+                results[name] = measure_concurrent(
+                    call, self.request_count(name), concurrency
+                )
+        return results
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'mode':<10} {'endpoint':<14} {'p50':>9} {'p95':>9} "
+            f"{'p99':>9} {'req/s':>8} {'queries':>8}"
+        )
+        for mode, endpoints in results.items():
+            for name, m in endpoints.items():
+                queries = "-" if m["queries"] is None else m["queries"]
+                self.stdout.write(
+                    f"{mode:<10} {name:<14} {m['p50_ms']:>7.2f}ms "
+                    f"{m['p95_ms']:>7.2f}ms {m['p99_ms']:>7.2f}ms "
+                    f"{m['rps']:>8.1f} {queries:>8}"
+                )
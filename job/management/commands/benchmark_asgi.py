@@ -0,0 +1,191 @@
+import importlib
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.urls import clear_url_caches, reverse
+
+import job.urls
+import my_job_board.urls
+from job.models import Job
+from my_job_board.benchmark import (
+    asgi_request,
+    measure_async,
+    measure_concurrent,
+    throwaway_database,
+)
+
+# (name, served through ASGI, JOB_ASYNC_VIEWS)
+MODES = [
+    ("wsgi-sync", False, False),
+    ("asgi-sync", True, False),
+    ("asgi-async", True, True),
+]
+
+
+def use_async_views(enabled):
+    settings.JOB_ASYNC_VIEWS = enabled
+    importlib.reload(job.urls)
+    importlib.reload(my_job_board.urls)
+    clear_url_caches()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the job list and detail endpoints served by the sync "
+        "views under WSGI, and by the sync and async views under ASGI, "
+        "at several concurrency levels."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=2_000)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=400,
+            help="Requests per endpoint, mode and concurrency level",
+        )
+        parser.add_argument(
+            "--concurrency",
+            default="1,8,32,64",
+            help="Comma-separated concurrency levels",
+        )
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=0,
+            help="Milliseconds added to every query, like a remote database",
+        )
+        parser.add_argument(
+            "--cache",
+            action="store_true",
+            help="Keep the job response cache (disabled by default)",
+        )
+
+    def handle(self, *args, **kwargs):
+        levels = [int(n) for n in kwargs["concurrency"].split(",")]
+        requests = max(2, kwargs["requests"])
+        caches = settings.CACHES
+        if not kwargs["cache"]:
+            caches = {
+                **caches,
+                settings.JOB_CACHE_ALIAS: {
+                    "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                },
+            }
+
+        self.stdout.write(
+            f"{'mode':<11} {'endpoint':<11} {'conc':>5} {'p50':>9} "
+            f"{'p95':>9} {'p99':>9} {'req/s':>8}"
+        )
+        with throwaway_database(), override_settings(CACHES=caches):
+            self.seed(kwargs["jobs"])
+            with self.db_latency(kwargs["db_latency"] / 1000):
+                application = get_asgi_application()
+                try:
+                    for mode, asgi, async_views in MODES:
+                        use_async_views(async_views)
+                        for name, path in self.endpoints():
+                            for level in levels:
+                                if asgi:
+                                    m = self.run_asgi(
+                                        application, path, requests, level
+                                    )
+                                else:
+                                    m = self.run_wsgi(path, requests, level)
+                                self.stdout.write(
+                                    f"{mode:<11} {name:<11} {level:>5} "
+                                    f"{m['p50_ms']:>7.2f}ms "
+                                    f"{m['p95_ms']:>7.2f}ms "
+                                    f"{m['p99_ms']:>7.2f}ms {m['rps']:>8.1f}"
+                                )
+                finally:
+                    use_async_views(False)
+                    connections.close_all()
+
+    def seed(self, job_count):
+        User = get_user_model()
+        user = User.objects.create_user(
+            email="reader@example.com", password="bench-password"
+        )
+        rng = random.Random(0)
+        contract_types = [choice for choice, _ in Job.CONTRACT_TYPE]
+        Job.objects.bulk_create(
+            (
+                Job(
+                    owner=user,
+                    title=f"Job {i}",
+                    location=rng.choice(["Paris", "Lyon", "Remote"]),
+                    description="Lorem ipsum dolor sit amet. " * 8,
+                    salary=rng.randrange(25_000, 90_000),
+                    contract_type=rng.choice(contract_types),
+                )
+                for i in range(job_count)
+            ),
+            batch_size=1_000,
+        )
+        self.job_ids = list(Job.objects.values_list("id", flat=True))
+
+    def endpoints(self):
+        rng = random.Random(1)
+        return [
+            ("job-list", lambda: reverse("job-list-create")),
+            (
+                "job-detail",
+                lambda: reverse("job-detail", args=[rng.choice(self.job_ids)]),
+            ),
+        ]
+
+    def db_latency(self, seconds):
+        """
+        Delay every query of every connection, opened in any thread.
+        """
+
+        def sleep(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def add_wrapper(sender, connection, **kwargs):
+            if sleep not in connection.execute_wrappers:
+                # Outermost: execute_wrapper() blocks entered before the
+                # connection was opened pop the last wrapper on exit
+                connection.execute_wrappers.insert(0, sleep)
+
+        class Latency:
+            def __enter__(self):
+                if seconds:
+                    connections.close_all()
+                    connection_created.connect(add_wrapper)
+
+            def __exit__(self, *exc_info):
+                connection_created.disconnect(add_wrapper)
+
+        return Latency()
+
+    def run_wsgi(self, path, requests, concurrency):
+        local = threading.local()
+
+        def call():
+            if not hasattr(local, "client"):
+                local.client = Client()
+            response = local.client.get(path())
+            assert response.status_code == 200, response.content
+
+        try:
+            return measure_concurrent(call, requests, concurrency)
+        finally:
+            connections.close_all()
+
+    def run_asgi(self, application, path, requests, concurrency):
+        async def call():
+            status, content = await asgi_request(application, "GET", path())
+            assert status == 200, content
+
+        return measure_async(call, requests, concurrency)
@@ -0,0 +1,98 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from job.models import Job
+from job.serializers import FastJobSerializer, JobSerializer
+from my_job_board.benchmark import throwaway_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare JobSerializer with the FastJobSerializer list path on a "
+        "throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[1_000, 10_000, 100_000],
+            help="Number of jobs to serialize per run",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Runs per size, the best one is reported",
+        )
+
+    def handle(self, *args, **kwargs):
+        sizes = sorted(kwargs["sizes"])
+        repeat = kwargs["repeat"]
+
+        with throwaway_database():
+            self.seed(sizes[-1])
+            self.stdout.write(
+                f"{'rows':>8} {'serializer':>12} {'fast path':>12} "
+                f"{'speedup':>8}"
+            )
+            for size in sizes:
+                slow, fast = self.run(size, repeat)
+                self.stdout.write(
+                    f"{size:>8} {slow * 1000:>10.1f}ms {fast * 1000:>10.1f}ms "
+                    f"{slow / fast:>7.1f}x"
+                )
+
+    def seed(self, count):
+        owner = get_user_model().objects.create_user(
+            email="bench@example.com", password="bench"
+        )
+        contract_types = [choice for choice, _ in Job.CONTRACT_TYPE]
+        Job.objects.bulk_create(
+            (
+                Job(
+                    owner=owner,
+                    reference=f"REF{i}",
+                    title=f"Job {i}",
+                    location="Paris",
+                    description="Lorem ipsum dolor sit amet. " * 8,
+                    salary=30_000 + i % 50_000 if i % 3 else None,
+                    contract_type=contract_types[i % len(contract_types)],
+                )
+                for i in range(count)
+            ),
+            batch_size=1_000,
+        )
+
+    def run(self, size, repeat):
+        queryset = Job.objects.order_by("id")[:size]
+        renderer = JSONRenderer()
+        fast_serializer = FastJobSerializer()
+
+        def serializer_path():
+            data = JobSerializer(queryset.all(), many=True).data
+            return renderer.render(data)
+
+        def fast_path():
+            rows = queryset.values_list(*fast_serializer.columns)
+            return fast_serializer.render(rows).encode()
+
+        if serializer_path() != fast_path():
+            self.stderr.write(f"Output mismatch at {size} rows")
+
+        return (
+            self.best_time(serializer_path, repeat),
+            self.best_time(fast_path, repeat),
+        )
+
+    def best_time(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
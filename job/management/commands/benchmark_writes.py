@@ -0,0 +1,145 @@
+import logging
+import threading
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from my_job_board.benchmark import measure_concurrent, throwaway_database
+from my_job_board.database import SQLITE_PRAGMAS, sqlite_init_command
+from tasks.queue import ThreadBackend, get_backend
+
+# (journal mode, connection options) of SQLite's defaults, to compare
+# against the tuned profile. The journal mode is a property of the
+# database file: it is set once, when the profile's database is created.
+SQLITE_DEFAULT_PROFILE = ("DELETE", {"transaction_mode": "DEFERRED"})
+SQLITE_TUNED_PROFILE = (
+    SQLITE_PRAGMAS["journal_mode"],
+    {
+        "init_command": sqlite_init_command(
+            {
+                name: value
+                for name, value in SQLITE_PRAGMAS.items()
+                if name != "journal_mode"
+            }
+        ),
+        "transaction_mode": "IMMEDIATE",
+    },
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure job-create throughput with concurrent clients, each on "
+        "its own database connection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **kwargs):
+        if connection.vendor == "sqlite":
+            profiles = [
+                ("sqlite default", SQLITE_DEFAULT_PROFILE),
+                ("sqlite tuned", SQLITE_TUNED_PROFILE),
+            ]
+        else:
+            profiles = [(connection.vendor, None)]
+
+        self.stdout.write(
+            f"{'profile':<16} {'clients':>7} {'p50':>9} {'p95':>9} "
+            f"{'p99':>9} {'jobs/s':>8} {'errors':>7}"
+        )
+        failures = {}
+        for name, profile in profiles:
+            m, errors = self.run(
+                profile, kwargs["clients"], kwargs["requests"]
+            )
+            count = sum(errors.values())
+            jobs_per_second = m["rps"] * (1 - count / m["requests"])
+            self.stdout.write(
+                f"{name:<16} {kwargs['clients']:>7} "
+                f"{m['p50_ms']:>7.2f}ms {m['p95_ms']:>7.2f}ms "
+                f"{m['p99_ms']:>7.2f}ms {jobs_per_second:>8.1f} "
+                f"{count:>7}"
+            )
+            if errors:
+                failures[name] = errors
+        for name, errors in failures.items():
+            self.stdout.write(f"\n{name} errors:")
+            for error, count in errors.most_common():
+                self.stdout.write(f"{count:>7}  {error}")
+
+    def run(self, profile, clients, requests):
+        """
+        Time the creates against a fresh database for `profile`; returns
+        the measurements and a Counter of the errors.
+        """
+        original_options = connections.settings["default"]["OPTIONS"]
+        if profile is not None:
+            # Threads open their connections from these settings
+            journal_mode, options = profile
+            connections.settings["default"]["OPTIONS"] = options
+            connection.close()
+        # Failed requests are counted, not logged with their tracebacks
+        logging.disable(logging.CRITICAL)
+        try:
+            with throwaway_database():
+                if profile is not None:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+                user = get_user_model().objects.create_user(
+                    email="writer@example.com", password="bench-password"
+                )
+                token = str(RefreshToken.for_user(user).access_token)
+                connection.close()
+                return self.measure(token, clients, requests)
+        finally:
+            logging.disable(logging.NOTSET)
+            connections.settings["default"]["OPTIONS"] = original_options
+
+    def measure(self, token, clients, requests):
+        local = threading.local()
+        errors = Counter()
+        lock = threading.Lock()
+        data = {
+            "title": "Benchmark job",
+            "location": "Paris",
+            "description": "Created by benchmark_writes",
+            "contract_type": "cdi",
+        }
+
+        def call():
+            if not hasattr(local, "client"):
+                local.client = Client()
+            try:
+                response = local.client.post(
+                    reverse("job-list-create"),
+                    data,
+                    content_type="application/json",
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+                error = (
+                    None
+                    if response.status_code == 201
+                    else f"HTTP {response.status_code}"
+                )
+            except Exception as exc:  # "database is locked"
+                error = f"{type(exc).__name__}: {exc}"
+            if error is not None:
+                with lock:
+                    errors[error] += 1
+
+        try:
+            return measure_concurrent(call, requests, clients), errors
+        finally:
+            backend = get_backend()
+            if isinstance(backend, ThreadBackend):
+                # Finish the queued tasks before the database goes away
+                backend.wait()
+            connections.close_all()
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from job.changes import compact_job_changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the job change feed entries superseded by a later change "
+        "of the same job. Meant to run periodically, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database", default=None, help="Database alias to compact"
+        )
+
+    def handle(self, *args, **kwargs):
+        deleted = compact_job_changes(using=kwargs["database"])
+        self.stdout.write(f"Deleted {deleted} superseded job changes.")
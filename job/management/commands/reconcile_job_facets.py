@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from job.facets import reconcile_facet_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the job facet counts from the jobs table and fix any "
+        "drift. Meant to run periodically, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database", default=None, help="Database alias to reconcile"
+        )
+
+    def handle(self, *args, **kwargs):
+        fixes = reconcile_facet_counts(using=kwargs["database"])
+        for facet, value, stored, actual in fixes:
+            self.stdout.write(f"{facet}={value!r}: {stored} -> {actual}")
+        self.stdout.write(f"Fixed {len(fixes)} facet counts.")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from job.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Reindex the jobs whose search index rows are missing or stale, "
+        "e.g. after updates queued to the task queue were lost. Meant to "
+        "run periodically, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database", default=None, help="Database alias to reconcile"
+        )
+
+    def handle(self, *args, **kwargs):
+        backend = get_search_backend()
+        if not backend.transactional:
+            self.stdout.write(
+                "The in-memory search index is loaded by each process."
+            )
+            return
+        stale, deleted = backend.reconcile(using=kwargs["database"])
+        self.stdout.write(
+            f"Reindexed {len(stale)} jobs, removed {len(deleted)} deleted."
+        )
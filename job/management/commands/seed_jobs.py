@@ -0,0 +1,143 @@
+import contextlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import partial
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+
+from job.cache import LIST_SCOPE, bump_version
+from job.facets import reconcile_facet_counts
+from job.models import Job
+from job.seed import (
+    chunks,
+    insert_jobs,
+    insert_users,
+    load_owner_ids,
+    run_in_worker,
+    user_email,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with realistic users and jobs, the same for a "
+        "given seed (see job.seed). Meant for measuring indexes, "
+        "pagination and search on production-sized data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--jobs", type=int, default=100_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=730,
+            help="Jobs are created over this many days before --today",
+        )
+        parser.add_argument(
+            "--today",
+            type=date.fromisoformat,
+            default=None,
+            help="Anchor date (YYYY-MM-DD), today by default",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes generating and inserting the rows",
+        )
+        parser.add_argument("--batch-size", type=int, default=1_000)
+        parser.add_argument(
+            "--password",
+            default="seed-password",
+            help="Password of every generated user",
+        )
+
+    def handle(self, *args, **kwargs):
+        seed = kwargs["seed"]
+        today = kwargs["today"] or date.today()
+        batch_size = kwargs["batch_size"]
+        workers = max(1, kwargs["workers"])
+        using = router.db_for_write(Job)
+        if kwargs["users"] < 1:
+            raise CommandError("At least one user is needed to own the jobs.")
+        if workers > 1 and connections[using].is_in_memory_db():
+            raise CommandError("Workers can't share an in-memory database.")
+        User = get_user_model()
+        if (
+            User.objects.using(using)
+            .filter(email=user_email(seed, 0))
+            .exists()
+        ):
+            raise CommandError(
+                f"Seed {seed} was already generated in this database."
+            )
+
+        started = time.perf_counter()
+        password = make_password(kwargs["password"])  # Hash once for all
+        self.run_chunks(
+            "users",
+            [
+                (insert_users, seed, start, stop, password, today)
+                + (batch_size, using)
+                for start, stop in chunks(kwargs["users"])
+            ],
+            workers,
+        )
+        # Workers load the owners once each, this process only if needed
+        owner_ids = () if workers > 1 else (load_owner_ids(seed, using),)
+        self.run_chunks(
+            "jobs",
+            [
+                (insert_jobs, seed, start, stop, today, kwargs["days"])
+                + (batch_size, using)
+                + owner_ids
+                for start, stop in chunks(kwargs["jobs"])
+            ],
+            workers,
+        )
+
+        # bulk_create() sends no signals: bring the derived data up to date
+        fixes = reconcile_facet_counts(using=using)
+        bump_version(LIST_SCOPE)
+        self.stdout.write(
+            f"Updated {len(fixes)} facet counts. "
+            f"Done in {time.perf_counter() - started:.1f}s."
+        )
+
+    def run_chunks(self, name, tasks, workers):
+        """
+        Run the chunk `tasks` (function, *args), in worker processes when
+        there are several.
+        """
+        started = time.perf_counter()
+        total = 0
+        with contextlib.ExitStack() as stack:
+            if workers == 1:
+                results = (func(*args) for func, *args in tasks)
+            else:
+                # Spawned, as forking a process with threads and open
+                # connections isn't safe; children connect on their own
+                connections.close_all()
+                pool = stack.enter_context(
+                    ProcessPoolExecutor(
+                        workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=django.setup,
+                    )
+                )
+                database_name = connections["default"].settings_dict["NAME"]
+                results = pool.map(
+                    partial(run_in_worker, database_name), tasks
+                )
+            for count in results:
+                total += count
+                rate = total / (time.perf_counter() - started)
+                self.stdout.write(f"{name}: {total} inserted ({rate:.0f}/s)")
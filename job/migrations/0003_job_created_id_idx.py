@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("job", "0002_job_owner"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["-creation_date", "-id"], name="job_created_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+SEARCH_TABLE = "job_search"
+
+
+def create_search_table(apps, schema_editor):
+    """
+    Create and fill the FTS5 search index on SQLite builds that have it.
+    Other databases use the in-process index (see job.search).
+    """
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                "title, location, description, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            return  # SQLite built without FTS5
+
+        # Rank title matches above location and description matches
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) "
+            "VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')"
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, location, "
+            "description) SELECT id, title, location, description FROM job_job"
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("job", "0003_job_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("job", "0004_job_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["contract_type", "-creation_date", "-id"],
+                name="job_contract_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["location", "-creation_date", "-id"],
+                name="job_location_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["owner", "-creation_date", "-id"],
+                name="job_owner_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["salary"], name="job_salary_idx"),
+        ),
+    ]
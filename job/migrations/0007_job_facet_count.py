@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:30
+
+import bisect
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def count_facets(apps, schema_editor):
+    """
+    Fill the facet counts from the existing jobs (as job.facets counts
+    them at the time of this migration).
+    """
+    using = schema_editor.connection.alias
+    Job = apps.get_model("job", "Job")
+    JobFacetCount = apps.get_model("job", "JobFacetCount")
+    bounds = settings.JOB_FACET_SALARY_BUCKETS
+    labels = [
+        f"<{bounds[0]}",
+        *(f"{low}-{high}" for low, high in zip(bounds, bounds[1:])),
+        f"{bounds[-1]}+",
+    ]
+    counts = Counter()
+    jobs = (
+        Job.objects.using(using)
+        .values_list("contract_type", "location", "salary")
+        .iterator(chunk_size=2000)
+    )
+    for contract_type, location, salary in jobs:
+        counts["contract_type", contract_type] += 1
+        counts["location", location] += 1
+        if salary is not None:
+            counts["salary", labels[bisect.bisect_right(bounds, salary)]] += 1
+    JobFacetCount.objects.using(using).bulk_create(
+        JobFacetCount(facet=facet, value=value, count=count)
+        for (facet, value), count in sorted(counts.items())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("job", "0006_job_unique_owner_reference"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobFacetCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("facet", models.CharField()),
+                ("value", models.CharField()),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("facet", "value"),
+                        name="job_facet_value_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(count_facets, migrations.RunPython.noop),
+    ]
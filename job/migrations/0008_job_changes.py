@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def record_existing_jobs(apps, schema_editor):
+    """
+    Start the change feed with every existing job, in id order.
+    """
+    using = schema_editor.connection.alias
+    Job = apps.get_model("job", "Job")
+    JobChange = apps.get_model("job", "JobChange")
+    job_ids = (
+        Job.objects.using(using)
+        .order_by("id")
+        .values_list("id", flat=True)
+        .iterator(chunk_size=2000)
+    )
+    JobChange.objects.using(using).bulk_create(
+        (JobChange(job_id=job_id) for job_id in job_ids), batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("job", "0007_job_facet_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name="JobChange",
+            fields=[
+                (
+                    "seq",
+                    models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                ("job_id", models.BigIntegerField()),
+                ("deleted", models.BooleanField(default=False)),
+                (
+                    "changed_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["job_id", "seq"], name="job_change_job_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(record_existing_jobs, migrations.RunPython.noop),
+    ]
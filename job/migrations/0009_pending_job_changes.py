@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("job", "0008_job_changes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingJobChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("job_id", models.BigIntegerField()),
+                ("deleted", models.BooleanField(default=False)),
+            ],
+        ),
+    ]
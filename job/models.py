@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Job(models.Model):
@@ -34,3 +35,85 @@ class Job(models.Model):
     creation_date = models.DateField(auto_now_add=True)  # Date created
     salary = models.IntegerField(null=True, blank=True)  # Optional salary
     contract_type = models.CharField(choices=CONTRACT_TYPE)  # Contract type
+    updated_at = models.DateTimeField(auto_now=True)  # Last saved
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order for job listings, which also serves
+            # creation_date range filters
+            models.Index(
+                fields=["-creation_date", "-id"], name="job_created_id_idx"
+            ),
+            # Equality filters followed by the listing order
+            models.Index(
+                fields=["contract_type", "-creation_date", "-id"],
+                name="job_contract_created_idx",
+            ),
+            models.Index(
+                fields=["location", "-creation_date", "-id"],
+                name="job_location_created_idx",
+            ),
+            models.Index(
+                fields=["owner", "-creation_date", "-id"],
+                name="job_owner_created_idx",
+            ),
+            # Salary range filters
+            models.Index(fields=["salary"], name="job_salary_idx"),
+        ]
+        constraints = [
+            # Upsert key for bulk imports (see JobBulkView)
+            models.UniqueConstraint(
+                fields=["owner", "reference"],
+                condition=~models.Q(reference=""),
+                name="job_unique_owner_reference",
+            ),
+        ]
+
+
+class JobFacetCount(models.Model):
+    """
+    Number of jobs per facet value, maintained by job.facets.
+    """
+
+    CONTRACT_TYPE = "contract_type"
+    LOCATION = "location"
+    SALARY = "salary"  # Values are salary bucket labels
+
+    facet = models.CharField()
+    value = models.CharField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["facet", "value"], name="job_facet_value_unique"
+            ),
+        ]
+
+
+class JobChange(models.Model):
+    """
+    Entry of the job change feed, maintained by job.changes: job `job_id`
+    was saved, or deleted (a tombstone), at sequence number `seq`.
+    """
+
+    seq = models.BigAutoField(primary_key=True)
+    job_id = models.BigIntegerField()  # Not a foreign key: outlives the job
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Later changes of a job, for compaction
+            models.Index(fields=["job_id", "seq"], name="job_change_job_idx"),
+        ]
+
+
+class PendingJobChange(models.Model):
+    """
+    Job change written in the transaction of the change, moved to the
+    feed (JobChange) once committed, by job.changes.
+    """
+
+    job_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
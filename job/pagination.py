@@ -0,0 +1,198 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+from urllib import parse
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import replace_query_param
+
+Cursor = namedtuple("Cursor", ["reverse", "position"])
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination keyed on a unique composite ordering.
+
+    The cursor stores every ordering value of the boundary row, so each
+    page is a single index range scan and deep pages cost the same as
+    the first one (DRF's CursorPagination falls back to OFFSET on ties).
+    """
+
+    page_size_query_param = "page_size"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async version of paginate_queryset(), for the async views.
+        """
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([row async for row in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        The (lazy) rows of the requested page, plus one to know whether
+        there is a following page.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [
+            queryset.model._meta.get_field(order.lstrip("-"))
+            for order in self.ordering
+        ]
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = self.cursor is not None and self.cursor.reverse
+        ordering = (
+            _reverse_ordering(self.ordering) if self.reverse else self.ordering
+        )
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(ordering, self.cursor.position)
+            )
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        """
+        Keep the page out of the fetched rows and set the links state.
+        """
+        self.page = results[: self.page_size]
+        has_following = len(results) > self.page_size
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self.cursor is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_keyset_filter(self, ordering, position):
+        """
+        Build the filter selecting rows strictly after `position`.
+        """
+        lookups = [
+            (order.lstrip("-"), "lt" if order.startswith("-") else "gt")
+            for order in ordering
+        ]
+
+        # Lexicographic comparison: (a, b) > (x, y) <=> a > x or (a = x, b > y)
+        after = Q()
+        for index, (name, lookup) in enumerate(lookups):
+            equal = {lookups[i][0]: position[i] for i in range(index)}
+            after |= Q(**equal, **{f"{name}__{lookup}": position[index]})
+
+        # Redundant bound on the leading column lets the database seek
+        # straight to the cursor in the index instead of scanning to it.
+        name, lookup = lookups[0]
+        return Q(**{f"{name}__{lookup}e": position[0]}) & after
+
+    def get_paginated_json(self, results, extra=None):
+        """
+        Wrap already encoded JSON results; the same output as rendering
+        get_paginated_response() with JSONRenderer. `extra` keys are
+        appended after the results.
+        """
+        links = [
+            json.dumps(link, ensure_ascii=False)
+            for link in (self.get_next_link(), self.get_previous_link())
+        ]
+        content = '{"next":%s,"previous":%s,"results":%s' % (*links, results)
+        for key, value in (extra or {}).items():
+            content += ",%s:%s" % (
+                json.dumps(key, ensure_ascii=False),
+                JSONRenderer().render(value).decode(),
+            )
+        return content + "}"
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1])
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[0])
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = urlsafe_b64decode(encoded.encode("ascii"))
+            tokens = parse.parse_qs(
+                querystring.decode("ascii"), keep_blank_values=True
+            )
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+            values = tokens["p"]
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = tuple(
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            )
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(reverse=reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        tokens = {"p": [str(value) for value in cursor.position]}
+        if cursor.reverse:
+            tokens["r"] = ["1"]
+
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = urlsafe_b64encode(querystring.encode("ascii")).decode(
+            "ascii"
+        )
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def _get_position_from_instance(self, instance, ordering=None):
+        if isinstance(instance, dict):
+            return tuple(instance[field.attname] for field in self.fields)
+        return tuple(getattr(instance, field.attname) for field in self.fields)
+
+
+class JobCursorPagination(KeysetCursorPagination):
+    """
+    Newest jobs first, keyed on (creation_date, id).
+    """
+
+    ordering = ("-creation_date", "-id")
+    page_size = settings.JOB_PAGE_SIZE
+    max_page_size = settings.JOB_MAX_PAGE_SIZE
@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from rest_framework.renderers import BaseRenderer
+
+from .serializers import escape_line_separators
+
+
+def _chunked(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON, one object per line.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        return "".join(
+            escape_line_separators(json.dumps(item, ensure_ascii=False)) + "\n"
+            for item in items
+        ).encode()
+
+    def render_rows(self, rows, serializer, chunk_size):
+        """
+        Stream FastJobSerializer rows, `chunk_size` lines per chunk.
+        """
+        to_json = serializer.to_json
+        for chunk in _chunked(rows, chunk_size):
+            yield escape_line_separators(
+                "".join([to_json(row) + "\n" for row in chunk])
+            )
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV with a header row, one job per line.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(
+            buffer, fieldnames=list(items[0]) if items else []
+        )
+        writer.writeheader()
+        writer.writerows(items)
+        return buffer.getvalue().encode()
+
+    def render_rows(self, rows, serializer, chunk_size):
+        """
+        Stream FastJobSerializer rows, `chunk_size` lines per chunk.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(serializer.names)
+        yield buffer.getvalue()
+        width = len(serializer.names)  # Leave out trailing key columns
+        for chunk in _chunked(rows, chunk_size):
+            buffer.seek(0)
+            buffer.truncate()
+            if len(serializer.columns) > width:
+                chunk = [row[:width] for row in chunk]
+            writer.writerows(chunk)
+            yield buffer.getvalue()
@@ -0,0 +1,363 @@
+"""
+Full-text search over job postings.
+
+Two interchangeable backends build an inverted index over the title,
+location and description of every job:
+
+- FTS5SearchBackend keeps the index in an SQLite FTS5 virtual table
+  (created by migration 0004) and ranks with bm25().
+- InMemorySearchBackend is a per-process inverted index used when the
+  database has no FTS5 support, following other processes' changes
+  through the change feed.
+
+Both are updated incrementally from Job signals (see job.signals). The
+FTS5 updates run as tasks; `manage.py reconcile_search_index` repairs
+the rows of any that were lost.
+"""
+
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection, connections, router, transaction
+
+from job.changes import get_job_changes, last_settled_seq
+from job.models import Job
+
+# Indexed fields and their ranking weights
+SEARCH_FIELDS = ("title", "location", "description")
+FIELD_WEIGHTS = (10.0, 5.0, 1.0)
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_TOKENS = 16
+
+RECONCILE_CHUNK_SIZE = 500  # Stale jobs loaded per query
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+class SearchHit(NamedTuple):
+    job_id: int
+    rank: float
+    snippet: str
+
+
+def normalize(text):
+    """
+    Lowercase and strip diacritics, like FTS5's unicode61 tokenizer.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+class FTS5SearchBackend:
+    """
+    Search backend on an SQLite FTS5 table (rowid = job id).
+    """
+
+    table = "job_search"
+    transactional = True  # Index writes share the job's transaction
+
+    @classmethod
+    def is_available(cls):
+        return (
+            connection.vendor == "sqlite"
+            and cls.table in connection.introspection.table_names()
+        )
+
+    def index(self, job):
+        using = job._state.db or router.db_for_write(Job)
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid = %s", [job.pk]
+            )
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, location, "
+                "description) VALUES (%s, %s, %s, %s)",
+                [job.pk, job.title, job.location, job.description],
+            )
+
+    def remove(self, job_id):
+        with connections[router.db_for_write(Job)].cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid = %s", [job_id]
+            )
+
+    def reconcile(self, using=None):
+        """
+        Index the jobs missing from the table or indexed with stale text,
+        and drop the rows of deleted jobs: updates queued as tasks may
+        be lost (e.g. by the "thread" backend on a restart). Returns the
+        ids of both.
+        """
+        using = using or router.db_for_write(Job)
+        job_table = Job._meta.db_table
+        with transaction.atomic(using), connections[using].cursor() as c:
+            c.execute(
+                f"SELECT j.id FROM {job_table} j LEFT JOIN {self.table} s "
+                "ON s.rowid = j.id WHERE s.rowid IS NULL "
+                "OR s.title IS NOT j.title OR s.location IS NOT j.location "
+                "OR s.description IS NOT j.description"
+            )
+            stale = [job_id for (job_id,) in c.fetchall()]
+            c.execute(
+                f"SELECT rowid FROM {self.table} WHERE rowid NOT IN "
+                f"(SELECT id FROM {job_table})"
+            )
+            deleted = [job_id for (job_id,) in c.fetchall()]
+            for start in range(0, len(stale), RECONCILE_CHUNK_SIZE):
+                chunk = stale[start : start + RECONCILE_CHUNK_SIZE]
+                for job in Job.objects.using(using).filter(pk__in=chunk):
+                    self.index(job)
+            for job_id in deleted:
+                c.execute(
+                    f"DELETE FROM {self.table} WHERE rowid = %s", [job_id]
+                )
+        return stale, deleted
+
+    def search(self, query, limit):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        # Quote every term so user input can't use FTS5 query syntax
+        match = " ".join(f'"{term}"' for term in terms)
+        with connections[router.db_for_read(Job)].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, rank, snippet({self.table}, -1, %s, %s, %s, "
+                f"%s) FROM {self.table} WHERE {self.table} MATCH %s "
+                "ORDER BY rank LIMIT %s",
+                [
+                    HIGHLIGHT_START,
+                    HIGHLIGHT_END,
+                    SNIPPET_ELLIPSIS,
+                    SNIPPET_TOKENS,
+                    match,
+                    limit,
+                ],
+            )
+            # bm25() is negative (lower is better), expose a positive score
+            return [
+                SearchHit(job_id, -rank, snippet)
+                for job_id, rank, snippet in cursor.fetchall()
+            ]
+
+
+class InMemorySearchBackend:
+    """
+    Per-process inverted index ranked with a field-weighted BM25.
+
+    The index is loaded from the database on first use, then kept up to
+    date by the Job signals of this process and, for the jobs changed by
+    other processes, by reading the change feed (see job.changes) at
+    most every `SEARCH_INDEX_REFRESH_INTERVAL` seconds. Loads and feed
+    reads happen outside the index lock: searches go on meanwhile,
+    except for the ones waiting for the first load.
+    """
+
+    transactional = False  # Updates are applied once the job is committed
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()  # Held to read or update the index
+        self._refresh_lock = threading.Lock()  # Held by the refreshing thread
+        self._loaded = False
+        self._refreshed_at = 0.0  # time.monotonic() of the last refresh
+        self._seq = 0  # Last change feed sequence number applied
+        self._postings = defaultdict(dict)  # term -> {job id: weighted tf}
+        self._documents = {}  # job id -> (field texts, length)
+        self._total_length = 0.0
+
+    def index(self, job):
+        with self._lock:
+            if not self._loaded:
+                return  # Picked up by the initial load
+            self._add(job.pk, [getattr(job, f) for f in SEARCH_FIELDS])
+
+    def remove(self, job_id):
+        with self._lock:
+            self._discard(job_id)
+
+    def search(self, query, limit):
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        self._refresh()
+        with self._lock:
+            postings = [self._postings.get(term, {}) for term in terms]
+            if not all(postings):
+                return []
+
+            postings.sort(key=len)
+            matches = set(postings[0]).intersection(*postings[1:])
+            total = len(self._documents)
+            average_length = self._total_length / total or 1.0
+            # Per term and per query factors, out of the per job loop
+            weighted_postings = [
+                (
+                    math.log(
+                        1 + (total - len(posting) + 0.5) / (len(posting) + 0.5)
+                    )
+                    * (self.k1 + 1),
+                    posting,
+                )
+                for posting in postings
+            ]
+            norm_base = self.k1 * (1 - self.b)
+            norm_per_length = self.k1 * self.b / average_length
+            documents = self._documents
+            scores = []
+            for job_id in matches:
+                norm = norm_base + norm_per_length * documents[job_id][1]
+                score = 0.0
+                for weight, posting in weighted_postings:
+                    tf = posting[job_id]
+                    score += weight * tf / (tf + norm)
+                scores.append((-score, job_id))
+
+            return [
+                SearchHit(job_id, -score, self._snippet(job_id, terms))
+                for score, job_id in heapq.nsmallest(limit, scores)
+            ]
+
+    def _refresh(self):
+        interval = settings.SEARCH_INDEX_REFRESH_INTERVAL
+        if self._loaded and time.monotonic() - self._refreshed_at < interval:
+            return
+        # Only the first load is waited for; later searches use the
+        # current index while another thread refreshes it
+        if not self._refresh_lock.acquire(blocking=not self._loaded):
+            return
+        try:
+            if not self._loaded:
+                self._load()
+            else:
+                self._apply_changes()
+            self._refreshed_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+    def _load(self):
+        # Changes from here on are applied again after the load
+        seq = last_settled_seq()
+        fresh = InMemorySearchBackend()  # Private until swapped in
+        rows = Job.objects.values_list("pk", *SEARCH_FIELDS)
+        for job_id, *texts in rows.iterator(chunk_size=2000):
+            fresh._add(job_id, texts)
+        with self._lock:
+            self._postings = fresh._postings
+            self._documents = fresh._documents
+            self._total_length = fresh._total_length
+            self._seq = seq
+            self._loaded = True
+        self._apply_changes()
+
+    def _apply_changes(self):
+        has_more = True
+        while has_more:
+            changes, seq, has_more = get_job_changes(
+                self._seq, settings.JOB_CHANGES_LIMIT
+            )
+            jobs = {
+                job_id: texts
+                for job_id, *texts in Job.objects.filter(
+                    pk__in=[c.job_id for c in changes if not c.deleted]
+                ).values_list("pk", *SEARCH_FIELDS)
+            }
+            with self._lock:
+                for change in changes:
+                    if change.job_id in jobs:
+                        self._add(change.job_id, jobs[change.job_id])
+                    else:
+                        self._discard(change.job_id)
+                self._seq = seq
+
+    def _add(self, job_id, texts):
+        self._discard(job_id)
+        weighted = Counter()
+        length = 0.0
+        for text, weight in zip(texts, FIELD_WEIGHTS):
+            tokens = tokenize(text)
+            length += weight * len(tokens)
+            for token in tokens:
+                weighted[token] += weight
+        for term, tf in weighted.items():
+            self._postings[term][job_id] = tf
+        self._documents[job_id] = (texts, length)
+        self._total_length += length
+
+    def _discard(self, job_id):
+        document = self._documents.pop(job_id, None)
+        if document is None:
+            return
+        texts, length = document
+        self._total_length -= length
+        for term in set(tokenize(" ".join(texts))):
+            posting = self._postings[term]
+            posting.pop(job_id, None)
+            if not posting:
+                del self._postings[term]
+
+    def _snippet(self, job_id, terms):
+        texts = self._documents[job_id][0]
+        # Prefer the longest field that matches, like FTS5's snippet()
+        for text in sorted(texts, key=len, reverse=True):
+            words = text.split()
+            hits = [
+                i
+                for i, word in enumerate(words)
+                if terms & set(tokenize(word))
+            ]
+            if hits:
+                break
+        else:
+            return ""
+
+        start = max(0, min(hits[0] - 2, len(words) - SNIPPET_TOKENS))
+        window = words[start : start + SNIPPET_TOKENS]
+        snippet = " ".join(
+            (
+                f"{HIGHLIGHT_START}{word}{HIGHLIGHT_END}"
+                if terms & set(tokenize(word))
+                else word
+            )
+            for word in window
+        )
+        if start > 0:
+            snippet = SNIPPET_ELLIPSIS + snippet
+        if start + SNIPPET_TOKENS < len(words):
+            snippet += SNIPPET_ELLIPSIS
+        return snippet
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    """
+    Return the process-wide search backend, FTS5 when available.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if FTS5SearchBackend.is_available():
+                    _backend = FTS5SearchBackend()
+                else:
+                    _backend = InMemorySearchBackend()
+    return _backend
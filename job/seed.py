@@ -0,0 +1,371 @@
+"""
+Deterministic generation of realistic users and jobs (see the seed_jobs
+command), to measure indexes, pagination and search at production size.
+
+Rows are generated in chunks of `CHUNK_SIZE`, each from its own random
+generator seeded with (seed, kind, chunk start), so the data only
+depends on the seed and the anchor date, not on how the chunks are
+spread over worker processes. Locations, contract types, owners and
+description words follow skewed (Zipf-like) distributions, and recent
+jobs are more frequent than old ones.
+
+Chunks are inserted with bulk_create(), which sends no signals, so each
+chunk also indexes its jobs for search (FTS5) and records them in the
+change feed, in the same transaction. Facet counts are reconciled once
+at the end by the command.
+"""
+
+import contextlib
+import random
+from datetime import UTC, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+
+from job.models import Job, JobChange
+from job.search import get_search_backend
+
+CHUNK_SIZE = 10_000  # Rows per generator and per transaction
+
+LOCATIONS = [
+    "Paris",
+    "Lyon",
+    "Marseille",
+    "Toulouse",
+    "Remote",
+    "Bordeaux",
+    "Lille",
+    "Nantes",
+    "Nice",
+    "Strasbourg",
+    "Montpellier",
+    "Rennes",
+    "Grenoble",
+    "Rouen",
+    "Toulon",
+    "Dijon",
+    "Angers",
+    "Nîmes",
+    "Reims",
+    "Clermont-Ferrand",
+    "Le Havre",
+    "Saint-Étienne",
+    "Tours",
+    "Limoges",
+    "Amiens",
+    "Metz",
+    "Brest",
+    "Perpignan",
+    "Orléans",
+    "Caen",
+    "Besançon",
+    "Mulhouse",
+    "Nancy",
+    "Pau",
+    "La Rochelle",
+    "Annecy",
+    "Poitiers",
+    "Avignon",
+    "Bayonne",
+    "Ajaccio",
+]
+LOCATION_WEIGHTS = [1 / rank**1.1 for rank in range(1, len(LOCATIONS) + 1)]
+
+CONTRACT_TYPE_WEIGHTS = {
+    Job.CDI: 55,
+    Job.CDD: 20,
+    Job.INTERIM: 10,
+    Job.ALTERNANCE: 8,
+    Job.FREELANCE: 7,
+}
+
+# Role, yearly salary of a mid-level CDI in the regions, skills drawn from
+ROLES = [
+    ("Développeur backend", 45_000, ["Python", "Django", "PostgreSQL"]),
+    ("Développeur frontend", 42_000, ["JavaScript", "React", "CSS"]),
+    ("Développeur full stack", 46_000, ["Python", "React", "Docker"]),
+    ("Ingénieur DevOps", 52_000, ["Kubernetes", "Terraform", "AWS"]),
+    ("Data scientist", 50_000, ["Python", "SQL", "statistiques"]),
+    ("Data engineer", 50_000, ["Spark", "SQL", "Airflow"]),
+    ("Chef de projet", 48_000, ["agilité", "Scrum", "planification"]),
+    ("Product owner", 50_000, ["Scrum", "roadmap", "recette"]),
+    ("Technicien support", 30_000, ["Windows", "réseau", "ITIL"]),
+    ("Commercial", 38_000, ["prospection", "négociation", "CRM"]),
+    ("Comptable", 36_000, ["fiscalité", "Excel", "SAP"]),
+    ("Assistant RH", 30_000, ["paie", "recrutement", "SIRH"]),
+    ("Infirmier", 32_000, ["soins", "urgences", "planning"]),
+    ("Magasinier", 24_000, ["CACES", "inventaire", "logistique"]),
+    ("Chargé de communication", 34_000, ["réseaux sociaux", "rédaction"]),
+    ("Électricien", 28_000, ["habilitation", "chantier", "dépannage"]),
+]
+ROLE_WEIGHTS = [1 / rank**0.8 for rank in range(1, len(ROLES) + 1)]
+SENIORITIES = [
+    ("junior", 0.8),
+    ("", 1.0),
+    ("confirmé", 1.15),
+    ("senior", 1.35),
+]
+SENIORITY_WEIGHTS = [3, 4, 2, 2]
+
+SKILLS = [
+    "Git",
+    "SQL",
+    "Linux",
+    "anglais",
+    "Excel",
+    "Java",
+    "Go",
+    "TypeScript",
+    "Vue.js",
+    "Redis",
+    "Elasticsearch",
+    "GCP",
+    "Azure",
+    "Ansible",
+    "Kafka",
+    "machine learning",
+    "sécurité",
+    "tests",
+    "API REST",
+    "management",
+    "Power BI",
+    "Salesforce",
+    "gestion de stock",
+    "relation client",
+]
+SKILL_WEIGHTS = [1 / rank for rank in range(1, len(SKILLS) + 1)]
+
+COMPANY_TRAITS = [
+    "une start-up en forte croissance",
+    "un groupe international",
+    "une PME familiale",
+    "un cabinet de conseil",
+    "une collectivité territoriale",
+    "un éditeur de logiciels",
+    "une association",
+    "un établissement de santé",
+]
+PERKS = [
+    "télétravail partiel",
+    "tickets restaurant",
+    "mutuelle prise en charge à 100 %",
+    "RTT",
+    "intéressement",
+    "horaires flexibles",
+    "formation continue",
+    "prime de fin d'année",
+]
+
+FIRST_NAMES = [
+    "Camille",
+    "Léa",
+    "Manon",
+    "Chloé",
+    "Inès",
+    "Sarah",
+    "Julie",
+    "Emma",
+    "Lucas",
+    "Hugo",
+    "Thomas",
+    "Nicolas",
+    "Karim",
+    "Yanis",
+    "Julien",
+    "Maxime",
+]
+LAST_NAMES = [
+    "Martin",
+    "Bernard",
+    "Dubois",
+    "Thomas",
+    "Robert",
+    "Richard",
+    "Petit",
+    "Durand",
+    "Leroy",
+    "Moreau",
+    "Simon",
+    "Laurent",
+    "Lefebvre",
+    "Michel",
+    "Garcia",
+    "Nguyen",
+]
+
+
+def chunks(count):
+    """
+    (start, stop) of each chunk of `count` rows.
+    """
+    return [
+        (start, min(start + CHUNK_SIZE, count))
+        for start in range(0, count, CHUNK_SIZE)
+    ]
+
+
+def chunk_random(seed, kind, start):
+    return random.Random(f"{seed}:{kind}:{start}")
+
+
+def user_email(seed, index):
+    return f"seed{seed}-user{index}@example.com"
+
+
+def generate_users(seed, start, stop, password, today):
+    """
+    Unsaved users `start` to `stop` (excluded), all with the same
+    password hash: hashing is what makes creating users slow.
+    """
+    rng = chunk_random(seed, "users", start)
+    joined_before = datetime.combine(today, time(), UTC)
+    for index in range(start, stop):
+        yield get_user_model()(
+            email=user_email(seed, index),
+            password=password,
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            date_joined=joined_before
+            - timedelta(seconds=rng.randrange(3 * 365 * 86400)),
+        )
+
+
+def generate_jobs(seed, start, stop, owner_ids, today, days):
+    """
+    Unsaved jobs `start` to `stop` (excluded) of the owners (user ids,
+    by user index), created in the `days` before `today`.
+    """
+    rng = chunk_random(seed, "jobs", start)
+    contract_types = list(CONTRACT_TYPE_WEIGHTS)
+    contract_weights = list(CONTRACT_TYPE_WEIGHTS.values())
+    midnight = datetime.combine(today, time(), UTC)
+    for index in range(start, stop):
+        role, base_salary, role_skills = rng.choices(ROLES, ROLE_WEIGHTS)[0]
+        seniority, factor = rng.choices(SENIORITIES, SENIORITY_WEIGHTS)[0]
+        location = rng.choices(LOCATIONS, LOCATION_WEIGHTS)[0]
+        contract_type = rng.choices(contract_types, contract_weights)[0]
+        title = f"{role} {seniority}".strip()
+
+        salary = base_salary * factor * rng.lognormvariate(0, 0.12)
+        if location in ("Paris", "Remote"):
+            salary *= 1.15
+        if contract_type == Job.ALTERNANCE:
+            salary = 0.4 * salary
+        salary = int(round(salary, -2))
+        if rng.random() < (0.5 if contract_type == Job.FREELANCE else 0.2):
+            salary = None  # Not disclosed
+
+        skills = list(
+            dict.fromkeys(
+                role_skills[:2] + rng.choices(SKILLS, SKILL_WEIGHTS, k=3)
+            )
+        )
+        description = (
+            f"{rng.choice(COMPANY_TRAITS).capitalize()} recrute un(e) "
+            f"{title.lower()} à {location}. Compétences attendues : "
+            f"{', '.join(skills)}. Avantages : "
+            f"{', '.join(rng.sample(PERKS, 2))}. Poste en "
+            f"{contract_type.upper()}, à pourvoir rapidement."
+        )
+
+        # More jobs in the last weeks than a year ago, all before `today`
+        age = int(days * 86400 * rng.random() ** 2) + 1
+        created = midnight - timedelta(seconds=age)
+        updated = created
+        if rng.random() < 0.3:  # Edited since
+            updated += timedelta(seconds=rng.randrange(age))
+        owner = owner_ids[int(len(owner_ids) * rng.random() ** 4)]
+        yield Job(
+            owner_id=owner,
+            reference=f"SEED{seed}-{index}",
+            title=title,
+            location=location,
+            description=description,
+            creation_date=created.date(),
+            salary=salary,
+            contract_type=contract_type,
+            updated_at=updated,
+        )
+
+
+@contextlib.contextmanager
+def explicit_timestamps():
+    """
+    Let bulk_create() keep the generated creation_date and updated_at.
+    Affects the whole process: only for the seed command.
+    """
+    fields = [
+        Job._meta.get_field("creation_date"),
+        Job._meta.get_field("updated_at"),
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def insert_users(seed, start, stop, password, today, batch_size, using):
+    User = get_user_model()
+    User.objects.using(using).bulk_create(
+        generate_users(seed, start, stop, password, today),
+        batch_size=batch_size,
+    )
+    return stop - start
+
+
+def load_owner_ids(seed, using):
+    """
+    Ids of the seed's users, by user index.
+    """
+    prefix = f"seed{seed}-user"
+    emails = (
+        get_user_model().objects.using(using).filter(email__startswith=prefix)
+    )
+    by_index = {
+        int(email[len(prefix) : email.index("@")]): user_id
+        for email, user_id in emails.values_list("email", "id").iterator(
+            chunk_size=10_000
+        )
+    }
+    return [by_index[index] for index in range(len(by_index))]
+
+
+_owner_ids = {}  # Seed -> owner ids, loaded once per worker process
+
+
+def insert_jobs(
+    seed, start, stop, today, days, batch_size, using, owner_ids=None
+):
+    if owner_ids is None:
+        if seed not in _owner_ids:
+            _owner_ids[seed] = load_owner_ids(seed, using)
+        owner_ids = _owner_ids[seed]
+    jobs = list(generate_jobs(seed, start, stop, owner_ids, today, days))
+    backend = get_search_backend()
+    with transaction.atomic(using=using), explicit_timestamps():
+        Job.objects.using(using).bulk_create(jobs, batch_size=batch_size)
+        if backend.transactional:
+            for job in jobs:
+                backend.index(job)
+        JobChange.objects.using(using).bulk_create(
+            (JobChange(job_id=job.pk) for job in jobs),
+            batch_size=batch_size,
+        )
+    return len(jobs)
+
+
+def run_in_worker(database_name, task):
+    """
+    Run the chunk `task` (function, *args) in a worker process, on the
+    command's database, whose name may have been set at runtime.
+    """
+    connection = connections["default"]
+    if connection.settings_dict["NAME"] != database_name:
+        connection.close()
+        connection.settings_dict["NAME"] = database_name
+    func, *args = task
+    return func(*args)
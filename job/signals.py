@@ -0,0 +1,70 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from job.cache import LIST_SCOPE, bump_version, detail_scope
+from job.changes import record_job_change
+from job.facets import job_facets, update_facet_counts
+from job.models import Job
+from job.search import get_search_backend
+from job.tasks import queue_search_update
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def update_job_search(sender, instance, signal, **kwargs):
+    backend = get_search_backend()
+    if backend.transactional:
+        # The FTS5 table is shared by every process: leave the update to
+        # a task worker, which indexes the job as committed. Lost tasks
+        # are caught up by the reconcile_search_index command.
+        queue_search_update(instance.pk)
+    elif signal is post_save:
+        # Per-process index: update it here, once the job is committed
+        transaction.on_commit(partial(backend.index, instance))
+    else:
+        transaction.on_commit(partial(backend.remove, instance.pk))
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_cache(sender, instance, **kwargs):
+    scopes = (LIST_SCOPE, detail_scope(instance.pk))
+    # Bump now so this process stops serving the old responses, and again
+    # on commit to drop anything cached by readers in between.
+    for scope in scopes:
+        bump_version(scope)
+        transaction.on_commit(partial(bump_version, scope))
+
+
+@receiver(pre_save, sender=Job)
+def snapshot_job_facets(sender, instance, using, **kwargs):
+    # Facet values before the save; set by the caller when it has them
+    if instance.pk is None or hasattr(instance, "_facets_before"):
+        return
+    previous = (
+        Job.objects.using(using)
+        .filter(pk=instance.pk)
+        .values_list("contract_type", "location", "salary", named=True)
+        .first()
+    )
+    instance._facets_before = job_facets(previous) if previous else []
+
+
+@receiver(post_save, sender=Job)
+def count_job_facets(sender, instance, using, **kwargs):
+    before = instance.__dict__.pop("_facets_before", [])
+    update_facet_counts(before, job_facets(instance), using)
+
+
+@receiver(post_delete, sender=Job)
+def uncount_job_facets(sender, instance, using, **kwargs):
+    update_facet_counts(job_facets(instance), [], using)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def record_change(sender, instance, signal, using, **kwargs):
+    record_job_change(instance.pk, signal is post_delete, using)
@@ -0,0 +1,45 @@
+import contextlib
+from contextvars import ContextVar
+
+from job.models import Job
+from job.search import get_search_backend
+from tasks.queue import task
+
+_search_batch = ContextVar("search_batch", default=None)
+
+
+@task
+def update_search_index(*job_ids):
+    """
+    Index the jobs as they are now, dropping the deleted ones.
+    """
+    backend = get_search_backend()
+    jobs = Job.objects.in_bulk(job_ids)
+    for job_id in job_ids:
+        if job_id in jobs:
+            backend.index(jobs[job_id])
+        else:
+            backend.remove(job_id)
+
+
+def queue_search_update(job_id):
+    batch = _search_batch.get()
+    if batch is None:
+        update_search_index.enqueue(job_id)
+    else:
+        batch.append(job_id)
+
+
+@contextlib.contextmanager
+def batched_search_updates():
+    """
+    Queue the search updates of the block as a single task.
+    """
+    batch = []
+    token = _search_batch.set(batch)
+    try:
+        yield
+    finally:
+        _search_batch.reset(token)
+    if batch:
+        update_search_index.enqueue(*dict.fromkeys(batch))
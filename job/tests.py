@@ -1,10 +1,63 @@
+import collections
+import csv
+import importlib
+import io
+import itertools
+import json
+import re
+from datetime import timedelta
+from unittest import mock
+
 import pytest
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
-from django.urls import reverse
-from rest_framework.test import APIClient
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import (
+    OperationalError,
+    connection,
+    connections,
+    router,
+    transaction,
+)
+from django.db.models import Count
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 from rest_framework_api_key.models import APIKey
 
-from job.models import Job
+import job.seed as seed_jobs
+import job.urls
+import my_job_board.urls
+from job.cache import (
+    LIST_SCOPE,
+    detail_scope,
+    get_cache,
+    get_validators,
+    get_version,
+)
+from job.changes import publish_job_changes
+from job.facets import reconcile_facet_counts
+from job.filters import JobFilterBackend
+from job.models import Job, JobChange, JobFacetCount, PendingJobChange
+from job.pagination import JobCursorPagination
+from job.search import (
+    FTS5SearchBackend,
+    InMemorySearchBackend,
+    get_search_backend,
+)
+from job.serializers import FastJobSerializer, JobSerializer
+from my_job_board.routers import PIN_COOKIE, replica_reads
+
+
+@pytest.fixture(autouse=True)
+def clear_job_cache():
+    # Cached responses must not leak between tests
+    get_cache().clear()
 
 
 @pytest.fixture
@@ -68,7 +121,7 @@ def test_job_list(api_client, user):
     url = reverse("job-list-create")
     response = api_client.get(url)
     assert response.status_code == 200
-    assert len(response.data) == 2
+    assert len(response.json()["results"]) == 2
 
 
 @pytest.mark.django_db
@@ -104,7 +157,7 @@ def test_job_retrieve(api_client, user):
     url = reverse("job-detail", args=[job.id])
     response = api_client.get(url)
     assert response.status_code == 200
-    assert response.data["title"] == "Job1"
+    assert response.json()["title"] == "Job1"
 
 
 @pytest.mark.django_db
@@ -202,3 +255,1428 @@ def test_job_update_with_jwt(user, obtain_token):
     assert response.status_code == 200
     job.refresh_from_db()
     assert job.title == "JWT Updated Job"
+
+
+@pytest.mark.django_db
+def test_job_list_cursor_pagination(api_client, user):
+    """Test walking the job list forwards and backwards with cursors."""
+    jobs = [
+        Job.objects.create(
+            title=f"Job{i}",
+            location="Paris",
+            description="Desc",
+            contract_type="cdi",
+            owner=user,
+        )
+        for i in range(5)
+    ]
+    # Same creation_date for every job: ties are broken on id
+    expected = [job.id for job in reversed(jobs)]
+
+    url = reverse("job-list-create")
+    response = api_client.get(url, {"page_size": 2})
+    assert response.status_code == 200
+    assert response.json()["previous"] is None
+    seen = [job["id"] for job in response.json()["results"]]
+    while response.json()["next"]:
+        response = api_client.get(response.json()["next"])
+        seen += [job["id"] for job in response.json()["results"]]
+    assert seen == expected
+
+    # The last page links back to the page before it
+    response = api_client.get(response.json()["previous"])
+    assert [job["id"] for job in response.json()["results"]] == expected[2:4]
+    assert response.json()["next"] is not None
+
+
+@pytest.mark.django_db
+def test_job_list_cursor_pagination_page_cost(
+    api_client, user, django_assert_num_queries
+):
+    """Test deeper pages run a single keyset query."""
+    for i in range(6):
+        Job.objects.create(
+            title=f"Job{i}",
+            location="Paris",
+            description="Desc",
+            contract_type="cdi",
+            owner=user,
+        )
+    url = reverse("job-list-create")
+    response = api_client.get(url, {"page_size": 2})
+    next_url = api_client.get(response.json()["next"]).json()["next"]
+    with django_assert_num_queries(1) as queries:
+        response = api_client.get(next_url)
+    assert "OFFSET" not in queries[0]["sql"]
+    assert len(response.json()["results"]) == 2
+
+
+@pytest.mark.django_db
+def test_job_list_invalid_cursor(api_client):
+    """Test a tampered cursor is rejected."""
+    url = reverse("job-list-create")
+    response = api_client.get(url, {"cursor": "not-a-cursor"})
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_job_list_page_size_cap(api_client, user, monkeypatch):
+    """Test page_size is capped by the paginator's max_page_size."""
+    monkeypatch.setattr(JobCursorPagination, "max_page_size", 2)
+    for i in range(3):
+        Job.objects.create(
+            title=f"Job{i}",
+            location="Paris",
+            description="Desc",
+            contract_type="cdi",
+            owner=user,
+        )
+    url = reverse("job-list-create")
+    response = api_client.get(url, {"page_size": 10_000})
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 2
+
+
+@pytest.fixture
+def search_jobs(user):
+    # Jobs matching "python" in different fields
+    return [
+        Job.objects.create(
+            title="Backend developer",
+            location="Paris",
+            description="We write Python and Django every day.",
+            contract_type="cdi",
+            owner=user,
+        ),
+        Job.objects.create(
+            title="Python developer",
+            location="Lyon",
+            description="Join our data team.",
+            contract_type="cdd",
+            owner=user,
+        ),
+        Job.objects.create(
+            title="Chef",
+            location="Marseille",
+            description="Intérim en cuisine.",
+            contract_type="interim",
+            owner=user,
+        ),
+    ]
+
+
+@pytest.mark.django_db
+def test_job_search_uses_fts5():
+    """Test SQLite test databases get the FTS5 backend."""
+    assert isinstance(get_search_backend(), FTS5SearchBackend)
+
+
+@pytest.mark.django_db
+def test_job_search_ranked(api_client, search_jobs):
+    """Test title matches rank first and snippets are highlighted."""
+    url = reverse("job-search")
+    response = api_client.get(url, {"q": "Python"})
+    assert response.status_code == 200
+    results = response.data["results"]
+    assert [job["id"] for job in results] == [
+        search_jobs[1].id,
+        search_jobs[0].id,
+    ]
+    assert results[0]["rank"] > results[1]["rank"]
+    assert "<mark>Python</mark>" in results[1]["snippet"]
+
+
+@pytest.mark.django_db
+def test_job_search_follows_updates(api_client, search_jobs):
+    """Test the index follows job saves and deletes."""
+    url = reverse("job-search")
+    chef = search_jobs[2]
+    chef.title = "Python chef"
+    chef.save()
+    search_jobs[1].delete()
+
+    response = api_client.get(url, {"q": "python"})
+    ids = [job["id"] for job in response.data["results"]]
+    assert ids == [chef.id, search_jobs[0].id]
+
+    # Accents are folded on both sides
+    response = api_client.get(url, {"q": "interim"})
+    assert [job["id"] for job in response.data["results"]] == [chef.id]
+
+
+@pytest.mark.django_db
+def test_reconcile_search_index(api_client, search_jobs):
+    """Test the reconcile command recovers lost index updates."""
+    python, chef = search_jobs[1], search_jobs[2]
+    Job.objects.filter(pk=chef.pk).update(title="Python chef")
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM job_search WHERE rowid = %s", [python.pk])
+        cursor.execute(
+            "INSERT INTO job_search (rowid, title, location, description) "
+            "VALUES (999, 'Python ghost', '', '')"
+        )
+
+    out = io.StringIO()
+    call_command("reconcile_search_index", stdout=out)
+    assert "Reindexed 2 jobs, removed 1 deleted." in out.getvalue()
+    response = api_client.get(reverse("job-search"), {"q": "python"})
+    ids = [job["id"] for job in response.data["results"]]
+    assert sorted(ids) == sorted([python.pk, chef.pk, search_jobs[0].pk])
+
+    out = io.StringIO()
+    call_command("reconcile_search_index", stdout=out)
+    assert "Reindexed 0 jobs, removed 0 deleted." in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_job_search_requires_query(api_client):
+    """Test an empty query is rejected."""
+    response = api_client.get(reverse("job-search"), {"q": " "})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_in_memory_search_backend(search_jobs):
+    """Test the fallback index ranks, highlights and updates."""
+    backend = InMemorySearchBackend()
+    hits = backend.search("python", limit=10)
+    assert [hit.job_id for hit in hits] == [
+        search_jobs[1].id,
+        search_jobs[0].id,
+    ]
+    assert "<mark>Python</mark>" in hits[1].snippet
+
+    backend.remove(search_jobs[1].id)
+    chef = search_jobs[2]
+    chef.description = "Python au menu."
+    backend.index(chef)
+    hits = backend.search("PYTHON", limit=10)
+    assert {hit.job_id for hit in hits} == {search_jobs[0].id, chef.id}
+    assert backend.search("interim", limit=10) == []
+    assert backend.search("python menu", limit=10)[0].job_id == chef.id
+
+
+@pytest.mark.django_db
+def test_in_memory_search_follows_change_feed(settings, search_jobs, user):
+    """Test the index picks up jobs changed by other processes."""
+    settings.JOB_CHANGES_SETTLE_TIME = 0
+    settings.SEARCH_INDEX_REFRESH_INTERVAL = 0
+    publish_job_changes()
+    backend = InMemorySearchBackend()
+    assert len(backend.search("python", limit=10)) == 2
+
+    # Saved by another process: only the change feed tells this one
+    rust = Job.objects.create(
+        title="Rust developer",
+        location="Paris",
+        description="Python too.",
+        contract_type="cdi",
+        owner=user,
+    )
+    search_jobs[1].delete()
+    publish_job_changes()
+    hits = backend.search("python", limit=10)
+    assert {hit.job_id for hit in hits} == {search_jobs[0].id, rust.id}
+
+    # Searches don't wait for a refresh in progress
+    Job.objects.filter(pk=rust.pk).delete()
+    publish_job_changes()
+    with backend._refresh_lock:
+        hits = backend.search("rust", limit=10)
+    assert [hit.job_id for hit in hits] == [rust.id]
+    assert backend.search("rust", limit=10) == []
+
+
+@pytest.mark.django_db
+def test_job_list_filters(api_client, user):
+    """Test the list endpoint filters on the supported fields."""
+    other = get_user_model().objects.create_user(
+        email="other@example.com", password="pass1234"
+    )
+    paris = Job.objects.create(
+        title="Job1",
+        location="Paris",
+        description="Desc",
+        contract_type="cdi",
+        salary=50000,
+        owner=user,
+    )
+    Job.objects.create(
+        title="Job2",
+        location="Paris",
+        description="Desc",
+        contract_type="cdd",
+        salary=30000,
+        owner=user,
+    )
+    lyon = Job.objects.create(
+        title="Job3",
+        location="Lyon",
+        description="Desc",
+        contract_type="cdi",
+        owner=other,
+    )
+    url = reverse("job-list-create")
+
+    def ids(params):
+        response = api_client.get(url, params)
+        assert response.status_code == 200
+        return {job["id"] for job in response.json()["results"]}
+
+    assert ids({"contract_type": "cdi"}) == {paris.id, lyon.id}
+    assert ids({"location": "Paris", "salary__gte": 40000}) == {paris.id}
+    assert ids({"salary__lte": 40000, "contract_type": "cdi"}) == set()
+    assert ids({"owner": other.id}) == {lyon.id}
+    today = paris.creation_date.isoformat()
+    assert len(ids({"creation_date__gte": today})) == 3
+    assert ids({"creation_date__lte": "2000-01-01"}) == set()
+
+
+@pytest.mark.django_db
+def test_job_list_invalid_filter(api_client):
+    """Test invalid filter values are rejected."""
+    url = reverse("job-list-create")
+    response = api_client.get(url, {"contract_type": "permanent"})
+    assert response.status_code == 400
+    response = api_client.get(url, {"salary__gte": "lots"})
+    assert response.status_code == 400
+    # Past SQLite's 64-bit integers
+    for name in ("owner", "salary__gte", "salary__lte"):
+        response = api_client.get(url, {name: str(2**63)})
+        assert response.status_code == 400
+    response = api_client.get(url, {"salary__lte": str(-(2**63) - 1)})
+    assert response.status_code == 400
+
+
+FILTER_VALUES = {
+    "contract_type": "cdi",
+    "location": "Paris",
+    "salary__gte": "30000",
+    "salary__lte": "90000",
+    "creation_date__gte": "2025-01-01",
+    "creation_date__lte": "2025-12-31",
+    "owner": "1",
+}
+
+
+def filter_indexes(names):
+    """
+    Indexes a filter combination may be searched on: those of its
+    equality filters, else those of its ranges.
+    """
+    equality = {
+        "contract_type": "job_contract_created_idx",
+        "location": "job_location_created_idx",
+        "owner": "job_owner_created_idx",
+    }
+    indexes = {equality[name] for name in names if name in equality}
+    return indexes or {
+        "job_salary_idx" if name.startswith("salary") else "job_created_id_idx"
+        for name in names
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "names",
+    [
+        names
+        for size in range(len(FILTER_VALUES) + 1)
+        for names in itertools.combinations(FILTER_VALUES, size)
+    ],
+    ids="+".join,
+)
+def test_job_list_filters_use_indexes(names):
+    """Test every filter combination is served by an index."""
+    params = {name: FILTER_VALUES[name] for name in names}
+    request = Request(APIRequestFactory().get("/", params))
+    queryset = JobFilterBackend().filter_queryset(
+        request, Job.objects.all(), view=None
+    )
+    # The listing order applied by JobCursorPagination
+    plan = queryset.order_by("-creation_date", "-id")[:51].explain()
+    if not names:
+        assert "SCAN job_job USING INDEX job_created_id_idx" in plan
+        return
+    assert "SCAN job_job" not in plan, plan
+    match = re.search(r"SEARCH job_job USING INDEX (\w+)", plan)
+    assert match and match[1] in filter_indexes(names), plan
+
+
+@pytest.mark.django_db
+def test_job_list_response_cache(api_client, user, django_assert_num_queries):
+    """Test cached list pages are served without queries until a write."""
+    Job.objects.create(
+        title="Job1",
+        location="Paris",
+        description="Desc",
+        contract_type="cdi",
+        owner=user,
+    )
+    url = reverse("job-list-create")
+    first = api_client.get(url, {"contract_type": "cdi", "page_size": 10})
+    with django_assert_num_queries(0):
+        # Same query in another order hits the same entry
+        second = api_client.get(url, {"page_size": 10, "contract_type": "cdi"})
+    assert second.content == first.content
+
+    Job.objects.create(
+        title="Job2",
+        location="Lyon",
+        description="Desc",
+        contract_type="cdi",
+        owner=user,
+    )
+    response = api_client.get(url, {"contract_type": "cdi", "page_size": 10})
+    assert len(response.json()["results"]) == 2
+
+
+@pytest.mark.django_db
+def test_job_detail_conditional_get(
+    api_client, user, django_assert_num_queries
+):
+    """Test ETag/Last-Modified validators and precise invalidation."""
+    job, other = [
+        Job.objects.create(
+            title=f"Job{i}",
+            location="Paris",
+            description="Desc",
+            contract_type="cdi",
+            owner=user,
+        )
+        for i in range(2)
+    ]
+    url = reverse("job-detail", args=[job.id])
+    response = api_client.get(url)
+    etag = response["ETag"]
+    assert response["Last-Modified"]
+
+    with django_assert_num_queries(0):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+    other_version = get_version(detail_scope(other.id))
+    api_client.force_authenticate(user=user)
+    response = api_client.patch(url, {"title": "Updated"})
+    assert response.status_code == 200
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()["title"] == "Updated"
+    assert response["ETag"] != etag
+    # Other jobs keep their cached responses
+    assert get_version(detail_scope(other.id)) == other_version
+
+
+@pytest.fixture
+def tricky_jobs(user):
+    # Values exercising every encoder and JSON escaping rule
+    return [
+        Job.objects.create(
+            title='Développeur "senior" \\ C++',
+            location="Zürich\u2028Genève",
+            description="Line1\nLine2\ttab\u2029 emoji 🚀 <b>&</b>",
+            contract_type="interim",
+            reference="",
+            owner=user,
+        ),
+        Job.objects.create(
+            title="Job2",
+            location="Lyon",
+            description="",
+            contract_type="cdd",
+            reference="REF-2",
+            salary=-5,
+            owner=user,
+        ),
+        Job.objects.create(
+            title="Job3",
+            location="Paris",
+            description="Desc",
+            contract_type="cdi",
+            salary=2**40,
+            owner=user,
+        ),
+    ]
+
+
+@pytest.mark.django_db
+def test_fast_job_serializer_is_byte_identical(tricky_jobs):
+    """Test the fast path matches JobSerializer + JSONRenderer exactly."""
+    queryset = Job.objects.order_by("id")
+    expected = JSONRenderer().render(JobSerializer(queryset, many=True).data)
+    serializer = FastJobSerializer()
+    rows = queryset.values_list(*serializer.columns)
+    assert serializer.render(rows).encode() == expected
+
+
+@pytest.mark.django_db
+def test_job_list_fast_path_matches_serializer(api_client, tricky_jobs):
+    """Test the list endpoint output matches the ModelSerializer path."""
+    url = reverse("job-list-create")
+    response = api_client.get(url, {"page_size": 2})
+    next_url = response.json()["next"]
+    jobs = Job.objects.order_by("-creation_date", "-id")[:2]
+    expected = JSONRenderer().render(
+        {
+            "next": next_url,
+            "previous": None,
+            "results": JobSerializer(jobs, many=True).data,
+        }
+    )
+    assert response["Content-Type"] == "application/json"
+    assert response.content == expected
+
+
+@pytest.mark.django_db
+def test_job_export_ndjson(api_client, tricky_jobs):
+    """Test the NDJSON export streams one serialized job per line."""
+    url = reverse("job-export")
+    response = api_client.get(url, {"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson; charset=utf-8"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    expected = JobSerializer(Job.objects.order_by("id"), many=True).data
+    assert [json.loads(line) for line in lines] == json.loads(
+        JSONRenderer().render(expected)
+    )
+
+
+@pytest.mark.django_db
+def test_job_export_csv_with_filters_and_watermark(api_client, tricky_jobs):
+    """Test the CSV export applies list filters and the since watermark."""
+    url = reverse("job-export")
+    response = api_client.get(
+        url, {"format": "csv", "salary__gte": -10, "since": tricky_jobs[1].id}
+    )
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/csv; charset=utf-8"
+    content = b"".join(response.streaming_content).decode()
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert [int(row["id"]) for row in rows] == [tricky_jobs[2].id]
+    assert rows[0]["salary"] == str(2**40)
+    assert rows[0]["reference"] == ""
+
+    # Empty exports still carry the header
+    response = api_client.get(
+        url, {"format": "csv", "since": tricky_jobs[2].id}
+    )
+    content = b"".join(response.streaming_content).decode()
+    assert content.splitlines() == [",".join(JobSerializer().fields)]
+
+
+@pytest.mark.django_db
+def test_job_export_invalid_watermark(api_client):
+    """Test an invalid since value is rejected."""
+    url = reverse("job-export")
+    response = api_client.get(url, {"since": "yesterday"})
+    assert response.status_code == 400
+
+
+def bulk_job(**fields):
+    return {
+        "title": "Bulk job",
+        "location": "Paris",
+        "description": "Imported",
+        "contract_type": "cdi",
+        **fields,
+    }
+
+
+@pytest.mark.django_db
+def test_job_bulk_create_and_upsert(api_client, user):
+    """Test bulk import creates, then upserts on (owner, reference)."""
+    api_client.force_authenticate(user=user)
+    url = reverse("job-bulk")
+    response = api_client.post(
+        url,
+        [bulk_job(reference="A"), bulk_job(reference="B"), bulk_job()],
+        format="json",
+    )
+    assert response.status_code == 200
+    results = response.data["results"]
+    assert [r["status"] for r in results] == ["created"] * 3
+    job_a = Job.objects.get(owner=user, reference="A")
+    assert results[0]["id"] == job_a.id
+
+    response = api_client.post(
+        url,
+        [bulk_job(reference="A", title="Updated A"), bulk_job(reference="C")],
+        format="json",
+    )
+    assert response.status_code == 200
+    results = response.data["results"]
+    assert [r["status"] for r in results] == ["updated", "created"]
+    assert results[0]["id"] == job_a.id
+    job_a.refresh_from_db()
+    assert job_a.title == "Updated A"
+    assert Job.objects.filter(owner=user).count() == 4
+
+    # Upserted jobs are visible to the search index like regular saves
+    response = api_client.get(reverse("job-search"), {"q": "updated"})
+    assert [job["id"] for job in response.data["results"]] == [job_a.id]
+
+
+@pytest.mark.django_db
+def test_job_bulk_ndjson(api_client, user):
+    """Test bulk import accepts NDJSON bodies."""
+    api_client.force_authenticate(user=user)
+    body = "\n".join(json.dumps(bulk_job(reference=f"N{i}")) for i in range(3))
+    response = api_client.post(
+        reverse("job-bulk"), body, content_type="application/x-ndjson"
+    )
+    assert response.status_code == 200
+    assert Job.objects.filter(reference__startswith="N").count() == 3
+
+
+@pytest.mark.django_db
+def test_job_bulk_is_all_or_nothing(api_client, user):
+    """Test one invalid item rejects the whole batch with its errors."""
+    api_client.force_authenticate(user=user)
+    response = api_client.post(
+        reverse("job-bulk"),
+        [
+            bulk_job(reference="A"),
+            bulk_job(contract_type="permanent"),
+            bulk_job(title=""),
+        ],
+        format="json",
+    )
+    assert response.status_code == 400
+    results = response.data["results"]
+    assert [r["index"] for r in results] == [1, 2]
+    assert "contract_type" in results[0]["errors"]
+    assert "title" in results[1]["errors"]
+    assert not Job.objects.exists()
+
+
+@pytest.mark.django_db
+def test_job_bulk_rejects_duplicate_references(api_client, user):
+    """Test references equal once validated are reported as duplicates."""
+    api_client.force_authenticate(user=user)
+    response = api_client.post(
+        reverse("job-bulk"),
+        [
+            bulk_job(reference=5),
+            bulk_job(reference="A"),
+            bulk_job(reference="5"),
+            bulk_job(reference="A "),
+        ],
+        format="json",
+    )
+    assert response.status_code == 400
+    results = response.data["results"]
+    assert [r["index"] for r in results] == [2, 3]
+    assert "'5'" in results[0]["errors"]["reference"][0]
+    assert "'A'" in results[1]["errors"]["reference"][0]
+    assert not Job.objects.exists()
+
+
+@pytest.mark.django_db
+def test_job_reference_unique_per_owner(api_client, user):
+    """Test creating or renaming onto a used reference is a 400."""
+    api_client.force_authenticate(user=user)
+    url = reverse("job-list-create")
+    response = api_client.post(url, bulk_job(reference="A"), format="json")
+    assert response.status_code == 201
+    response = api_client.post(url, bulk_job(reference="A"), format="json")
+    assert response.status_code == 400
+    assert "reference" in response.data
+
+    response = api_client.post(url, bulk_job(reference="B"), format="json")
+    detail = reverse("job-detail", args=[response.data["id"]])
+    response = api_client.patch(detail, {"reference": "A"}, format="json")
+    assert response.status_code == 400
+    assert "reference" in response.data
+    # Saving a job with its own reference is fine
+    response = api_client.patch(detail, {"reference": "B"}, format="json")
+    assert response.status_code == 200
+
+    other = get_user_model().objects.create_user(
+        email="other@example.com", password="pass1234"
+    )
+    api_client.force_authenticate(user=other)
+    response = api_client.post(url, bulk_job(reference="A"), format="json")
+    assert response.status_code == 201
+
+
+@pytest.mark.django_db
+def test_job_bulk_rejects_invalid_references(api_client, user):
+    """Test references that aren't strings get per-item errors."""
+    api_client.force_authenticate(user=user)
+    response = api_client.post(
+        reverse("job-bulk"),
+        [bulk_job(reference=["x"]), bulk_job(reference={"x": 1})],
+        format="json",
+    )
+    assert response.status_code == 400
+    results = response.data["results"]
+    assert [r["index"] for r in results] == [0, 1]
+    assert all("reference" in r["errors"] for r in results)
+
+
+@pytest.mark.django_db
+def test_job_bulk_requires_authentication(api_client):
+    """Test anonymous clients can't import jobs."""
+    response = api_client.post(
+        reverse("job-bulk"), [bulk_job()], format="json"
+    )
+    assert response.status_code == 401
+
+
+# Tests using the "replica" alias (see conftest.py) must commit for its
+# connection to see their rows
+replica_db = pytest.mark.django_db(
+    transaction=True, databases=["default", "replica"]
+)
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICAS = ["replica"]
+    settings.DATABASE_REPLICA_CHECK_INTERVAL = 0
+    settings.DATABASE_REPLICA_HEALTH_CHECK = "job.tests.replica_is_up"
+    return connections["replica"]
+
+
+@pytest.fixture
+def no_job_cache(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        settings.JOB_CACHE_ALIAS: {
+            "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+        },
+    }
+
+
+def replica_is_up(alias):
+    return True
+
+
+def replica_is_down(alias):
+    return False
+
+
+def job_queries(captured):
+    return [q for q in captured if "job_job" in q["sql"]]
+
+
+@replica_db
+def test_job_reads_use_replica(replica, no_job_cache, user):
+    """Test list, detail, search and export reads go to the replica."""
+    job = Job.objects.create(
+        owner=user,
+        title="Replicated engineer",
+        location="Paris",
+        description="Read me from the replica",
+        contract_type="cdi",
+    )
+    client = APIClient()
+    for url in (
+        reverse("job-list-create"),
+        reverse("job-detail", args=[job.pk]),
+        reverse("job-search") + "?q=replicated",
+        reverse("job-export") + "?format=ndjson",
+    ):
+        with CaptureQueriesContext(connection) as primary:
+            with CaptureQueriesContext(replica) as secondary:
+                response = client.get(url)
+                b"".join(getattr(response, "streaming_content", [b""]))
+        assert response.status_code == 200, url
+        assert job_queries(secondary), url
+        assert not job_queries(primary), url
+
+
+@replica_db
+def test_job_reads_after_write_stay_on_primary(replica, user, obtain_token):
+    """Test clients read their own writes from the primary."""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {obtain_token}")
+    response = client.post(
+        reverse("job-list-create"),
+        {
+            "title": "Fresh job",
+            "location": "Lyon",
+            "description": "Just written",
+            "contract_type": "cdi",
+        },
+    )
+    assert response.status_code == 201
+    assert PIN_COOKIE in response.cookies
+
+    with CaptureQueriesContext(replica) as secondary:
+        response = client.get(
+            reverse("job-detail", args=[response.data["id"]])
+        )
+    assert response.status_code == 200
+    assert not job_queries(secondary)
+
+
+@replica_db
+def test_job_cache_replica_responses(replica, user, obtain_token):
+    """Test responses read from a replica are never served to writers."""
+    writer = APIClient()
+    writer.credentials(HTTP_AUTHORIZATION=f"Bearer {obtain_token}")
+    reader = APIClient()
+    url = reverse("job-list-create")
+    response = writer.post(
+        url,
+        {
+            "title": "Fresh job",
+            "location": "Lyon",
+            "description": "Just written",
+            "contract_type": "cdi",
+        },
+    )
+    assert response.status_code == 201
+
+    # Another client fills the cache for the new version from the replica
+    with CaptureQueriesContext(replica) as secondary:
+        response = reader.get(url)
+    assert job_queries(secondary)
+    assert "-r" in response["ETag"]
+    assert "Last-Modified" not in response
+    # As if the replica lagged behind the write
+    etag, key = get_validators(
+        APIRequestFactory().get(url), LIST_SCOPE, get_version(LIST_SCOPE)[0]
+    )
+    _, content_type, replica_etag, _ = get_cache().get(key)
+    get_cache().set(
+        key, (b'{"results": []}', content_type, replica_etag, None)
+    )
+    assert reader.get(url).json()["results"] == []
+
+    # The writer renders it from the primary, for everyone
+    with CaptureQueriesContext(replica) as secondary:
+        response = writer.get(url)
+    assert not job_queries(secondary)
+    assert response.json()["results"][0]["title"] == "Fresh job"
+    assert response["ETag"] == etag
+    response = reader.get(url, HTTP_IF_NONE_MATCH=replica_etag)
+    assert response.status_code == 200
+    assert response.json()["results"][0]["title"] == "Fresh job"
+
+
+def test_unhealthy_replica_out_of_rotation(replica, settings):
+    """Test reads fall back to the primary when the replica is unhealthy."""
+    with replica_reads():
+        assert router.db_for_read(Job) == "replica"
+        settings.DATABASE_REPLICA_HEALTH_CHECK = "job.tests.replica_is_down"
+        assert router.db_for_read(Job) == "default"
+    assert router.db_for_read(Job) == "default"  # Outside replica_reads()
+
+
+@pytest.fixture
+def async_views(settings):
+    # Route the job list and detail to job.async_views
+    def reload_urls():
+        importlib.reload(job.urls)
+        importlib.reload(my_job_board.urls)
+        clear_url_caches()
+
+    settings.JOB_ASYNC_VIEWS = True
+    reload_urls()
+    yield AsyncClient()
+    settings.JOB_ASYNC_VIEWS = False
+    reload_urls()
+
+
+@pytest.mark.django_db
+def test_async_job_views_match_sync_views(async_views, tricky_jobs):
+    """Test the async list and detail responses are byte-identical."""
+    list_url = reverse("job-list-create")
+    first = APIClient().get(list_url, {"page_size": 2})
+    urls = [
+        (list_url, {"page_size": 2}),
+        (list_url, {"contract_type": "cdi", "salary__gte": 0}),
+        (list_url, {"fields": "title,salary", "omit": "salary"}),
+        (first.json()["next"], {}),
+        (reverse("job-detail", args=[tricky_jobs[0].pk]), {}),
+        (reverse("job-detail", args=[tricky_jobs[1].pk]), {"omit": "id"}),
+    ]
+    for url, params in urls:
+        get_cache().clear()
+        expected = APIClient().get(url, params)
+        get_cache().clear()
+        response = async_to_sync(async_views.get)(url, params)
+        assert response.status_code == expected.status_code == 200, url
+        assert response.content == expected.content, url
+        assert response["Content-Type"] == expected["Content-Type"]
+        assert "ETag" in response
+        # And again from the response cache
+        response = async_to_sync(async_views.get)(url, params)
+        assert response.content == expected.content, url
+
+
+@pytest.mark.django_db
+def test_async_job_views_fall_back_to_sync(async_views, user, obtain_token):
+    """Test writes and error responses are answered by the sync views."""
+    auth = {"Authorization": f"Bearer {obtain_token}"}
+    response = async_to_sync(async_views.post)(
+        reverse("job-list-create"),
+        {
+            "title": "Async job",
+            "location": "Paris",
+            "description": "Created through the sync view",
+            "contract_type": "cdi",
+        },
+        content_type="application/json",
+        headers=auth,
+    )
+    assert response.status_code == 201
+    job_id = response.json()["id"]
+    assert "Server-Timing" in response
+
+    for url, params, status in (
+        (reverse("job-list-create"), {"salary__gte": "lots"}, 400),
+        (reverse("job-detail", args=[job_id]), {"fields": "nope"}, 400),
+        (reverse("job-list-create"), {"cursor": "garbage"}, 404),
+        (reverse("job-detail", args=[job_id + 1]), {}, 404),
+    ):
+        expected = APIClient().get(url, params)
+        response = async_to_sync(async_views.get)(url, params)
+        assert response.status_code == expected.status_code == status, url
+        assert response.content == expected.content, url
+
+    response = async_to_sync(async_views.get)(
+        reverse("job-detail", args=[job_id]), {"format": "api"}
+    )
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/html")
+
+    response = async_to_sync(async_views.delete)(
+        reverse("job-detail", args=[job_id]), headers=auth
+    )
+    assert response.status_code == 204
+    assert not Job.objects.filter(pk=job_id).exists()
+
+
+def stored_facets():
+    return {
+        (row.facet, row.value): row.count
+        for row in JobFacetCount.objects.filter(count__gt=0)
+    }
+
+
+@pytest.mark.django_db
+def test_job_facet_counts_follow_signals(user, obtain_token):
+    """Test saves, updates, deletes and bulk upserts update the counts."""
+    job = Job.objects.create(
+        title="Job1",
+        location="Paris",
+        description="Desc",
+        contract_type="cdi",
+        salary=45_000,
+        owner=user,
+    )
+    Job.objects.create(
+        title="Job2",
+        location="Paris",
+        description="Desc",
+        contract_type="cdd",
+        owner=user,
+    )
+    assert stored_facets() == {
+        ("contract_type", "cdi"): 1,
+        ("contract_type", "cdd"): 1,
+        ("location", "Paris"): 2,
+        ("salary", "40000-50000"): 1,
+    }
+
+    job.location = "Lyon"
+    job.salary = 120_000
+    job.save()
+    job.delete()
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {obtain_token}")
+    items = [
+        {
+            "title": f"Bulk {i}",
+            "location": "Remote",
+            "description": "Desc",
+            "contract_type": "freelance",
+            "reference": f"REF-{i}",
+            "salary": 10_000,
+        }
+        for i in range(2)
+    ]
+    assert (
+        client.post(reverse("job-bulk"), items, format="json").status_code
+        == 200
+    )
+    items[0]["contract_type"] = "interim"
+    assert (
+        client.post(reverse("job-bulk"), items, format="json").status_code
+        == 200
+    )
+
+    assert stored_facets() == {
+        ("contract_type", "cdd"): 1,
+        ("contract_type", "freelance"): 1,
+        ("contract_type", "interim"): 1,
+        ("location", "Paris"): 1,
+        ("location", "Remote"): 2,
+        ("salary", "<30000"): 2,
+    }
+    assert reconcile_facet_counts() == []
+
+
+@pytest.mark.django_db
+def test_job_bulk_counts_facets_once_per_value(api_client, user):
+    """Test bulk imports update each facet count once per chunk."""
+    api_client.force_authenticate(user=user)
+    items = [
+        bulk_job(reference=f"{location}{i}", salary=45_000, location=location)
+        for i in range(20)
+        for location in ("Paris", "Lyon")
+    ]
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.post(reverse("job-bulk"), items, format="json")
+    assert response.status_code == 200
+    facet_writes = [
+        query["sql"]
+        for query in captured
+        if query["sql"].startswith(
+            ('UPDATE "job_jobfacetcount"', 'INSERT INTO "job_jobfacetcount"')
+        )
+    ]
+    # cdi, Paris, Lyon and one salary bucket: update, then insert
+    assert len(facet_writes) == 8
+    assert stored_facets() == {
+        ("contract_type", "cdi"): 40,
+        ("location", "Lyon"): 20,
+        ("location", "Paris"): 20,
+        ("salary", "40000-50000"): 40,
+    }
+
+
+@pytest.mark.django_db
+def test_reconcile_job_facets_fixes_drift(user):
+    """Test the reconcile command corrects updates that skip signals."""
+    for location in ("Paris", "Paris", "Lyon"):
+        Job.objects.create(
+            title="Job",
+            location=location,
+            description="Desc",
+            contract_type="cdi",
+            owner=user,
+        )
+    Job.objects.filter(location="Lyon").update(location="Nantes")
+    JobFacetCount.objects.filter(value="cdi").update(count=7)
+
+    out = io.StringIO()
+    call_command("reconcile_job_facets", stdout=out)
+    assert "contract_type='cdi': 7 -> 3" in out.getvalue()
+    assert "Fixed 3 facet counts." in out.getvalue()
+    assert stored_facets() == {
+        ("contract_type", "cdi"): 3,
+        ("location", "Paris"): 2,
+        ("location", "Nantes"): 1,
+    }
+    assert not JobFacetCount.objects.filter(value="Lyon").exists()
+
+
+@pytest.mark.django_db
+def test_job_facets_endpoint(
+    api_client, tricky_jobs, django_assert_num_queries
+):
+    """Test the facets endpoint reads the counts table only."""
+    url = reverse("job-facets")
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.get(url)
+    assert response.status_code == 200
+    assert not [q for q in captured if '"job_job"' in q["sql"]]
+    assert response.json() == {
+        "total": 3,
+        "contract_type": {"cdd": 1, "cdi": 1, "interim": 1},
+        "location": {"Lyon": 1, "Paris": 1, "Zürich Genève": 1},
+        "salary": {"<30000": 1, "100000+": 1},
+    }
+
+    # Served from the response cache until a job changes
+    with django_assert_num_queries(1):  # API key
+        assert api_client.get(url).json()["total"] == 3
+    tricky_jobs[0].delete()
+    assert api_client.get(url).json()["total"] == 2
+
+
+@pytest.mark.django_db
+def test_my_job_list(user, obtain_token, django_assert_num_queries):
+    """Test posters list their own jobs in a fixed number of queries."""
+    other = get_user_model().objects.create_user(
+        email="other@example.com", password="pass1234"
+    )
+    Job.objects.create(
+        title="Not mine",
+        location="Paris",
+        description="Desc",
+        contract_type="cdi",
+        owner=other,
+    )
+    client = APIClient()
+    url = reverse("my-job-list")
+    assert client.get(url).status_code == 401
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {obtain_token}")
+
+    mine = []
+    for count in (0, 3, 60):
+        while len(mine) < count:
+            mine.append(
+                Job.objects.create(
+                    title=f"Mine {len(mine)}",
+                    location="Lyon",
+                    description="Desc",
+                    contract_type=("cdi", "cdd")[len(mine) % 2],
+                    owner=user,
+                )
+            )
+        with django_assert_num_queries(1):
+            response = client.get(url, {"page_size": 20})
+        assert [job["id"] for job in response.json()["results"]] == [
+            job.id for job in reversed(mine)
+        ][:20]
+        with django_assert_num_queries(2):
+            response = client.get(url, {"page_size": 20, "counts": "1"})
+        assert response.json()["counts"] == {
+            "total": count,
+            "contract_type": (
+                {"cdd": count // 2, "cdi": count - count // 2} if count else {}
+            ),
+        }
+
+    next_url = response.json()["next"]
+    response = client.get(next_url)
+    assert response.json()["results"][0]["id"] == mine[-21].id
+    response = client.get(url, {"counts": "1", "format": "api"})
+    assert response.status_code == 200
+    assert response.data["counts"]["total"] == 60
+
+
+@pytest.mark.django_db
+def test_my_job_list_uses_owner_index(user):
+    """Test the my-jobs page and counts queries walk the owner index."""
+    queryset = Job.objects.filter(owner_id=user.pk)
+    page = queryset.order_by("-creation_date", "-id")[:51].explain()
+    assert "job_owner_created_idx" in page, page
+    counts = (
+        queryset.order_by()
+        .values_list("contract_type")
+        .annotate(count=Count("id"))
+        .explain()
+    )
+    assert re.search(r"SEARCH job_job USING .*INDEX job_\w*owner", counts)
+
+
+def job_sql(captured):
+    return " ".join(q["sql"] for q in captured if '"job_job"' in q["sql"])
+
+
+@pytest.mark.django_db
+def test_job_sparse_fieldsets(api_client, tricky_jobs):
+    """Test ?fields= and ?omit= trim both the payload and the SELECT."""
+    url = reverse("job-list-create")
+    params = {"fields": "title,salary,location", "page_size": 2}
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.get(url, params)
+    assert response.status_code == 200
+    assert "description" not in job_sql(captured)
+    jobs = Job.objects.order_by("-creation_date", "-id")
+    expected = JobSerializer(
+        jobs[:2], many=True, fields=("title", "location", "salary")
+    ).data
+    assert response.json()["results"] == json.loads(
+        JSONRenderer().render(expected)
+    )
+    assert list(response.json()["results"][0]) == [
+        "title",
+        "location",
+        "salary",
+    ]
+    # Cursors still work without id and creation_date in the output
+    response = api_client.get(response.json()["next"])
+    expected = JobSerializer(
+        jobs[2:], many=True, fields=("title", "location", "salary")
+    ).data
+    assert response.json()["results"] == json.loads(
+        JSONRenderer().render(expected)
+    )
+
+    detail = reverse("job-detail", args=[tricky_jobs[0].pk])
+    for params in ({}, {"format": "api"}):
+        params = {"omit": "description,owner", **params}
+        with CaptureQueriesContext(connection) as captured:
+            response = api_client.get(detail, params)
+        assert response.status_code == 200
+        assert "description" not in job_sql(captured)
+        data = response.data if "format" in params else response.json()
+        assert "owner" not in data
+        assert data["location"] == tricky_jobs[0].location
+
+    response = api_client.get(url, {"fields": "title,secret"})
+    assert response.status_code == 400
+    assert response.json() == {"fields": "Unknown fields: secret."}
+
+
+@pytest.mark.django_db
+def test_job_export_sparse_fieldset(api_client, tricky_jobs):
+    """Test exports write only the requested columns."""
+    response = api_client.get(
+        reverse("job-export"), {"format": "csv", "fields": "salary,title"}
+    )
+    content = b"".join(response.streaming_content).decode()
+    rows = list(csv.reader(io.StringIO(content)))
+    assert rows[0] == ["title", "salary"]
+    assert rows[1:] == [
+        [job.title, str(job.salary or "")] for job in tricky_jobs
+    ]
+
+
+def changes_feed(api_client, after, **params):
+    response = api_client.get(
+        reverse("job-changes"), {"after": after, **params}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.django_db
+def test_job_change_feed(api_client, user, settings):
+    """Test the change feed returns each job's latest change in order."""
+    settings.JOB_CHANGES_SETTLE_TIME = 0
+    jobs = [
+        Job.objects.create(
+            title=f"Job {i}",
+            location="Paris",
+            description="Desc",
+            contract_type="cdi",
+            owner=user,
+        )
+        for i in range(3)
+    ]
+    publish_job_changes()  # As after a commit
+    feed = changes_feed(api_client, 0)
+    assert [change["id"] for change in feed["results"]] == [
+        job.pk for job in jobs
+    ]
+    assert feed["results"][0]["job"]["title"] == "Job 0"
+    assert feed["has_more"] is False
+    cursor = feed["last_seq"]
+    assert changes_feed(api_client, cursor)["results"] == []
+
+    updated_at = jobs[0].updated_at
+    jobs[0].title = "Renamed"
+    jobs[0].save()
+    assert jobs[0].updated_at > updated_at
+    deleted_id = jobs[1].pk
+    jobs[1].delete()
+    jobs[0].save()  # Supersedes the rename
+    publish_job_changes()
+    feed = changes_feed(api_client, cursor, fields="id,title,updated_at")
+    assert [
+        (change["id"], change["deleted"], change["job"])
+        for change in feed["results"]
+    ] == [
+        (deleted_id, True, None),
+        (
+            jobs[0].pk,
+            False,
+            {
+                "id": jobs[0].pk,
+                "title": "Renamed",
+                "updated_at": jobs[0]
+                .updated_at.isoformat()
+                .replace("+00:00", "Z"),
+            },
+        ),
+    ]
+    assert feed["last_seq"] == feed["results"][-1]["seq"]
+
+    # Bounded batches: follow last_seq until has_more is false
+    seen, cursor = [], 0
+    while True:
+        feed = changes_feed(api_client, cursor, limit=2)
+        assert len(feed["results"]) <= 2
+        seen += [change["id"] for change in feed["results"]]
+        cursor = feed["last_seq"]
+        if not feed["has_more"]:
+            break
+    assert seen[-2:] == [deleted_id, jobs[0].pk]
+    assert set(seen) == {jobs[0].pk, deleted_id, jobs[2].pk}
+
+    response = api_client.get(reverse("job-changes"), {"after": "x"})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_job_change_feed_waits_for_settle_time(api_client, user, settings):
+    """Test recent changes are held back for the settle time."""
+    settings.JOB_CHANGES_SETTLE_TIME = 60
+    Job.objects.create(
+        title="Job",
+        location="Paris",
+        description="Desc",
+        contract_type="cdi",
+        owner=user,
+    )
+    publish_job_changes()
+    feed = changes_feed(api_client, 0)
+    assert feed == {"results": [], "last_seq": 0, "has_more": False}
+    JobChange.objects.update(changed_at=timezone.now() - timedelta(minutes=2))
+    assert len(changes_feed(api_client, 0)["results"]) == 1
+
+
+@pytest.mark.django_db
+def test_job_changes_numbered_at_commit(
+    api_client, user, settings, django_capture_on_commit_callbacks
+):
+    """Test changes are numbered once their transaction commits."""
+    settings.JOB_CHANGES_SETTLE_TIME = 0
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            job = Job.objects.create(
+                title="Job",
+                location="Paris",
+                description="Desc",
+                contract_type="cdi",
+                owner=user,
+            )
+            job.save()
+            # In flight: invisible to the feed whatever the settle time
+            assert PendingJobChange.objects.count() == 2
+            assert changes_feed(api_client, 0)["results"] == []
+    feed = changes_feed(api_client, 0)
+    assert [change["id"] for change in feed["results"]] == [job.pk]
+    assert JobChange.objects.count() == 2
+    assert not PendingJobChange.objects.exists()
+
+
+@pytest.mark.django_db
+def test_job_changes_publication_failure_logged(
+    user, caplog, django_capture_on_commit_callbacks
+):
+    """Test a failed publication is logged, leaving changes pending."""
+    with (
+        mock.patch("job.changes.JobChange") as job_change,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        job_change.objects.using.side_effect = OperationalError("locked")
+        Job.objects.create(
+            title="Job",
+            location="Paris",
+            description="Desc",
+            contract_type="cdi",
+            owner=user,
+        )
+    assert "Error calling publish_job_changes" in caplog.text
+    assert PendingJobChange.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_job_bulk_records_changes(api_client, user):
+    """Test bulk upserts bump updated_at and feed changes in one insert."""
+    api_client.force_authenticate(user=user)
+    url = reverse("job-bulk")
+    api_client.post(url, [bulk_job(reference="A")], format="json")
+    publish_job_changes()
+    job_a = Job.objects.get()
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.post(
+            url,
+            [bulk_job(reference="A", title="New"), bulk_job(reference="B")],
+            format="json",
+        )
+        publish_job_changes()
+    assert response.status_code == 200
+    for table in ("job_pendingjobchange", "job_jobchange"):
+        inserts = [
+            query["sql"]
+            for query in captured
+            if query["sql"].startswith(f'INSERT INTO "{table}"')
+        ]
+        assert len(inserts) == 1, table
+    assert Job.objects.get(pk=job_a.pk).updated_at > job_a.updated_at
+    assert list(
+        JobChange.objects.order_by("seq").values_list("job_id", flat=True)
+    ) == [job_a.pk, job_a.pk, Job.objects.get(reference="B").pk]
+
+
+@pytest.mark.django_db
+def test_compact_job_changes(user):
+    """Test compaction keeps the latest change of each job."""
+    job = Job.objects.create(
+        title="Job",
+        location="Paris",
+        description="Desc",
+        contract_type="cdi",
+        owner=user,
+    )
+    job.save()
+    job_id = job.pk
+    job.delete()
+    out = io.StringIO()
+    call_command("compact_job_changes", stdout=out)
+    assert "Deleted 2 superseded job changes." in out.getvalue()
+    assert list(JobChange.objects.values_list("job_id", "deleted")) == [
+        (job_id, True)
+    ]
+
+
+@pytest.mark.django_db
+def test_async_job_views_throttled_once(async_views, settings):
+    """Test async views take one token, also when the sync view answers."""
+    settings.THROTTLE_RATES = {"default": {"anon": "2/min"}}
+    url = reverse("job-list-create")
+    response = async_to_sync(async_views.get)(url, {"salary__gte": "lots"})
+    assert response.status_code == 400
+    assert response["X-RateLimit-Remaining"] == "1"
+    response = async_to_sync(async_views.get)(url)
+    assert response.status_code == 200
+    assert response["X-RateLimit-Remaining"] == "0"
+    response = async_to_sync(async_views.get)(url)
+    assert response.status_code == 429
+    assert "Retry-After" in response
+
+
+def test_seed_generation_is_deterministic_and_skewed():
+    """Test generated jobs only depend on the seed, with skewed values."""
+    today = timezone.now().date()
+    owner_ids = list(range(100, 200))
+
+    def generate(seed):
+        return [
+            (job.owner_id, job.title, job.location, job.salary, job.updated_at)
+            for job in seed_jobs.generate_jobs(
+                seed, 0, 2000, owner_ids, today, 365
+            )
+        ]
+
+    jobs = generate(1)
+    assert jobs == generate(1)
+    assert jobs != generate(2)
+    owners = collections.Counter(job[0] for job in jobs)
+    locations = collections.Counter(job[2] for job in jobs)
+    assert owners[100] > 10 * owners.get(199, 1)
+    assert locations.most_common(1)[0][0] == "Paris"
+    assert locations["Paris"] > 5 * locations.get("Nancy", 1)
+
+
+@pytest.mark.django_db
+def test_seed_jobs_command(api_client):
+    """Test the command fills users, jobs and their derived data once."""
+    out = io.StringIO()
+    call_command("seed_jobs", users=20, jobs=150, seed=7, stdout=out)
+    assert "jobs: 150 inserted" in out.getvalue()
+    assert get_user_model().objects.count() == 20
+    assert Job.objects.count() == JobChange.objects.count() == 150
+    assert Job.objects.filter(updated_at__lt=timezone.now() - timedelta(1))
+    assert reconcile_facet_counts() == []
+    response = api_client.get(reverse("job-search"), {"q": "recrute"})
+    assert response.status_code == 200
+    assert response.data["results"]
+
+    with pytest.raises(CommandError, match="already generated"):
+        call_command("seed_jobs", users=5, jobs=5, seed=7, stdout=out)
+    with pytest.raises(CommandError, match="in-memory"):
+        call_command("seed_jobs", seed=8, workers=2, stdout=out)
@@ -1,7 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from .views import JobListCreateView, JobRetrieveUpdateDestroyView
+from .views import (
+    JobBulkView,
+    JobChangesView,
+    JobExportView,
+    JobFacetsView,
+    JobListCreateView,
+    JobRetrieveUpdateDestroyView,
+    JobSearchView,
+    MyJobListView,
+)
+
+if settings.JOB_ASYNC_VIEWS:
+    from .async_views import job_detail, job_list_create
+else:
+    job_list_create = JobListCreateView.as_view()
+    job_detail = JobRetrieveUpdateDestroyView.as_view()
 
 urlpatterns = [
-    path("jobs/", JobListCreateView.as_view(), name="job-list-create"),
-    path("jobs/<int:pk>/", JobRetrieveUpdateDestroyView.as_view(), name="job-detail"),
+    path("jobs/", job_list_create, name="job-list-create"),
+    path("jobs/search/", JobSearchView.as_view(), name="job-search"),
+    path("jobs/export/", JobExportView.as_view(), name="job-export"),
+    path("jobs/bulk/", JobBulkView.as_view(), name="job-bulk"),
+    path("jobs/facets/", JobFacetsView.as_view(), name="job-facets"),
+    path("jobs/changes/", JobChangesView.as_view(), name="job-changes"),
+    path("jobs/<int:pk>/", job_detail, name="job-detail"),
+    path("me/jobs/", MyJobListView.as_view(), name="my-job-list"),
 ]
@@ -1,24 +1,143 @@
-from django.shortcuts import render
-from rest_framework import generics, permissions
-from .models import Job
-from .serializers import JobSerializer
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count
+from django.db.models.signals import post_save, pre_save
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 
+from my_job_board.routers import replica_reads
+from webhooks.signals import batched_webhook_events
 
-class JobListCreateView(generics.ListCreateAPIView):
+from .cache import LIST_SCOPE, CachedResponseMixin, detail_scope
+from .changes import batched_job_changes, get_job_changes
+from .facets import batched_facet_counts, get_facet_counts, job_facets
+from .filters import JobFilterBackend
+from .models import Job, JobFacetCount
+from .pagination import JobCursorPagination
+from .parsers import NDJSONParser
+from .renderers import CSVRenderer, NDJSONRenderer
+from .search import get_search_backend
+from .serializers import (
+    JobSearchSerializer,
+    JobSerializer,
+    get_fast_job_serializer,
+    get_sparse_fields,
+)
+from .tasks import batched_search_updates
+
+
+class ReplicaReadMixin:
+    """
+    Let GET requests read from a replica (see my_job_board.routers).
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets for job reads: ?fields=a,b and ?omit=c restrict the
+    serialized fields, and the queryset fetches only their columns.
+    """
+
+    def get_sparse_fields(self):
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = None
+            if self.request.method in ("GET", "HEAD"):
+                self._sparse_fields = get_sparse_fields(
+                    self.request.query_params
+                )
+        return self._sparse_fields
+
+    def get_fast_serializer(self):
+        return get_fast_job_serializer(self.get_sparse_fields())
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_sparse_fields() is not None:
+            queryset = queryset.only(*self.get_fast_serializer().columns)
+        return queryset
+
+
+class FastJobListMixin(SparseFieldsMixin):
+    """
+    Paginated job listing encoded by FastJobSerializer for JSON clients.
+
+    Views may add top-level keys after the results with
+    `get_extra_data()`.
+    """
+
+    serializer_class = JobSerializer
+    pagination_class = JobCursorPagination
+    filter_backends = [JobFilterBackend]
+
+    def get_extra_data(self):
+        return {}
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, JSONRenderer) or renderer.get_indent(
+            request.accepted_media_type, {}
+        ):
+            return super().list(request, *args, **kwargs)
+
+        # Fast path: encode rows straight to JSON, skipping JobSerializer
+        serializer = self.get_fast_serializer()
+        queryset = self.filter_queryset(self.get_queryset()).values_list(
+            *serializer.columns, named=True
+        )
+        page = self.paginate_queryset(queryset)
+        content = self.paginator.get_paginated_json(
+            serializer.render(page), self.get_extra_data()
+        )
+        return HttpResponse(content, content_type=renderer.media_type)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data.update(self.get_extra_data())
+        return response
+
+
+class JobListCreateView(
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    FastJobListMixin,
+    generics.ListCreateAPIView,
+):
     """
     List all jobs or create a new job (auth required for create).
     """
 
     queryset = Job.objects.all()
-    serializer_class = JobSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def get_cache_scope(self):
+        return LIST_SCOPE
+
     def perform_create(self, serializer):
-        # Set owner to current user
-        serializer.save(owner=self.request.user)
+        # Set owner to current user, by id: request.user may be a ClaimsUser
+        serializer.save(owner_id=self.request.user.pk)
 
 
-class JobRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class JobRetrieveUpdateDestroyView(
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    SparseFieldsMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     """
     Retrieve, update, or delete a job.
     """
@@ -26,3 +145,348 @@ class JobRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Job.objects.all()
     serializer_class = JobSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get_cache_scope(self):
+        return detail_scope(self.kwargs["pk"])
+
+
+class MyJobListView(FastJobListMixin, generics.ListAPIView):
+    """
+    List the jobs posted by the current user, newest first, with the list
+    filters. ?counts=1 adds their number per contract type.
+
+    Reads the primary so posters see their own writes, and walks the
+    (owner, creation_date, id) index: one query per page, two with counts.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Job.objects.filter(owner_id=self.request.user.pk)
+
+    def get_extra_data(self):
+        if self.request.query_params.get("counts") not in ("1", "true"):
+            return {}
+        by_contract_type = dict(
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .values_list("contract_type")
+            .annotate(count=Count("id"))
+            .order_by("contract_type")
+        )
+        return {
+            "counts": {
+                "total": sum(by_contract_type.values()),
+                "contract_type": by_contract_type,
+            }
+        }
+
+
+class JobFacetsView(
+    ReplicaReadMixin, CachedResponseMixin, generics.GenericAPIView
+):
+    """
+    Number of jobs per contract type, location and salary bucket, from
+    the precomputed counts (see job.facets). List filters don't apply.
+    """
+
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get_cache_scope(self):
+        return LIST_SCOPE
+
+    def get(self, request, *args, **kwargs):
+        counts = get_facet_counts(router.db_for_read(JobFacetCount))
+        total = sum(counts[JobFacetCount.CONTRACT_TYPE].values())
+        return Response({"total": total, **counts})
+
+
+class JobChangesView(
+    ReplicaReadMixin, SparseFieldsMixin, generics.GenericAPIView
+):
+    """
+    Jobs changed since a sequence number, for incremental sync (see
+    job.changes): ?after=<seq> (0 at first) and ?limit=n. Deleted jobs
+    come with "deleted": true and no job; pass the returned "last_seq"
+    as the next ?after until "has_more" is false.
+    """
+
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    filter_backends = []
+
+    def get(self, request, *args, **kwargs):
+        params = {"after": 0, "limit": settings.JOB_CHANGES_LIMIT}
+        for name in params:
+            try:
+                params[name] = int(
+                    request.query_params.get(name, params[name])
+                )
+            except ValueError:
+                raise ValidationError({name: "A valid integer is required."})
+        limit = max(1, min(params["limit"], settings.JOB_CHANGES_MAX_LIMIT))
+
+        changes, last_seq, has_more = get_job_changes(params["after"], limit)
+        jobs = self.filter_queryset(
+            Job.objects.filter(
+                id__in=[
+                    change.job_id for change in changes if not change.deleted
+                ]
+            )
+        ).in_bulk()
+        serializer = self.get_serializer(list(jobs.values()), many=True)
+        data = dict(zip(jobs, serializer.data))
+        results = []
+        for change in changes:
+            # A job deleted since the change has its tombstone further on
+            job = data.get(change.job_id)
+            results.append(
+                {
+                    "seq": change.seq,
+                    "id": change.job_id,
+                    "deleted": job is None,
+                    "job": job,
+                }
+            )
+        return Response(
+            {"results": results, "last_seq": last_seq, "has_more": has_more}
+        )
+
+
+class JobSearchView(ReplicaReadMixin, generics.GenericAPIView):
+    """
+    Full-text search over jobs, best matches first (?q=terms&limit=n).
+    """
+
+    serializer_class = JobSearchSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "This query parameter is required."})
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        limit = max(1, min(limit, self.max_limit))
+
+        hits = get_search_backend().search(query, limit)
+        jobs = Job.objects.in_bulk([hit.job_id for hit in hits])
+        results = []
+        for hit in hits:
+            job = jobs.get(hit.job_id)
+            if job is None:
+                continue  # Deleted since it was indexed
+            job.search_rank = hit.rank
+            job.search_snippet = hit.snippet
+            results.append(job)
+
+        serializer = self.get_serializer(results, many=True)
+        return Response({"results": serializer.data})
+
+
+class JobExportView(
+    ReplicaReadMixin, SparseFieldsMixin, generics.GenericAPIView
+):
+    """
+    Stream jobs matching the list filters as NDJSON or CSV, in id order
+    (?format=ndjson|csv, ?since=<last exported id> for incremental pulls).
+    """
+
+    queryset = Job.objects.all()
+    filter_backends = [JobFilterBackend]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    chunk_size = 2000  # Rows fetched from the database and sent per chunk
+
+    def get(self, request, *args, **kwargs):
+        try:
+            since = int(request.query_params.get("since", 0))
+        except ValueError:
+            raise ValidationError({"since": "A valid integer is required."})
+
+        serializer = self.get_fast_serializer()
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            # Rows are fetched while streaming, after replica_reads() ends
+            .using(router.db_for_read(Job))
+            .filter(id__gt=since)
+            .order_by("id")
+            .values_list(*serializer.columns)
+            .iterator(chunk_size=self.chunk_size)
+        )
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.render_rows(rows, serializer, self.chunk_size),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="jobs.{renderer.format}"'
+        )
+        return response
+
+
+class JobBulkView(generics.GenericAPIView):
+    """
+    Create or update many jobs in one request (JSON array or NDJSON).
+
+    Jobs with a reference are upserted on (owner, reference), the others
+    are created. The batch is validated up front and written in a single
+    transaction, so either every job is saved or none is.
+    """
+
+    serializer_class = JobSerializer
+    parser_classes = [JSONParser, NDJSONParser]
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = "bulk"
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({"detail": "Expected a list of jobs."})
+        if len(items) > settings.JOB_BULK_MAX_ITEMS:
+            raise ValidationError(
+                {
+                    "detail": f"At most {settings.JOB_BULK_MAX_ITEMS} jobs "
+                    "per request."
+                }
+            )
+
+        serializer = self.get_serializer(data=items, many=True)
+        errors = [{} for _ in items]
+        if not serializer.is_valid():
+            # Per-item errors, as a list or an {index: errors} mapping
+            # depending on the DRF version
+            item_errors = serializer.errors
+            if isinstance(item_errors, list):
+                item_errors = dict(enumerate(item_errors))
+            for index, error in item_errors.items():
+                errors[index] = error
+        else:
+            # References as saved (e.g. 5 and "5 " are both "5")
+            seen = set()
+            for index, data in enumerate(serializer.validated_data):
+                reference = data.get("reference")
+                if not reference:
+                    continue
+                if reference in seen:
+                    errors[index] = {
+                        "reference": [
+                            f"Duplicate reference {reference!r} in this "
+                            "batch."
+                        ]
+                    }
+                seen.add(reference)
+
+        invalid = [
+            {"index": index, "status": "invalid", "errors": item_errors}
+            for index, item_errors in enumerate(errors)
+            if item_errors
+        ]
+        if invalid:
+            return Response(
+                {"results": invalid}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            results = self.upsert(serializer.validated_data)
+        except IntegrityError:
+            # A concurrent request inserted one of the references first
+            return Response(
+                {"detail": "Conflicting concurrent update, please retry."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response({"results": results})
+
+    def upsert(self, items):
+        owner_id = self.request.user.pk
+        using = router.db_for_write(Job)
+        fields = [
+            name
+            for name, field in self.get_serializer().fields.items()
+            if not field.read_only
+        ]
+        # bulk_update() doesn't set auto_now fields
+        fields.append("updated_at")
+        now = timezone.now()
+        chunk_size = settings.JOB_BULK_CHUNK_SIZE
+        results = []
+
+        with transaction.atomic(using=using):
+            for start in range(0, len(items), chunk_size):
+                chunk = items[start : start + chunk_size]
+                references = [
+                    data["reference"]
+                    for data in chunk
+                    if data.get("reference")
+                ]
+                existing = {
+                    job.reference: job
+                    for job in Job.objects.using(using).filter(
+                        owner_id=owner_id, reference__in=references
+                    )
+                }
+
+                jobs = []
+                for data in chunk:
+                    job = existing.get(data.get("reference"))
+                    if job is None:
+                        job = Job(owner_id=owner_id)
+                    else:
+                        # Spares job.signals a query for the old values
+                        job._facets_before = job_facets(job)
+                        job.updated_at = now
+                    for name, value in data.items():
+                        setattr(job, name, value)
+                    jobs.append(job)
+
+                # bulk_create/bulk_update skip model signals; send them so
+                # search, caches and other listeners stay in sync.
+                for job in jobs:
+                    pre_save.send(
+                        sender=Job,
+                        instance=job,
+                        raw=False,
+                        using=using,
+                        update_fields=None,
+                    )
+                is_created = [job.pk is None for job in jobs]
+                Job.objects.using(using).bulk_create(
+                    [job for job, new in zip(jobs, is_created) if new]
+                )
+                Job.objects.using(using).bulk_update(
+                    [job for job, new in zip(jobs, is_created) if not new],
+                    fields,
+                )
+                # One search index task, change feed insert, webhook
+                # event insert and facet count update per value per chunk
+                with (
+                    batched_search_updates(),
+                    batched_job_changes(using),
+                    batched_facet_counts(using),
+                    batched_webhook_events(),
+                ):
+                    for offset, (job, created) in enumerate(
+                        zip(jobs, is_created)
+                    ):
+                        post_save.send(
+                            sender=Job,
+                            instance=job,
+                            created=created,
+                            update_fields=None,
+                            raw=False,
+                            using=using,
+                        )
+                        results.append(
+                            {
+                                "index": start + offset,
+                                "status": (
+                                    "created" if created else "updated"
+                                ),
+                                "id": job.pk,
+                            }
+                        )
+        return results
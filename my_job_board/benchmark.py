@@ -0,0 +1,258 @@
+"""
+Helpers for the benchmark management commands.
+
+Benchmarks run against a throwaway test database, time each endpoint
+call and summarize latencies as percentiles. Results are plain dicts so
+they can be saved as a JSON baseline and compared on the next run.
+"""
+
+import asyncio
+import contextlib
+import http.client
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer,
+    WSGIRequestHandler,
+    get_internal_wsgi_application,
+)
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    modify_settings,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+# Metrics compared against a baseline, and whether higher is better
+METRICS = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "rps": True,
+    "queries": False,
+}
+
+
+@contextlib.contextmanager
+def throwaway_database():
+    """
+    Run the block against a fresh test database, destroyed afterwards.
+
+    SQLite test databases are put in a temporary file rather than in
+    memory, so concurrent clients behave as they would in production.
+    Rate limits are lifted, so that every request reaches its endpoint.
+    """
+    old_name = connection.settings_dict["NAME"]
+    test_settings = connection.settings_dict["TEST"]
+    old_test_name = test_settings.get("NAME")
+    setup_test_environment()
+    with (
+        tempfile.TemporaryDirectory() as directory,
+        override_settings(THROTTLE_ENABLED=False),
+    ):
+        if connection.vendor == "sqlite":
+            test_settings["NAME"] = str(Path(directory) / "benchmark.sqlite3")
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings["NAME"] = old_test_name
+            teardown_test_environment()
+
+
+def summarize(latencies, elapsed, queries=None):
+    """
+    Percentiles (ms), throughput and queries per request of a run.
+    """
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "queries": queries,
+    }
+
+
+def measure_in_process(call, requests):
+    """
+    Time `call()` sequentially, counting queries on this thread.
+    """
+    latencies = []
+    query_count = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            began = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - began)
+        query_count += len(captured)
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed, round(query_count / requests, 2))
+
+
+def measure_concurrent(call, requests, concurrency):
+    """
+    Time `call()` from `concurrency` threads (no query counts).
+    """
+
+    def timed(_):
+        began = time.perf_counter()
+        call()
+        return time.perf_counter() - began
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed)
+
+
+def measure_async(call, requests, concurrency):
+    """
+    Time the coroutine `call()` with `concurrency` requests in flight on
+    one event loop (no query counts).
+    """
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed():
+            async with semaphore:
+                began = time.perf_counter()
+                await call()
+                return time.perf_counter() - began
+
+        return await asyncio.gather(*(timed() for _ in range(requests)))
+
+    start = time.perf_counter()
+    latencies = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed)
+
+
+async def asgi_request(application, method, path, headers=None):
+    """
+    Send one request to an ASGI application in process, as an ASGI
+    server would, and return (status, body).
+    """
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [(b"host", b"testserver")]
+        + [
+            (name.lower().encode(), value.encode())
+            for name, value in (headers or {}).items()
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    done = asyncio.Event()
+    received = False
+    status = None
+    body = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()  # The client stays connected until the end
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    await application(scope, receive, send)
+    done.set()
+    return status, b"".join(body)
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def local_server():
+    """
+    Serve the project's WSGI application on a free local port.
+    Yields the (host, port) to connect to.
+    """
+    server = ThreadedWSGIServer(
+        ("127.0.0.1", 0), QuietRequestHandler, allow_reuse_address=False
+    )
+    server.set_app(get_internal_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with modify_settings(ALLOWED_HOSTS={"append": "127.0.0.1"}):
+            yield server.server_address
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def http_request(address, method, path, body=None, headers=None):
+    """
+    Send one request to the local server and return (status, body).
+    """
+    conn = http.client.HTTPConnection(*address, timeout=30)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def find_regressions(results, baseline, threshold):
+    """
+    List metrics that got worse than the baseline by more than
+    `threshold` (a ratio, e.g. 0.2 for 20%). Query counts may not grow.
+    """
+    regressions = []
+    for mode, endpoints in results.items():
+        for endpoint, metrics in endpoints.items():
+            base = baseline.get(mode, {}).get(endpoint)
+            if not base:
+                continue
+            for metric, higher_is_better in METRICS.items():
+                current, previous = metrics.get(metric), base.get(metric)
+                if current is None or previous is None:
+                    continue
+                if metric == "queries":
+                    worse = current > previous
+                elif higher_is_better:
+                    worse = current < previous / (1 + threshold)
+                else:
+                    worse = current > previous * (1 + threshold)
+                if worse:
+                    regressions.append(
+                        f"{mode} {endpoint} {metric}: {previous} -> {current}"
+                    )
+    return regressions
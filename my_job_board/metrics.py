@@ -0,0 +1,276 @@
+"""
+Request instrumentation and a Prometheus-style metrics endpoint.
+
+`InstrumentationMiddleware` times every request and counts the SQL run
+for it through `connection.execute_wrapper`. The figures are added as a
+`Server-Timing` header and aggregated per view into histograms, which
+`metrics_view` renders in the Prometheus text format. Collecting the SQL
+of the slowest queries costs more, so it only happens for a sample of
+requests (`METRICS_SAMPLE_RATE`) and ends up in the log.
+
+Metrics are kept per process: scrape each worker, or sum across them.
+"""
+
+import bisect
+import contextlib
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """
+    Cumulative histogram per label set, as Prometheus expects.
+    """
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self.lock:
+            series = {labels: list(v) for labels, v in self.series.items()}
+        for labels, values in sorted(series.items()):
+            label_text = format_labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{label_text},le="{bound}"}} '
+                    f"{cumulative}"
+                )
+            cumulative += values[-2]
+            lines.append(
+                f'{self.name}_bucket{{{label_text},le="+Inf"}} {cumulative}'
+            )
+            lines.append(f"{self.name}_sum{{{label_text}}} {values[-1]:g}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self.lock:
+            series = dict(self.series)
+        for labels, value in sorted(series.items()):
+            lines.append(f"{self.name}{{{format_labels(labels)}}} {value}")
+        return lines
+
+
+def format_labels(labels):
+    return ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for name, value in labels
+    )
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Wall time spent handling the request.",
+    DURATION_BUCKETS,
+)
+DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent running SQL for the request.",
+    DURATION_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL queries run for the request.",
+    QUERY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Size of the response body (streaming responses excluded).",
+    SIZE_BUCKETS,
+)
+RESPONSES = Counter("http_responses_total", "Responses by status code.")
+
+REGISTRY = [REQUEST_DURATION, DB_DURATION, DB_QUERIES, RESPONSE_SIZE]
+
+
+class QueryRecorder:
+    """
+    `execute_wrapper` counting queries and their time. When `sample` is
+    set, it also keeps the SQL of the slowest queries.
+    """
+
+    def __init__(self, sample=False, keep=5):
+        self.count = 0
+        self.duration = 0.0
+        self.sample = sample
+        self.keep = keep
+        self.slowest = []  # (duration, sql), slowest first
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if self.sample and (
+                len(self.slowest) < self.keep or elapsed > self.slowest[-1][0]
+            ):
+                self.slowest.append((elapsed, sql))
+                self.slowest.sort(key=lambda item: item[0], reverse=True)
+                del self.slowest[self.keep :]
+
+
+class InstrumentationMiddleware:
+    """
+    Record per-view timings, SQL query count and time, and response size.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = self.get_recorder()
+        start = time.perf_counter()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        return self.record(request, response, recorder, start)
+
+    async def __acall__(self, request):
+        recorder = self.get_recorder()
+        start = time.perf_counter()
+        # Connections are per thread: wrap those of the thread the async
+        # ORM and sync views of this request run their queries in
+        recording = self.recording(recorder)
+        await sync_to_async(recording.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.__exit__)(None, None, None)
+        return self.record(request, response, recorder, start)
+
+    @staticmethod
+    def get_recorder():
+        sample = random.random() < settings.METRICS_SAMPLE_RATE
+        return QueryRecorder(sample, settings.METRICS_SLOW_QUERIES)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def recording(recorder):
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            yield
+
+    def record(self, request, response, recorder, start):
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else "<unresolved>"
+        labels = (("method", request.method), ("view", view))
+        REQUEST_DURATION.observe(labels, duration)
+        DB_DURATION.observe(labels, recorder.duration)
+        DB_QUERIES.observe(labels, recorder.count)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(labels, len(response.content))
+        RESPONSES.inc(labels + (("status", response.status_code),))
+
+        response["Server-Timing"] = (
+            f"app;dur={duration * 1000:.1f}, "
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} '
+            f'queries"'
+        )
+        if recorder.slowest:
+            logger.info(
+                "%s %s (%s): %.1fms, %d queries in %.1fms. Slowest:\n%s",
+                request.method,
+                request.path,
+                view,
+                duration * 1000,
+                recorder.count,
+                recorder.duration * 1000,
+                "\n".join(
+                    f"  {elapsed * 1000:.1f}ms {sql}"
+                    for elapsed, sql in recorder.slowest
+                ),
+            )
+        return response
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY + [RESPONSES]:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """
+    Metrics of this process in the Prometheus text format. Requires
+    `Authorization: Bearer <METRICS_TOKEN>`; without a token configured,
+    the endpoint is closed.
+    """
+    token = settings.METRICS_TOKEN
+    if not token or not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,188 @@
+"""
+Read replica routing.
+
+Reads go to the primary ("default") unless a view opts in with
+`replica_reads()` for requests that only read, like the job list,
+detail, search and export GETs. A write pins the rest of the request to
+the primary, and `ReplicaPinningMiddleware` keeps the client on the
+primary for `DATABASE_REPLICA_PIN_SECONDS` afterwards through a cookie,
+so users read their own writes despite replication lag. The job
+response cache keeps responses read from a replica only briefly, and
+pinned clients bypass it (see job.cache).
+
+Replicas (`DATABASE_REPLICAS`) are health checked at most every
+`DATABASE_REPLICA_CHECK_INTERVAL` seconds with the
+`DATABASE_REPLICA_HEALTH_CHECK` hook; unhealthy ones are taken out of
+rotation and reads fall back to the primary when none is left.
+"""
+
+import contextlib
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "db_primary"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+# Set by ReplicaPinningMiddleware for the duration of a request
+_request_state = ContextVar("replica_request_state", default=None)
+
+
+class RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned  # Reads must use the primary
+        self.wrote = False  # This request wrote to the primary
+
+
+@contextlib.contextmanager
+def replica_reads():
+    """
+    Allow the reads of this block to use a replica.
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def is_pinned():
+    """
+    Whether the current request must read from the primary.
+    """
+    state = _request_state.get()
+    return state is not None and state.pinned
+
+
+def reads_may_use_replica():
+    """
+    Whether the reads made here may be routed to a replica.
+    """
+    return (
+        _replica_reads.get()
+        and not is_pinned()
+        and bool(settings.DATABASE_REPLICAS)
+    )
+
+
+def replica_is_healthy(alias):
+    """
+    Default health check: the replica answers and, on PostgreSQL, lags
+    less than `DATABASE_REPLICA_MAX_LAG` seconds behind the primary.
+    """
+    try:
+        with connections[alias].cursor() as cursor:
+            if connections[alias].vendor == "postgresql":
+                cursor.execute(
+                    "SELECT COALESCE(EXTRACT(EPOCH FROM now() - "
+                    "pg_last_xact_replay_timestamp()), 0)"
+                )
+                return (
+                    cursor.fetchone()[0] <= settings.DATABASE_REPLICA_MAX_LAG
+                )
+            cursor.execute("SELECT 1")
+            return True
+    except Exception:
+        logger.warning("Replica %s failed its health check", alias)
+        return False
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.health = {}  # alias -> (healthy, monotonic time of the check)
+        self.lock = threading.Lock()
+
+    def healthy_replicas(self):
+        check = import_string(settings.DATABASE_REPLICA_HEALTH_CHECK)
+        now = time.monotonic()
+        healthy = []
+        for alias in settings.DATABASE_REPLICAS:
+            with self.lock:
+                status = self.health.get(alias)
+            if (
+                status is None
+                or now - status[1] >= settings.DATABASE_REPLICA_CHECK_INTERVAL
+            ):
+                status = (check(alias), now)
+                with self.lock:
+                    self.health[alias] = status
+            if status[0]:
+                healthy.append(alias)
+        return healthy
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or is_pinned():
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db  # Related objects of a fetched row
+        replicas = self.healthy_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # Replicas hold the same data as the primary
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaPinningMiddleware:
+    """
+    Keep clients that just wrote on the primary for a few seconds.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RequestState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _request_state.set(state)
+        try:
+            return self.pin(self.get_response(request), state)
+        finally:
+            _request_state.reset(token)
+
+    async def __acall__(self, request):
+        # The state is shared by reference with the sync threads the
+        # request runs code in, so their writes pin it too
+        state = RequestState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _request_state.set(state)
+        try:
+            return self.pin(await self.get_response(request), state)
+        finally:
+            _request_state.reset(token)
+
+    @staticmethod
+    def pin(response, state):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -2,8 +2,15 @@
 Django settings for my_job_board project.
 """
 
+import os
 from pathlib import Path
 
+from my_job_board.database import (
+    database_config,
+    env_flag,
+    replica_configs,
+)
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = (
@@ -21,6 +28,8 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "job",  # Job board app
     "users",  # Custom user app
+    "tasks",  # Background tasks
+    "webhooks",  # Job change notifications
     "rest_framework",
     "rest_framework_api_key",
     "rest_framework_simplejwt",
@@ -29,7 +38,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "my_job_board.metrics.InstrumentationMiddleware",  # First: times all
     "django.middleware.security.SecurityMiddleware",
+    "users.throttling.RateLimitHeadersMiddleware",
+    "my_job_board.routers.ReplicaPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -57,14 +69,48 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "my_job_board.wsgi.application"
 
-# Database: SQLite for our "MVP"
-DATABASES = {
+# Database: SQLite by default, configured from DB_* environment variables
+# (see my_job_board.database)
+DATABASES = {"default": database_config(os.environ, BASE_DIR)}
+DATABASES.update(replica_configs(os.environ, DATABASES["default"]))
+
+# Read replicas (see my_job_board.routers): safe job reads are spread over
+# the healthy replicas, and clients stay on the primary for a few seconds
+# after a write so they read their own writes.
+DATABASE_ROUTERS = ["my_job_board.routers.ReplicaRouter"]
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_REPLICA_PIN_SECONDS = 5
+DATABASE_REPLICA_HEALTH_CHECK = "my_job_board.routers.replica_is_healthy"
+DATABASE_REPLICA_CHECK_INTERVAL = 10  # Seconds between health checks
+DATABASE_REPLICA_MAX_LAG = 5  # Seconds, PostgreSQL only
+
+# Caches: local memory by default. Point CACHE_BACKEND/LOCATION and
+# JOB_CACHE_BACKEND/LOCATION at a shared backend (FileBasedCache,
+# RedisCache) when running several processes, so job cache invalidations,
+# API key revocations and scheduled webhook retries reach all of them.
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    },
+    "jobs": {
+        "BACKEND": os.environ.get(
+            "JOB_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.environ.get("JOB_CACHE_LOCATION", "jobs"),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
 }
 
+# Job response cache (see job.cache)
+JOB_CACHE_ALIAS = "jobs"
+JOB_CACHE_TIMEOUT = 300  # Seconds
+JOB_CACHE_REPLICA_TIMEOUT = 5  # Seconds, for responses read from a replica
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"
@@ -78,6 +124,47 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing (see users.hashers). PASSWORD_HASHER_PROFILE picks the
+# algorithm for new hashes: "pbkdf2", "scrypt" or "argon2" (the latter
+# requires argon2-cffi). The other hashers stay listed so existing hashes
+# still verify; they are upgraded on the user's next login. Use
+# `manage.py benchmark_hashers` to pick costs that fit the login budget.
+PASSWORD_HASHER_PROFILE = os.environ.get("PASSWORD_HASHER_PROFILE", "pbkdf2")
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get("PASSWORD_PBKDF2_ITERATIONS", "1000000")
+)
+PASSWORD_SCRYPT_WORK_FACTOR = int(
+    os.environ.get("PASSWORD_SCRYPT_WORK_FACTOR", str(2**14))
+)
+PASSWORD_SCRYPT_BLOCK_SIZE = 8
+PASSWORD_SCRYPT_PARALLELISM = int(
+    os.environ.get("PASSWORD_SCRYPT_PARALLELISM", "5")
+)
+PASSWORD_ARGON2_TIME_COST = int(
+    os.environ.get("PASSWORD_ARGON2_TIME_COST", "2")
+)
+PASSWORD_ARGON2_MEMORY_COST = int(  # KiB
+    os.environ.get("PASSWORD_ARGON2_MEMORY_COST", "102400")
+)
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get("PASSWORD_ARGON2_PARALLELISM", "8")
+)
+PASSWORD_HASHER_PROFILES = {
+    "pbkdf2": "users.hashers.TunedPBKDF2PasswordHasher",
+    "scrypt": "users.hashers.TunedScryptPasswordHasher",
+    "argon2": "users.hashers.TunedArgon2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE],
+    *(
+        hasher
+        for profile, hasher in PASSWORD_HASHER_PROFILES.items()
+        if profile != PASSWORD_HASHER_PROFILE
+    ),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
 USE_I18N = True
@@ -90,13 +177,105 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Custom user model and authentication
 AUTH_USER_MODEL = "users.User"
 AUTHENTICATION_BACKENDS = [
-    "users.auth_backends.EmailAuthBackend",  # Email login
-    "django.contrib.auth.backends.ModelBackend",
+    "users.auth_backends.EmailAuthBackend",  # Email + password login
 ]
 
 # DRF config for JWT
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.ClaimsJWTAuthentication",
     ),
+    "DEFAULT_THROTTLE_CLASSES": ("users.throttling.TokenBucketThrottle",),
+    # Reverse proxies appending to X-Forwarded-For: anonymous clients are
+    # throttled by IP, so by REMOTE_ADDR unless proxies are declared
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", "0")),
+}
+
+# Request rate limits (see users.throttling): per view `throttle_scope`,
+# "N/period" (s, min, h or day) per user, verified API key or IP, None
+# for no limit. Missing entries fall back to the "default" scope.
+THROTTLE_ENABLED = env_flag(os.environ, "THROTTLE_ENABLED", "1")
+THROTTLE_RATES = {
+    "default": {"user": "1200/min", "api_key": "3000/min", "anon": "300/min"},
+    "auth": {"user": "30/min", "api_key": "120/min", "anon": "30/min"},
+    "bulk": {"user": "60/min", "api_key": "120/min"},
 }
+THROTTLE_MAX_CLIENTS = 100_000  # Buckets kept per process
+
+# Successful API key verifications are cached per process (see
+# users.permissions) for this many seconds, for at most this many keys.
+# Revocations reach other processes through the API_KEY_CACHE_ALIAS cache;
+# cached verifications are only trusted when it is shared (not LocMem).
+API_KEY_CACHE_TIMEOUT = 60
+API_KEY_CACHE_SIZE = 1024
+API_KEY_CACHE_ALIAS = "default"
+
+# Users loaded behind token claims (see users.authentication)
+AUTH_USER_CACHE_TIMEOUT = 60
+AUTH_USER_CACHE_SIZE = 1024
+
+# Seconds between reads of new blacklisted refresh tokens by each process
+# (see users.blacklist)
+TOKEN_BLACKLIST_SYNC_INTERVAL = 5
+# Seconds within which a blacklisting transaction commits: newer rows are
+# read again on each sync, in case rows with lower ids commit after them
+TOKEN_BLACKLIST_SETTLE_TIME = 10
+
+# Keyset pagination for job listings (clients pass ?page_size= up to the cap)
+JOB_PAGE_SIZE = 50
+JOB_MAX_PAGE_SIZE = 500
+
+# Bulk job imports: items per request and per INSERT/UPDATE batch
+JOB_BULK_MAX_ITEMS = 10000
+JOB_BULK_CHUNK_SIZE = 500
+
+# Lower bounds of the salary buckets counted by /api/jobs/facets/ (see
+# job.facets); changing them requires running reconcile_job_facets
+JOB_FACET_SALARY_BUCKETS = [30_000, 40_000, 50_000, 60_000, 80_000, 100_000]
+
+# Change feed (see job.changes): changes per /api/jobs/changes/ response,
+# and seconds before a change is served, so that concurrent publications
+# committing out of sequence order are not skipped
+JOB_CHANGES_LIMIT = 500
+JOB_CHANGES_MAX_LIMIT = 5000
+JOB_CHANGES_SETTLE_TIME = 2
+
+# Seconds between the change feed reads by which the in-memory search
+# index (see job.search) picks up the jobs changed by other processes
+SEARCH_INDEX_REFRESH_INTERVAL = 5
+
+# Serve job list and detail GETs from async views (see job.async_views);
+# only worthwhile when deployed under ASGI (my_job_board.asgi)
+JOB_ASYNC_VIEWS = env_flag(os.environ, "JOB_ASYNC_VIEWS", "0")
+
+# Background tasks (see tasks.queue): "thread" runs them in this process
+# after commit, "database" queues them durably for `manage.py run_tasks`
+# workers, "immediate" runs them inline.
+TASKS_BACKEND = os.environ.get("TASKS_BACKEND", "thread")
+TASKS_THREADS = 2  # Worker threads of the "thread" backend
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_BACKOFF = 2  # Seconds before the first retry, then doubled
+TASKS_RETRY_MAX_DELAY = 300
+TASKS_LEASE = 300  # Seconds before a running task is handed to a worker
+
+# Outbound webhooks (see webhooks.dispatch): events are POSTed in batches
+# per subscription, from this many threads over keep-alive connections.
+WEBHOOK_BATCH_SIZE = 100
+WEBHOOK_CONCURRENCY = 8
+WEBHOOK_TIMEOUT = 10  # Seconds to connect, and between response bytes
+WEBHOOK_MAX_ATTEMPTS = 8
+WEBHOOK_RETRY_BACKOFF = 10  # Seconds before the first retry, then doubled
+WEBHOOK_RETRY_MAX_DELAY = 3600
+WEBHOOK_LEASE = 300  # Seconds before a batch being sent is due again
+# Accept plain http and private or loopback addresses (see
+# webhooks.validators), for local development only.
+WEBHOOK_ALLOW_LOCAL_URLS = env_flag(
+    os.environ, "WEBHOOK_ALLOW_LOCAL_URLS", "0"
+)
+
+# Request instrumentation (see my_job_board.metrics): share of requests
+# whose slowest queries are logged, and the bearer token for the /metrics
+# endpoint, which is closed while it is empty.
+METRICS_SAMPLE_RATE = float(os.environ.get("METRICS_SAMPLE_RATE", "0.01"))
+METRICS_SLOW_QUERIES = 5
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
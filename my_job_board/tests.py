@@ -0,0 +1,159 @@
+import logging
+import re
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from my_job_board.benchmark import find_regressions, summarize
+from my_job_board.database import database_config
+from my_job_board.metrics import Histogram
+
+
+def test_summarize_percentiles():
+    """Test latency percentiles and throughput of a benchmark run."""
+    latencies = [i / 1000 for i in range(1, 101)]  # 1ms .. 100ms
+    result = summarize(latencies, elapsed=2.0, queries=3)
+    assert result["requests"] == 100
+    assert result["p50_ms"] == pytest.approx(50.5)
+    assert result["p95_ms"] == pytest.approx(95.05)
+    assert result["p99_ms"] == pytest.approx(99.01)
+    assert result["rps"] == 50.0
+    assert result["queries"] == 3
+
+
+def test_find_regressions():
+    """Test regressions are reported beyond the threshold only."""
+    baseline = {
+        "inprocess": {
+            "job-list": {"p95_ms": 10.0, "rps": 100.0, "queries": 1},
+        }
+    }
+    results = {
+        "inprocess": {
+            "job-list": {"p95_ms": 11.0, "rps": 90.0, "queries": 1},
+            "job-new": {"p95_ms": 999.0, "rps": 1.0, "queries": 9},
+        }
+    }
+    assert find_regressions(results, baseline, threshold=0.2) == []
+
+    results["inprocess"]["job-list"] = {
+        "p95_ms": 13.0,
+        "rps": 80.0,
+        "queries": 2,
+    }
+    assert find_regressions(results, baseline, threshold=0.2) == [
+        "inprocess job-list p95_ms: 10.0 -> 13.0",
+        "inprocess job-list rps: 100.0 -> 80.0",
+        "inprocess job-list queries: 1 -> 2",
+    ]
+
+
+@pytest.mark.django_db
+def test_server_timing_header(client):
+    """Test responses carry app and db timings with the query count."""
+    response = client.get(reverse("job-list-create"))
+    assert response.status_code == 200
+    timing = response["Server-Timing"]
+    assert re.fullmatch(
+        r'app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"', timing
+    )
+
+
+@pytest.mark.django_db
+def test_slow_queries_logged_when_sampled(client, settings, caplog):
+    """Test sampled requests log their slowest queries."""
+    settings.METRICS_SAMPLE_RATE = 1.0
+    with caplog.at_level(logging.INFO, logger="my_job_board.metrics"):
+        client.get(reverse("job-detail", args=[1]))  # 404s aren't cached
+    assert "job-detail" in caplog.text
+    assert "SELECT" in caplog.text
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(client, settings):
+    """Test the metrics endpoint exposes per-view histograms."""
+    settings.METRICS_TOKEN = "scrape-me"
+    client.get(reverse("job-list-create"))
+    body = client.get(
+        reverse("metrics"), headers={"Authorization": "Bearer scrape-me"}
+    ).content.decode()
+    labels = 'method="GET",view="job-list-create"'
+    assert f"http_request_duration_seconds_count{{{labels}}}" in body
+    assert f'http_request_db_queries_bucket{{{labels},le="+Inf"}}' in body
+    assert f"http_response_size_bytes_sum{{{labels}}}" in body
+    assert f'http_responses_total{{{labels},status="200"}}' in body
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_token(client, settings):
+    """Test the metrics endpoint requires the configured token."""
+    settings.METRICS_TOKEN = ""
+    assert client.get(reverse("metrics")).status_code == 403
+    response = client.get(reverse("metrics"), headers={"Authorization": ""})
+    assert response.status_code == 403
+    settings.METRICS_TOKEN = "scrape-me"
+    assert client.get(reverse("metrics")).status_code == 403
+    response = client.get(
+        reverse("metrics"), headers={"Authorization": "Bearer scrape-me"}
+    )
+    assert response.status_code == 200
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test histogram rendering in the Prometheus text format."""
+    histogram = Histogram("latency", "Test.", (1, 5))
+    labels = (("view", "a"),)
+    for value in (0.5, 3, 4, 10):
+        histogram.observe(labels, value)
+    assert histogram.render()[2:] == [
+        'latency_bucket{view="a",le="1"} 1',
+        'latency_bucket{view="a",le="5"} 3',
+        'latency_bucket{view="a",le="+Inf"} 4',
+        'latency_sum{view="a"} 17.5',
+        'latency_count{view="a"} 4',
+    ]
+
+
+def test_database_config_sqlite(tmp_path):
+    """Test SQLite gets persistent connections and tuned pragmas."""
+    config = database_config({}, tmp_path)
+    assert config["NAME"] == tmp_path / "db.sqlite3"
+    assert config["CONN_MAX_AGE"] == 60
+    assert config["CONN_HEALTH_CHECKS"] is True
+    assert "PRAGMA journal_mode=WAL;" in config["OPTIONS"]["init_command"]
+    assert "PRAGMA synchronous=NORMAL;" in config["OPTIONS"]["init_command"]
+    assert config["OPTIONS"]["transaction_mode"] == "IMMEDIATE"
+
+
+def test_database_config_postgresql_pool(tmp_path):
+    """Test a pooled PostgreSQL profile disables persistent connections."""
+    config = database_config(
+        {
+            "DB_ENGINE": "postgresql",
+            "DB_NAME": "jobs",
+            "DB_HOST": "db",
+            "DB_POOL": "1",
+            "DB_POOL_MAX_SIZE": "8",
+        },
+        tmp_path,
+    )
+    assert config["ENGINE"] == "django.db.backends.postgresql"
+    assert config["NAME"] == "jobs"
+    assert config["CONN_MAX_AGE"] == 0
+    assert config["OPTIONS"]["pool"]["max_size"] == 8
+
+    with pytest.raises(ValueError):
+        database_config({"DB_ENGINE": "oracle"}, tmp_path)
+
+
+@pytest.mark.django_db
+def test_sqlite_connection_pragmas():
+    """Test the connection runs with the tuned pragmas."""
+    if connection.vendor != "sqlite":
+        pytest.skip("SQLite only")
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA synchronous")
+        assert cursor.fetchone()[0] == 1  # NORMAL
+        cursor.execute("PRAGMA busy_timeout")
+        assert cursor.fetchone()[0] == 5000
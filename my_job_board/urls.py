@@ -23,6 +23,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from my_job_board.metrics import metrics_view
+
 schema_view = get_schema_view(
     openapi.Info(
         title="My Job Board API",
@@ -37,6 +39,8 @@ urlpatterns = [
     path("admin/", admin.site.urls),  # Admin panel
     path("users/", include("users.urls")),  # User endpoints
     path("api/", include("job.urls")),  # Job board endpoints
+    path("api/", include("webhooks.urls")),  # Webhook subscriptions
+    path("metrics", metrics_view, name="metrics"),  # Prometheus scrape
     # drf_yasg schema endpoints
     path(
         "swagger/",
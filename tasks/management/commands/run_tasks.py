@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from tasks.queue import DatabaseBackend, get_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the tasks queued in the database (TASKS_BACKEND=database). "
+        "Start as many workers as needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when no task is due instead of waiting for more",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when no task is due",
+        )
+
+    def handle(self, *args, **kwargs):
+        backend = get_backend()
+        if not isinstance(backend, DatabaseBackend):
+            raise CommandError(
+                "run_tasks needs TASKS_BACKEND=database, not "
+                f"{settings.TASKS_BACKEND!r}."
+            )
+        count = 0
+        try:
+            while True:
+                close_old_connections()
+                if backend.run_next():
+                    count += 1
+                elif kwargs["once"]:
+                    break
+                else:
+                    time.sleep(kwargs["poll"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"Ran {count} tasks.")
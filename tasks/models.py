@@ -0,0 +1,42 @@
+from django.db import models
+
+
+class Task(models.Model):
+    """
+    Task queued by the database backend (see tasks.queue), until it runs
+    successfully; failed tasks are kept for inspection.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+
+    STATUS = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (FAILED, "Failed"),
+    )
+
+    name = models.CharField()  # Registered task name
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(choices=STATUS, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField()
+    # Due time of a pending task, lease expiry of a running one
+    run_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim due tasks in run_at order
+            models.Index(
+                fields=["run_at"],
+                condition=models.Q(status__in=["pending", "running"]),
+                name="task_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -0,0 +1,274 @@
+"""
+Background tasks without an external broker.
+
+Functions decorated with @task (in an app's tasks.py) are queued with
+`func.enqueue(*args, **kwargs)`, or `func.enqueue_in(seconds, ...)` to
+run later; arguments must be JSON serializable.
+`TASKS_BACKEND` picks how they run:
+
+- "thread": in-process worker threads (`TASKS_THREADS`) pick tasks up
+  once the enqueuing transaction commits. Tasks queued but not run are
+  lost when the process exits.
+- "database": tasks are rows of the Task table, inserted in the
+  enqueuing transaction, and run by `manage.py run_tasks` workers, so
+  they survive restarts and are run by any number of processes.
+- "immediate": tasks run inline when enqueued (tests, debugging). Tasks
+  queued to run later are dropped.
+
+Failed tasks are retried up to `TASKS_MAX_ATTEMPTS` times, waiting
+`TASKS_RETRY_BACKOFF` seconds doubled at each attempt, at most
+`TASKS_RETRY_MAX_DELAY`. Tasks may run more than once (a retry after a
+timeout, a worker crash), so they must be idempotent.
+"""
+
+import functools
+import heapq
+import itertools
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, router, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from tasks.models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}  # Task name -> function
+
+
+def task(func=None, *, max_attempts=None):
+    """
+    Register a function as a task, adding `func.enqueue()`.
+    """
+    if func is None:
+        return functools.partial(task, max_attempts=max_attempts)
+    func.task_name = f"{func.__module__}.{func.__qualname__}"
+    func.max_attempts = max_attempts
+    func.enqueue = functools.partial(enqueue, func)
+    func.enqueue_in = functools.partial(enqueue_in, func)
+    registry[func.task_name] = func
+    return func
+
+
+def enqueue(func, *args, **kwargs):
+    enqueue_in(func, 0, *args, **kwargs)
+
+
+def enqueue_in(func, delay, *args, **kwargs):
+    max_attempts = func.max_attempts or settings.TASKS_MAX_ATTEMPTS
+    get_backend().enqueue(func.task_name, args, kwargs, max_attempts, delay)
+
+
+def retry_delay(attempt):
+    """
+    Seconds to wait before retrying after the `attempt`-th failure.
+    """
+    return min(
+        settings.TASKS_RETRY_BACKOFF * 2 ** (attempt - 1),
+        settings.TASKS_RETRY_MAX_DELAY,
+    )
+
+
+def run(name, args, kwargs):
+    registry[name](*args, **kwargs)
+
+
+class ImmediateBackend:
+    """
+    Run tasks inline, retrying at once on failure.
+    """
+
+    def enqueue(self, name, args, kwargs, max_attempts, delay):
+        if delay > 0:
+            logger.info("Task %s dropped: delayed by %ss", name, delay)
+            return
+        for attempt in range(1, max_attempts + 1):
+            try:
+                return run(name, args, kwargs)
+            except Exception:
+                logger.exception(
+                    "Task %s failed (attempt %d/%d)",
+                    name,
+                    attempt,
+                    max_attempts,
+                )
+
+
+class ThreadBackend:
+    """
+    Run tasks in worker threads of this process, after commit.
+    """
+
+    def __init__(self, threads):
+        self.threads = threads
+        self.workers = []
+        self.queue = []  # Heap of (run at, sequence, task)
+        self.sequence = itertools.count()
+        self.running = 0
+        self.condition = threading.Condition()
+
+    def enqueue(self, name, args, kwargs, max_attempts, delay):
+        item = (name, args, kwargs, 1, max_attempts)
+        transaction.on_commit(
+            functools.partial(self.put, item, delay=delay),
+            using=router.db_for_write(Task),
+        )
+
+    def put(self, item, delay=0):
+        run_at = time.monotonic() + delay
+        with self.condition:
+            heapq.heappush(self.queue, (run_at, next(self.sequence), item))
+            while len(self.workers) < self.threads:
+                worker = threading.Thread(
+                    target=self.work, name="tasks-worker", daemon=True
+                )
+                worker.start()
+                self.workers.append(worker)
+            self.condition.notify()
+
+    def get(self):
+        with self.condition:
+            while True:
+                if self.queue:
+                    delay = self.queue[0][0] - time.monotonic()
+                    if delay <= 0:
+                        self.running += 1
+                        return heapq.heappop(self.queue)[2]
+                else:
+                    delay = None
+                self.condition.wait(delay)
+
+    def work(self):
+        while True:
+            name, args, kwargs, attempt, max_attempts = self.get()
+            close_old_connections()
+            try:
+                run(name, args, kwargs)
+            except Exception:
+                logger.exception(
+                    "Task %s failed (attempt %d/%d)",
+                    name,
+                    attempt,
+                    max_attempts,
+                )
+                if attempt < max_attempts:
+                    self.put(
+                        (name, args, kwargs, attempt + 1, max_attempts),
+                        delay=retry_delay(attempt),
+                    )
+            finally:
+                close_old_connections()
+                with self.condition:
+                    self.running -= 1
+                    self.condition.notify_all()
+
+    def wait(self, timeout=None):
+        """
+        Wait until no task is queued or running; False on timeout.
+        """
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: not self.queue and not self.running, timeout
+            )
+
+
+class DatabaseBackend:
+    """
+    Store tasks in the Task table, for `run_tasks` workers.
+    """
+
+    def enqueue(self, name, args, kwargs, max_attempts, delay):
+        Task.objects.create(
+            name=name,
+            args=list(args),
+            kwargs=kwargs,
+            max_attempts=max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+    def claim(self):
+        """
+        Lease the next due task to this worker, or return None. Running
+        tasks whose lease (`TASKS_LEASE`) expired are due again, unless
+        that was their last attempt: a task crashing its workers is
+        marked failed rather than claimed forever.
+        """
+        using = router.db_for_write(Task)
+        while True:
+            now = timezone.now()
+            due = Task.objects.using(using).filter(
+                Q(status=Task.PENDING) | Q(status=Task.RUNNING),
+                run_at__lte=now,
+            )
+            candidate = due.order_by("run_at", "id").first()
+            if candidate is None:
+                return None
+            if candidate.attempts >= candidate.max_attempts:
+                due.filter(pk=candidate.pk, run_at=candidate.run_at).update(
+                    status=Task.FAILED,
+                    last_error="Lease expired during the last attempt.",
+                )
+                continue
+            lease = now + timedelta(seconds=settings.TASKS_LEASE)
+            # Only one worker wins the update of the same due row
+            claimed = due.filter(
+                pk=candidate.pk, run_at=candidate.run_at
+            ).update(
+                status=Task.RUNNING,
+                run_at=lease,
+                attempts=F("attempts") + 1,
+            )
+            if claimed:
+                candidate.refresh_from_db(using=using)
+                return candidate
+
+    def run_next(self):
+        """
+        Run the next due task; False when there is none.
+        """
+        task = self.claim()
+        if task is None:
+            return False
+        try:
+            run(task.name, task.args, task.kwargs)
+        except Exception:
+            logger.exception(
+                "Task %s #%d failed (attempt %d/%d)",
+                task.name,
+                task.pk,
+                task.attempts,
+                task.max_attempts,
+            )
+            task.last_error = traceback.format_exc()
+            if task.attempts < task.max_attempts:
+                task.status = Task.PENDING
+                task.run_at = timezone.now() + timedelta(
+                    seconds=retry_delay(task.attempts)
+                )
+            else:
+                task.status = Task.FAILED
+            task.save(update_fields=["status", "run_at", "last_error"])
+        else:
+            task.delete()
+        return True
+
+
+@functools.cache
+def _get_backend(name, threads):
+    if name == "thread":
+        return ThreadBackend(threads)
+    if name == "database":
+        return DatabaseBackend()
+    if name == "immediate":
+        return ImmediateBackend()
+    raise ValueError(f"Unknown TASKS_BACKEND: {name!r}")
+
+
+def get_backend():
+    return _get_backend(settings.TASKS_BACKEND, settings.TASKS_THREADS)
@@ -0,0 +1,170 @@
+import io
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from job.models import Job
+from job.search import get_search_backend
+from tasks.models import Task
+from tasks.queue import get_backend, task
+
+calls = []
+
+
+@task
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=3)
+def flaky(value, failures):
+    calls.append(value)
+    if calls.count(value) <= failures:
+        raise RuntimeError("Temporary failure")
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+@pytest.fixture
+def database_backend(settings):
+    settings.TASKS_BACKEND = "database"
+    return get_backend()
+
+
+def test_immediate_backend_retries():
+    """Test immediate tasks run inline, retried up to max_attempts."""
+    record.enqueue("now")
+    assert calls == ["now"]
+    flaky.enqueue("a", failures=2)
+    assert calls == ["now", "a", "a", "a"]
+    flaky.enqueue("b", failures=5)  # Gives up after 3 attempts
+    assert calls.count("b") == 3
+
+
+@pytest.mark.django_db
+def test_thread_backend_runs_after_commit(
+    settings, django_capture_on_commit_callbacks
+):
+    """Test thread tasks run after commit, retried with backoff."""
+    settings.TASKS_BACKEND = "thread"
+    settings.TASKS_RETRY_BACKOFF = 0.01
+    backend = get_backend()
+    with django_capture_on_commit_callbacks(execute=True):
+        record.enqueue("committed")
+        flaky.enqueue("retried", failures=1)
+        assert calls == []  # Nothing runs before commit
+    assert backend.wait(timeout=5)
+    assert sorted(calls) == ["committed", "retried", "retried"]
+
+    with django_capture_on_commit_callbacks(execute=False):
+        record.enqueue("rolled back")
+    assert backend.wait(timeout=5)
+    assert "rolled back" not in calls
+
+
+@pytest.mark.django_db
+def test_database_backend_retries_with_backoff(database_backend, settings):
+    """Test database tasks are retried later, then marked failed."""
+    flaky.enqueue("x", failures=5)
+    task = Task.objects.get()
+    assert (task.name, task.args, task.kwargs) == (
+        "tasks.tests.flaky",
+        ["x"],
+        {"failures": 5},
+    )
+    assert calls == []
+
+    assert database_backend.run_next()
+    task.refresh_from_db()
+    assert (task.status, task.attempts) == (Task.PENDING, 1)
+    assert "Temporary failure" in task.last_error
+    expected = timezone.now() + timedelta(seconds=settings.TASKS_RETRY_BACKOFF)
+    assert abs(task.run_at - expected) < timedelta(seconds=1)
+    assert not database_backend.run_next()  # Not due yet
+
+    for _ in range(2):
+        Task.objects.update(run_at=timezone.now())
+        assert database_backend.run_next()
+    task.refresh_from_db()
+    assert (task.status, task.attempts) == (Task.FAILED, 3)
+    assert calls == ["x", "x", "x"]
+    assert not database_backend.run_next()
+
+
+@pytest.mark.django_db
+def test_database_backend_reclaims_expired_leases(database_backend):
+    """Test tasks of a crashed worker run again once their lease ends."""
+    record.enqueue("crashed")
+    task = database_backend.claim()
+    assert task.status == Task.RUNNING
+    assert database_backend.claim() is None  # Leased
+
+    Task.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+    assert database_backend.run_next()
+    assert calls == ["crashed"]
+    assert not Task.objects.exists()  # Done tasks are deleted
+
+
+@pytest.mark.django_db
+def test_database_backend_fails_tasks_crashing_workers(database_backend):
+    """Test a task whose every attempt's lease expired is not retried."""
+    flaky.enqueue("poison", failures=0)
+    record.enqueue("next")
+    for _ in range(3):
+        assert database_backend.claim().name == flaky.task_name
+        Task.objects.filter(name=flaky.task_name).update(
+            run_at=timezone.now() - timedelta(seconds=1)
+        )
+    assert database_backend.run_next()
+    assert calls == ["next"]
+    task = Task.objects.get()
+    assert (task.status, task.attempts) == (Task.FAILED, 3)
+    assert "Lease expired" in task.last_error
+    assert not database_backend.run_next()
+
+
+@pytest.mark.django_db
+def test_run_tasks_command(database_backend, settings):
+    """Test the worker command drains the due tasks."""
+    for value in range(3):
+        record.enqueue(value)
+    out = io.StringIO()
+    call_command("run_tasks", "--once", stdout=out)
+    assert calls == [0, 1, 2]
+    assert "Ran 3 tasks." in out.getvalue()
+
+    settings.TASKS_BACKEND = "thread"
+    with pytest.raises(CommandError):
+        call_command("run_tasks", "--once")
+
+
+@pytest.mark.django_db
+def test_job_search_index_updated_by_worker(database_backend):
+    """Test job changes reach the FTS5 index through queued tasks."""
+    if not get_search_backend().transactional:
+        pytest.skip("Per-process search index")
+    user = get_user_model().objects.create_user(
+        email="a@example.com", password="pass"
+    )
+    job = Job.objects.create(
+        title="Queued engineer",
+        location="Paris",
+        description="Desc",
+        contract_type="cdi",
+        owner=user,
+    )
+    assert get_search_backend().search("queued", 10) == []
+    call_command("run_tasks", "--once", stdout=io.StringIO())
+    assert [
+        hit.job_id for hit in get_search_backend().search("queued", 10)
+    ] == [job.pk]
+
+    job.delete()
+    call_command("run_tasks", "--once", stdout=io.StringIO())
+    assert get_search_backend().search("queued", 10) == []
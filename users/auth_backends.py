@@ -1,13 +1,39 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.backends import BaseBackend
+from django.contrib.auth.backends import ModelBackend
+from django.db.models.functions import Lower
 
 
-class EmailAuthBackend(BaseBackend):
-    def authenticate(self, request, email=None):
+class EmailAuthBackend(ModelBackend):
+    """
+    Authenticate with email and password in a single query.
+
+    The email is matched case-insensitively through the LOWER(email)
+    index. Unknown emails still run the password hasher, so response
+    times don't reveal which emails have an account.
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
         User = get_user_model()
+        if email is None:
+            # The admin and ModelBackend callers pass `username`
+            email = kwargs.get("username", kwargs.get(User.USERNAME_FIELD))
+        if email is None or password is None:
+            return None
 
-        try:
-            user = User.objects.get(email=email)
-            return user
-        except User.DoesNotExist:
+        candidates = list(
+            User._default_manager.alias(email_lower=Lower("email")).filter(
+                email_lower=email.lower()
+            )[:2]
+        )
+        # Legacy rows may differ only by case: prefer the exact match
+        user = next(
+            (c for c in candidates if c.email == email),
+            candidates[0] if candidates else None,
+        )
+        if user is None:
+            # Reduce the timing difference with an existing user
+            User().set_password(password)
             return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
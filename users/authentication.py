@@ -0,0 +1,134 @@
+"""
+JWT authentication without a user query per request.
+
+`ClaimsJWTAuthentication` builds `request.user` from the access token
+claims (id, email, is_staff) instead of selecting the User row. Anything
+else is read from the full user, loaded on first use and kept in a
+per-process LRU (`AUTH_USER_CACHE_TIMEOUT` seconds,
+`AUTH_USER_CACHE_SIZE` users) that User saves and deletes invalidate.
+
+Like simplejwt's stateless authentication, reads don't check that the
+user still exists and is active: a deleted or deactivated user keeps
+read access until their access token expires. Writes, which may
+reference the user, load it (from the cache) and fail authentication
+otherwise.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import (
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from users.cache import LRUCache
+
+user_cache = LRUCache(settings.AUTH_USER_CACHE_SIZE)
+
+
+def get_cached_user(user_id):
+    """
+    The User with this id, from the per-process cache when possible.
+    """
+    user = user_cache.get(user_id)
+    if user is None:
+        User = get_user_model()
+        try:
+            user = User.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        user_cache.set(user_id, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+class ClaimsUser(TokenUser):
+    """
+    User backed by token claims, falling back to the full User for
+    anything the token does not carry.
+    """
+
+    @cached_property
+    def id(self):
+        # Claims are strings; match the type of the user's id field
+        field = get_user_model()._meta.get_field(api_settings.USER_ID_FIELD)
+        return field.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def user(self):
+        return get_cached_user(self.id)
+
+    @cached_property
+    def email(self):
+        return self.token.get("email") or self.user.email
+
+    @cached_property
+    def is_staff(self):
+        if "is_staff" in self.token:
+            return self.token["is_staff"]
+        return self.user.is_staff
+
+    @cached_property
+    def is_superuser(self):
+        return self.user.is_superuser
+
+    def __str__(self):
+        return self.email
+
+    @property
+    def groups(self):
+        return self.user.groups
+
+    @property
+    def user_permissions(self):
+        return self.user.user_permissions
+
+    def get_group_permissions(self, obj=None):
+        return self.user.get_group_permissions(obj)
+
+    def get_all_permissions(self, obj=None):
+        return self.user.get_all_permissions(obj)
+
+    def has_perm(self, perm, obj=None):
+        return self.user.has_perm(perm, obj)
+
+    def has_perms(self, perm_list, obj=None):
+        return self.user.has_perms(perm_list, obj)
+
+    def has_module_perms(self, module):
+        return self.user.has_module_perms(module)
+
+    def get_username(self):
+        return self.email
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.user, attr)
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication returning a `ClaimsUser`, without a user query.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)  # Raises InvalidToken
+        return ClaimsUser(validated_token)
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None and request.method not in SAFE_METHODS:
+            # Raises AuthenticationFailed for deleted users
+            if not result[0].user.is_active:
+                raise AuthenticationFailed(
+                    _("User is inactive"), code="user_inactive"
+                )
+        return result
@@ -0,0 +1,111 @@
+"""
+In-memory accelerator for the refresh token blacklist.
+
+simplejwt checks every refresh token against the BlacklistedToken table.
+Instead, each process keeps the set of blacklisted jtis: it loads the
+set on first use, adds new entries as this process writes them (see
+users.signals) and every `TOKEN_BLACKLIST_SYNC_INTERVAL` seconds reads
+only the rows past its settled mark. Refresh calls thus check the
+blacklist without a query. A token signed out through another process
+is rejected here within the sync interval.
+
+Ids are taken when rows are inserted, not when they commit, so with
+concurrent writers (PostgreSQL) a row may become visible after one with
+a higher id. The settled mark is therefore the highest id among rows
+blacklisted over `TOKEN_BLACKLIST_SETTLE_TIME` seconds ago: rows with a
+lower id were inserted earlier and have committed since. Recent rows
+are read again on each sync until they settle.
+"""
+
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+
+class BlacklistIndex:
+    """
+    Blacklisted jtis of this process, synced from the database.
+    """
+
+    reload_interval = 3600  # Full reload, dropping purged tokens
+
+    def __init__(self):
+        self.jtis = set()
+        self.settled_mark = 0  # Rows up to this id are all known
+        self.synced_at = None
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    def read(self, rows):
+        """
+        Add the jtis of the BlacklistedToken `rows`, raising the settled
+        mark past those blacklisted before the settle time.
+        """
+        settled = timezone.now() - timedelta(
+            seconds=settings.TOKEN_BLACKLIST_SETTLE_TIME
+        )
+        rows = rows.values_list("id", "token__jti", "blacklisted_at")
+        for pk, jti, blacklisted_at in rows.iterator(chunk_size=10_000):
+            self.jtis.add(jti)
+            if blacklisted_at <= settled:
+                self.settled_mark = max(self.settled_mark, pk)
+
+    def load(self):
+        self.jtis = set()
+        self.settled_mark = 0
+        self.read(
+            BlacklistedToken.objects.filter(
+                token__expires_at__gt=timezone.now()
+            )
+        )
+        self.loaded_at = self.synced_at = time.monotonic()
+
+    def sync(self):
+        self.read(BlacklistedToken.objects.filter(id__gt=self.settled_mark))
+        self.synced_at = time.monotonic()
+
+    def refresh(self):
+        now = time.monotonic()
+        with self.lock:
+            if self.loaded_at is None or (
+                now - self.loaded_at >= self.reload_interval
+            ):
+                self.load()
+            elif (
+                now - self.synced_at >= settings.TOKEN_BLACKLIST_SYNC_INTERVAL
+            ):
+                self.sync()
+
+    def __contains__(self, jti):
+        self.refresh()
+        return jti in self.jtis
+
+    def add(self, jti):
+        self.jtis.add(jti)
+
+    def reset(self):
+        with self.lock:
+            self.jtis = set()
+            self.settled_mark = 0
+            self.synced_at = self.loaded_at = None
+
+
+blacklist_index = BlacklistIndex()
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    Refresh token checked against the in-memory blacklist.
+    """
+
+    def check_blacklist(self):
+        if self.payload[api_settings.JTI_CLAIM] in blacklist_index:
+            raise TokenError(_("Token is blacklisted"))
@@ -0,0 +1,64 @@
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework_api_key.models import APIKey
+from rest_framework_api_key.permissions import HasAPIKey as UncachedHasAPIKey
+
+from my_job_board.benchmark import measure_in_process, throwaway_database
+from users.permissions import HasAPIKey, api_key_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-request cost of the API key permission with and "
+        "without the verification cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **kwargs):
+        count = max(2, kwargs["requests"])
+        # Cached verifications are only used with a shared cache
+        with (
+            throwaway_database(),
+            tempfile.TemporaryDirectory() as location,
+            override_settings(
+                CACHES={
+                    **settings.CACHES,
+                    "shared": {
+                        "BACKEND": "django.core.cache.backends.filebased."
+                        "FileBasedCache",
+                        "LOCATION": location,
+                    },
+                },
+                API_KEY_CACHE_ALIAS="shared",
+            ),
+        ):
+            _, key = APIKey.objects.create_key(name="benchmark")
+            request = APIRequestFactory().post(
+                "/", HTTP_AUTHORIZATION=f"Api-Key {key}"
+            )
+            api_key_cache.clear()
+
+            self.stdout.write(
+                f"{'permission':<12} {'p50':>9} {'p95':>9} {'req/s':>10} "
+                f"{'queries':>8}"
+            )
+            for name, permission in (
+                ("uncached", UncachedHasAPIKey()),
+                ("cached", HasAPIKey()),
+            ):
+
+                def call():
+                    assert permission.has_permission(request, None)
+
+                m = measure_in_process(call, count)
+                self.stdout.write(
+                    f"{name:<12} {m['p50_ms'] * 1000:>7.1f}us "
+                    f"{m['p95_ms'] * 1000:>7.1f}us {m['rps']:>10.1f} "
+                    f"{m['queries']:>8}"
+                )
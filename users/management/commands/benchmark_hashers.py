@@ -0,0 +1,75 @@
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+
+# Cost setting tuned by each --<profile>-cost option
+COST_SETTINGS = {
+    "pbkdf2": "PASSWORD_PBKDF2_ITERATIONS",
+    "scrypt": "PASSWORD_SCRYPT_WORK_FACTOR",
+    "argon2": "PASSWORD_ARGON2_TIME_COST",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Report password hashes per second on one core for each hasher "
+        "profile, to pick costs that fit the signup/login latency budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seconds",
+            type=float,
+            default=2.0,
+            help="Time spent hashing per profile and cost",
+        )
+        for profile, setting in COST_SETTINGS.items():
+            parser.add_argument(
+                f"--{profile}-cost",
+                type=int,
+                nargs="+",
+                help=f"Values of {setting} to compare (default: current)",
+            )
+
+    def handle(self, *args, **kwargs):
+        cores = os.cpu_count() or 1
+        self.stdout.write(
+            f"{'profile':<8} {'cost':>10} {'ms/hash':>9} "
+            f"{'hashes/s/core':>14} {f'x{cores} cores':>11}"
+        )
+        for profile, setting in COST_SETTINGS.items():
+            hasher = import_string(
+                settings.PASSWORD_HASHER_PROFILES[profile]
+            )()
+            if hasher.library:
+                try:
+                    hasher._load_library()
+                except ValueError:
+                    self.stdout.write(
+                        f"{profile:<8} skipped: {hasher.library} not installed"
+                    )
+                    continue
+
+            costs = kwargs[f"{profile}_cost"] or [getattr(settings, setting)]
+            for cost in costs:
+                with override_settings(**{setting: cost}):
+                    per_second = self.measure(hasher, kwargs["seconds"])
+                self.stdout.write(
+                    f"{profile:<8} {cost:>10} {1000 / per_second:>9.1f} "
+                    f"{per_second:>14.1f} {per_second * cores:>11.1f}"
+                )
+
+    def measure(self, hasher, seconds):
+        count = 0
+        start = time.perf_counter()
+        while True:
+            make_password("correct horse battery staple", hasher=hasher)
+            count += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= seconds:
+                return count / elapsed
@@ -0,0 +1,155 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from my_job_board.benchmark import (
+    measure_concurrent,
+    measure_in_process,
+    throwaway_database,
+)
+from users.permissions import api_key_cache
+from users.throttling import TokenBucketThrottle, bucket_store
+
+# Never run out of tokens: the cost measured is the same
+UNLIMITED = {
+    "default": {
+        "user": "1000000000/s",
+        "api_key": "1000000000/s",
+        "anon": "1000000000/s",
+    }
+}
+
+
+class BenchmarkUser:
+    is_authenticated = True
+    pk = 1
+
+
+class PingView(APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        return Response()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request cost of the token bucket throttle, for "
+        "each kind of client, many clients, concurrent threads, and as "
+        "overhead on a minimal DRF view."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20000)
+        parser.add_argument("--clients", type=int, default=10000)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--budget",
+            type=float,
+            default=100.0,
+            help="Fail when a p95 exceeds this many microseconds",
+        )
+
+    def handle(self, *args, **kwargs):
+        count = max(2, kwargs["requests"])
+        factory = APIRequestFactory()
+        with (
+            throwaway_database(),
+            override_settings(THROTTLE_ENABLED=True, THROTTLE_RATES=UNLIMITED),
+        ):
+            key = "Bench123.secret"
+            api_key_cache.add(key, 3600, api_key_cache.get_generation(key))
+
+            def request(**headers):
+                return Request(factory.get("/", **headers))
+
+            user_request = request()
+            user_request.user = BenchmarkUser()
+            requests = {
+                "anon": [request()],
+                "user": [user_request],
+                "api_key": [request(HTTP_AUTHORIZATION=f"Api-Key {key}")],
+                "anon, many IPs": [
+                    request(
+                        REMOTE_ADDR=f"10.{i >> 16}.{i >> 8 & 255}.{i & 255}"
+                    )
+                    for i in range(max(1, kwargs["clients"]))
+                ],
+            }
+
+            def throttle_call(pool):
+                position = iter(range(1 << 62))
+
+                def call():
+                    drf_request = pool[next(position) % len(pool)]
+                    drf_request._request.__dict__.pop("rate_limit", None)
+                    assert TokenBucketThrottle().allow_request(
+                        drf_request, None
+                    )
+
+                return call
+
+            results = []
+            for name, pool in requests.items():
+                bucket_store.clear()
+                results.append(
+                    (name, measure_in_process(throttle_call(pool), count))
+                )
+            bucket_store.clear()
+            results.append(
+                (
+                    f"anon, {kwargs['concurrency']} threads",
+                    measure_concurrent(
+                        throttle_call(requests["anon, many IPs"]),
+                        count,
+                        kwargs["concurrency"],
+                    ),
+                )
+            )
+
+            # Whole view with and without the throttle
+            view_runs = {}
+            for name, throttles in (
+                ("view, no throttle", []),
+                ("view, throttled", [TokenBucketThrottle]),
+            ):
+                view = PingView.as_view(throttle_classes=throttles)
+
+                def call():
+                    assert view(factory.get("/")).status_code == 200
+
+                view_runs[name] = measure_in_process(call, count)
+                results.append((name, view_runs[name]))
+
+        self.stdout.write(
+            f"{'case':<20} {'p50':>9} {'p95':>9} {'p99':>9} {'calls/s':>10}"
+        )
+        over_budget = []
+        for name, m in results:
+            self.stdout.write(
+                f"{name:<20} {m['p50_ms'] * 1000:>7.1f}us "
+                f"{m['p95_ms'] * 1000:>7.1f}us {m['p99_ms'] * 1000:>7.1f}us "
+                f"{m['rps']:>10.1f}"
+            )
+            if not name.startswith("view") and (
+                m["p95_ms"] * 1000 > kwargs["budget"]
+            ):
+                over_budget.append(name)
+        overhead = (
+            view_runs["view, throttled"]["p50_ms"]
+            - view_runs["view, no throttle"]["p50_ms"]
+        ) * 1000
+        self.stdout.write(
+            f"Throttle overhead per view call (p50): {overhead:.1f}us"
+        )
+        if overhead > kwargs["budget"]:
+            over_budget.append("view overhead")
+        if over_budget:
+            raise CommandError(
+                f"Over the {kwargs['budget']:g}us budget: "
+                + ", ".join(over_budget)
+            )
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding tokens and their blacklist entries, "
+        "a chunk at a time so the tables are never locked for long."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Tokens deleted per transaction",
+        )
+
+    def handle(self, *args, **kwargs):
+        chunk_size = kwargs["chunk_size"]
+        expired = OutstandingToken.objects.filter(
+            expires_at__lte=timezone.now()
+        ).order_by("id")
+        outstanding = blacklisted = 0
+        last_id = 0
+        while True:
+            ids = list(
+                expired.filter(id__gt=last_id).values_list("id", flat=True)[
+                    :chunk_size
+                ]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            with transaction.atomic():
+                blacklisted += BlacklistedToken.objects.filter(
+                    token_id__in=ids
+                ).delete()[0]
+                outstanding += OutstandingToken.objects.filter(
+                    id__in=ids
+                ).delete()[0]
+
+        self.stdout.write(
+            f"Deleted {outstanding} outstanding and {blacklisted} "
+            "blacklisted tokens."
+        )
@@ -0,0 +1,131 @@
+"""
+API key permission with a per-process verification cache.
+
+`HasAPIKey` from rest_framework_api_key queries the key by prefix and
+verifies its hash on every request. Keys sent by partners are the same
+over and over, so a successful verification is remembered in a bounded
+LRU for `API_KEY_CACHE_TIMEOUT` seconds, keyed on the key prefix with
+the SHA-256 of the full key.
+
+Each prefix also has a generation in the shared `API_KEY_CACHE_ALIAS`
+cache, checked on every hit. Saving or deleting an APIKey (rotation by
+`generate_api_key`, revocation in the admin) bumps it through signals,
+so the change reaches every process sharing that cache at once.
+
+Verifications are only taken from the cache when that alias is shared
+between processes: with a per-process backend (LocMemCache, DummyCache),
+a key revoked by `generate_api_key` would keep working here, so every
+request verifies the key.
+"""
+
+import hashlib
+import hmac
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework_api_key.permissions import HasAPIKey as BaseHasAPIKey
+
+from users.cache import LRUCache
+
+# Backends keeping their entries in each process
+LOCAL_CACHE_BACKENDS = (LocMemCache, DummyCache)
+
+
+class APIKeyCache(LRUCache):
+    """
+    Verified keys: prefix -> (SHA-256 of the full key, generation of the
+    prefix when verified).
+    """
+
+    @staticmethod
+    def digest(key):
+        return hashlib.sha256(key.encode()).digest()
+
+    @staticmethod
+    def generation_key(prefix):
+        return f"api_key:generation:{prefix}"
+
+    @staticmethod
+    def is_shared():
+        """
+        Whether revocations made by other processes reach this one.
+        """
+        shared = caches[settings.API_KEY_CACHE_ALIAS]
+        return not isinstance(shared, LOCAL_CACHE_BACKENDS)
+
+    def get_generation(self, key):
+        """
+        Current generation of the key's prefix, to read before verifying
+        the key.
+        """
+        prefix, _, _ = key.partition(".")
+        shared = caches[settings.API_KEY_CACHE_ALIAS]
+        generation = shared.get(self.generation_key(prefix))
+        if generation is None:
+            shared.add(
+                self.generation_key(prefix), time.time_ns(), timeout=None
+            )
+            generation = shared.get(self.generation_key(prefix))
+        return generation
+
+    def is_verified(self, key):
+        prefix, _, _ = key.partition(".")
+        entry = self.get(prefix)
+        if entry is None:
+            return False
+        digest, generation = entry
+        if not hmac.compare_digest(digest, self.digest(key)):
+            return False
+        shared = caches[settings.API_KEY_CACHE_ALIAS]
+        return shared.get(self.generation_key(prefix)) == generation
+
+    def add(self, key, timeout, generation):
+        prefix, _, _ = key.partition(".")
+        self.set(prefix, (self.digest(key), generation), timeout)
+
+    def revoke(self, prefix):
+        """
+        Forget the verifications of the prefix, in every process.
+        """
+        self.delete(prefix)
+        caches[settings.API_KEY_CACHE_ALIAS].set(
+            self.generation_key(prefix), time.time_ns(), timeout=None
+        )
+
+
+api_key_cache = APIKeyCache(settings.API_KEY_CACHE_SIZE)
+
+
+class HasAPIKey(BaseHasAPIKey):
+    """
+    HasAPIKey remembering successful verifications (see module docstring).
+    """
+
+    cache = api_key_cache
+
+    def has_permission(self, request, view):
+        key = self.get_key(request)
+        if not key:
+            return False
+        if self.cache.is_shared() and self.cache.is_verified(key):
+            return True
+
+        # Read first: a revocation committed meanwhile bumps it
+        generation = self.cache.get_generation(key)
+        try:
+            api_key = self.model.objects.get_from_key(key)
+        except self.model.DoesNotExist:
+            return False
+        if api_key.has_expired:
+            return False
+
+        timeout = settings.API_KEY_CACHE_TIMEOUT
+        if api_key.expiry_date is not None:
+            # Never serve a key from the cache past its expiry date
+            remaining = api_key.expiry_date.timestamp() - time.time()
+            timeout = min(timeout, remaining)
+        self.cache.add(key, timeout, generation)
+        return True
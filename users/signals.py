@@ -0,0 +1,34 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_api_key.models import APIKey
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from users.authentication import user_cache
+from users.blacklist import blacklist_index
+from users.permissions import api_key_cache
+
+
+@receiver(post_save, sender=APIKey)
+@receiver(post_delete, sender=APIKey)
+def invalidate_api_key_cache(sender, instance, **kwargs):
+    # Revoked, expired or rotated keys must not be served from the cache;
+    # again on commit, as the old row may be verified until then
+    api_key_cache.revoke(instance.prefix)
+    transaction.on_commit(partial(api_key_cache.revoke, instance.prefix))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_cache(sender, instance, **kwargs):
+    user_cache.delete(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_to_blacklist_index(sender, instance, created, **kwargs):
+    # Reject the token in this process at once, before the next sync
+    if created:
+        blacklist_index.add(instance.token.jti)
@@ -1,8 +1,42 @@
+import io
+from datetime import timedelta
+from unittest.mock import patch
+
 import pytest
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from rest_framework.test import APIClient
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
 from rest_framework_api_key.models import APIKey
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.auth_backends import EmailAuthBackend
+from users.authentication import (
+    ClaimsJWTAuthentication,
+    get_cached_user,
+    user_cache,
+)
+from users.blacklist import RefreshToken, blacklist_index
+from users.permissions import APIKeyCache, api_key_cache
+from users.throttling import TokenBucketStore
+from users.views import EmailTokenObtainPairSerializer
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    # Verified keys, loaded users and blacklisted tokens must not leak
+    # between tests
+    api_key_cache.clear()
+    user_cache.clear()
+    blacklist_index.reset()
 
 
 @pytest.fixture
@@ -12,6 +46,19 @@ def api_key():
     return key
 
 
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    # API key revocations shared between processes, as in production
+    settings.CACHES = {
+        **settings.CACHES,
+        "shared": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path),
+        },
+    }
+    settings.API_KEY_CACHE_ALIAS = "shared"
+
+
 @pytest.fixture
 def api_client(api_key):
     # API client with API key
@@ -145,3 +192,432 @@ def test_signout_invalid_token(api_client, user):
     response = api_client.post(signout_url, {"refresh": "invalidtoken"})
     assert response.status_code == 400
     assert "detail" in response.data
+
+
+@pytest.mark.django_db
+def test_api_key_verification_is_cached(
+    api_client, shared_cache, django_assert_num_queries
+):
+    """Test a verified API key is not looked up again."""
+    url = reverse("sign_up")
+    api_client.post(url, {"email": "a@example.com", "password": "pass1234"})
+    # Only the signup queries: no API key lookup
+    with django_assert_num_queries(2):
+        response = api_client.post(
+            url, {"email": "b@example.com", "password": "pass1234"}
+        )
+    assert response.status_code == 201
+
+
+@pytest.mark.django_db
+def test_api_key_cache_rejects_other_key_with_same_prefix(
+    api_client, shared_cache, api_key
+):
+    """Test a cached prefix does not accept a different secret."""
+    url = reverse("sign_up")
+    api_client.post(url, {"email": "a@example.com", "password": "pass1234"})
+    prefix, _, _ = api_key.partition(".")
+    api_client.credentials(HTTP_AUTHORIZATION=f"Api-Key {prefix}.forged")
+    response = api_client.post(
+        url, {"email": "b@example.com", "password": "pass1234"}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_api_key_cache_invalidated_on_revoke_and_rotate(
+    api_client, shared_cache, api_key
+):
+    """Test revoked and rotated keys stop working at once."""
+    url = reverse("sign_up")
+    api_client.post(url, {"email": "a@example.com", "password": "pass1234"})
+    key = APIKey.objects.get_from_key(api_key)
+    key.revoked = True
+    key.save()
+    response = api_client.post(
+        url, {"email": "b@example.com", "password": "pass1234"}
+    )
+    assert response.status_code == 401
+
+    _, new_key = APIKey.objects.create_key(name="rotated")
+    api_client.credentials(HTTP_AUTHORIZATION=f"Api-Key {new_key}")
+    api_client.post(url, {"email": "c@example.com", "password": "pass1234"})
+    APIKey.objects.filter(name="rotated").delete()
+    response = api_client.post(
+        url, {"email": "d@example.com", "password": "pass1234"}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_api_key_revoked_by_other_process(api_client, shared_cache, api_key):
+    """Test revocations elsewhere reach this process's cache at once."""
+    url = reverse("sign_up")
+    api_client.post(url, {"email": "a@example.com", "password": "pass1234"})
+    assert api_key_cache.is_verified(api_key)
+    # Another process (e.g. generate_api_key) revokes the key: its own
+    # cache gets the signal, this one only shares the Django cache
+    other_process_cache = APIKeyCache(settings.API_KEY_CACHE_SIZE)
+    with patch("users.signals.api_key_cache", other_process_cache):
+        APIKey.objects.get_from_key(api_key).delete()
+    assert api_key_cache.get(api_key.partition(".")[0]) is not None
+    response = api_client.post(
+        url, {"email": "b@example.com", "password": "pass1234"}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_api_key_cache_unused_unless_shared(api_client, api_key):
+    """Test keys are verified on every request with a per-process cache."""
+    url = reverse("sign_up")
+    api_client.post(url, {"email": "a@example.com", "password": "pass1234"})
+    # Revoked by another process, whose LocMemCache this one can't see
+    prefix, _, _ = api_key.partition(".")
+    APIKey.objects.filter(prefix=prefix).update(revoked=True)
+    response = api_client.post(
+        url, {"email": "b@example.com", "password": "pass1234"}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_access_token_carries_user_claims(api_client, user):
+    """Test the access token embeds the claims used by ClaimsUser."""
+    url = reverse("token_obtain_pair")
+    response = api_client.post(
+        url, {"email": user.email, "password": "pass1234"}
+    )
+    token = AccessToken(response.data["access"])
+    assert token["email"] == user.email
+    assert token["is_staff"] is False
+
+
+@pytest.mark.django_db
+def test_claims_user_loads_full_user_lazily(user, django_assert_num_queries):
+    """Test claims are served without a query, other fields load once."""
+    request = APIRequestFactory().get(
+        "/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+    )
+    with django_assert_num_queries(0):
+        claims_user, _ = ClaimsJWTAuthentication().authenticate(request)
+        assert claims_user.pk == user.pk
+        assert claims_user.is_authenticated
+    # Older tokens without the email claim fall back to the full user
+    with django_assert_num_queries(1):
+        assert claims_user.email == user.email
+        assert claims_user.date_joined == user.date_joined
+
+
+@pytest.mark.django_db
+def test_user_cache_invalidated_on_save(user):
+    """Test saving a user drops it from the per-process cache."""
+    assert get_cached_user(user.pk).first_name == ""
+    user.first_name = "Ada"
+    user.save()
+    assert get_cached_user(user.pk).first_name == "Ada"
+
+
+@pytest.mark.django_db
+def test_job_create_skips_user_query(user):
+    """Test authenticated job writes select the user once per cache timeout."""
+    refresh = EmailTokenObtainPairSerializer.get_token(user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+    data = {
+        "title": "Engineer",
+        "location": "Paris",
+        "description": "Build things",
+        "contract_type": "cdi",
+    }
+    with CaptureQueriesContext(connection) as captured:
+        for _ in range(2):
+            response = client.post(reverse("job-list-create"), data)
+            assert response.status_code == 201
+    assert response.json()["owner"] == user.pk
+    assert len([q for q in captured if "users_user" in q["sql"]]) == 1
+
+
+@pytest.mark.django_db
+def test_writes_refused_for_deleted_or_inactive_user(user):
+    """Test valid access tokens can't write once the user is gone."""
+    refresh = EmailTokenObtainPairSerializer.get_token(user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+    url = reverse("job-list-create")
+    data = {
+        "title": "Engineer",
+        "location": "Paris",
+        "description": "Build things",
+        "contract_type": "cdi",
+    }
+    user.is_active = False
+    user.save()
+    response = client.post(url, data)
+    assert response.status_code == 401
+    assert response.data["code"] == "user_inactive"
+
+    user.delete()
+    response = client.post(url, data)
+    assert response.status_code == 401
+    assert response.data["code"] == "user_not_found"
+    assert client.get(url).status_code == 200  # Reads stay stateless
+
+
+@pytest.mark.django_db
+def test_refresh_checks_blacklist_in_memory(
+    api_client, user, django_assert_num_queries
+):
+    """Test refresh skips the blacklist query and honors sign outs."""
+    refresh = str(RefreshToken.for_user(user))
+    url = reverse("token_refresh")
+    api_client.post(url, {"refresh": refresh})  # Warms the blacklist
+    with django_assert_num_queries(1):  # The user lookup only
+        response = api_client.post(url, {"refresh": refresh})
+    assert response.status_code == 200
+
+    api_client.post(reverse("sign_out"), {"refresh": refresh})
+    response = api_client.post(url, {"refresh": refresh})
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_blacklist_syncs_tokens_from_other_processes(user, settings):
+    """Test tokens blacklisted elsewhere are picked up on sync."""
+    settings.TOKEN_BLACKLIST_SYNC_INTERVAL = 0
+    token = RefreshToken.for_user(user)
+    assert token["jti"] not in blacklist_index
+    outstanding = OutstandingToken.objects.get(jti=token["jti"])
+    # bulk_create skips signals, as a write by another process would
+    BlacklistedToken.objects.bulk_create([BlacklistedToken(token=outstanding)])
+    assert token["jti"] in blacklist_index
+
+
+@pytest.mark.django_db
+def test_blacklist_syncs_rows_committed_out_of_order(user, settings):
+    """Test rows committing after one with a higher id are still read."""
+    settings.TOKEN_BLACKLIST_SYNC_INTERVAL = 0
+    tokens = [RefreshToken.for_user(user) for _ in range(3)]
+    outstanding = [
+        OutstandingToken.objects.get(jti=token["jti"]) for token in tokens
+    ]
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(id=10, token=outstanding[0])]
+    )
+    assert tokens[0]["jti"] in blacklist_index
+    # A transaction that took a lower id commits later
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(id=5, token=outstanding[1])]
+    )
+    assert tokens[1]["jti"] in blacklist_index
+    assert blacklist_index.settled_mark == 0
+
+    # Once settled, older rows are no longer read again
+    BlacklistedToken.objects.update(
+        blacklisted_at=timezone.now() - timedelta(minutes=1)
+    )
+    assert tokens[2]["jti"] not in blacklist_index
+    assert blacklist_index.settled_mark == 10
+
+
+@pytest.mark.django_db
+def test_purge_tokens(user):
+    """Test expired tokens are purged with their blacklist entries."""
+    now = timezone.now()
+    for i in range(5):
+        OutstandingToken.objects.create(
+            user=user,
+            jti=f"expired-{i}",
+            token="",
+            expires_at=now - timedelta(days=1),
+        )
+    live = OutstandingToken.objects.create(
+        user=user, jti="live", token="", expires_at=now + timedelta(days=1)
+    )
+    BlacklistedToken.objects.create(
+        token=OutstandingToken.objects.get(jti="expired-0")
+    )
+    BlacklistedToken.objects.create(token=live)
+
+    call_command("purge_tokens", chunk_size=2, stdout=io.StringIO())
+    assert list(OutstandingToken.objects.values_list("jti", flat=True)) == [
+        "live"
+    ]
+    assert BlacklistedToken.objects.get().token_id == live.pk
+
+
+@pytest.mark.django_db
+def test_password_rehashed_on_login_after_cost_change(api_client, settings):
+    """Test login upgrades hashes made with stale parameters."""
+    settings.PASSWORD_PBKDF2_ITERATIONS = 1000
+    User = get_user_model()
+    user = User.objects.create_user(email="hash@example.com", password="pw")
+    assert user.password.startswith("pbkdf2_sha256$1000$")
+
+    settings.PASSWORD_PBKDF2_ITERATIONS = 2000
+    url = reverse("token_obtain_pair")
+    response = api_client.post(url, {"email": user.email, "password": "pw"})
+    assert response.status_code == 200
+    user.refresh_from_db()
+    assert user.password.startswith("pbkdf2_sha256$2000$")
+
+
+@pytest.mark.django_db
+def test_password_rehashed_on_login_after_profile_change(api_client, settings):
+    """Test login moves hashes to the preferred profile's algorithm."""
+    settings.PASSWORD_PBKDF2_ITERATIONS = 1000
+    settings.PASSWORD_SCRYPT_WORK_FACTOR = 2**10
+    User = get_user_model()
+    user = User.objects.create_user(email="hash@example.com", password="pw")
+
+    settings.PASSWORD_HASHERS = [
+        "users.hashers.TunedScryptPasswordHasher",
+        "users.hashers.TunedPBKDF2PasswordHasher",
+    ]
+    url = reverse("token_obtain_pair")
+    response = api_client.post(url, {"email": user.email, "password": "pw"})
+    assert response.status_code == 200
+    user.refresh_from_db()
+    assert user.password.startswith("scrypt$1024$")
+
+
+@pytest.mark.django_db
+def test_login_single_user_query(api_client, settings):
+    """Test a login looks the user up once, case-insensitively."""
+    settings.PASSWORD_PBKDF2_ITERATIONS = 1000
+    User = get_user_model()
+    user = User.objects.create_user(email="Login@Example.com", password="pw")
+    url = reverse("token_obtain_pair")
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.post(
+            url, {"email": "login@example.COM", "password": "pw"}
+        )
+    assert response.status_code == 200
+    user_queries = [q for q in captured if "users_user" in q["sql"]]
+    assert len(user_queries) == 1
+    assert "LOWER" in user_queries[0]["sql"]
+    assert AccessToken(response.data["access"])["user_id"] == str(user.pk)
+
+
+@pytest.mark.django_db
+def test_login_unknown_email_runs_hasher(monkeypatch):
+    """Test unknown emails cost a password hash, like known ones."""
+    calls = []
+    monkeypatch.setattr(
+        get_user_model(), "set_password", lambda self, raw: calls.append(raw)
+    )
+    backend = EmailAuthBackend()
+    assert (
+        backend.authenticate(None, email="nobody@example.com", password="x")
+        is None
+    )
+    assert calls == ["x"]
+
+
+def test_token_bucket_refills(monkeypatch):
+    """Test buckets refill over time, and the oldest clients go first."""
+    now = [1000.0]
+    monkeypatch.setattr("users.throttling.time.monotonic", lambda: now[0])
+    store = TokenBucketStore(max_entries=2)
+    assert [store.consume("a", 2, 1.0)[0] for _ in range(3)] == [
+        True,
+        True,
+        False,
+    ]
+    now[0] += 0.5
+    assert store.consume("a", 2, 1.0) == (False, 0.5)
+    now[0] += 0.5
+    assert store.consume("a", 2, 1.0) == (True, 0.0)
+    now[0] += 60
+    assert store.consume("a", 2, 1.0) == (True, 1.0)  # Capped at capacity
+
+    store.consume("b", 2, 1.0)
+    store.consume("c", 2, 1.0)
+    assert list(store.buckets) == ["b", "c"]
+
+
+@pytest.mark.django_db
+def test_requests_throttled_per_client(settings, api_key, user):
+    """Test each client has its own bucket, reported in headers."""
+    settings.THROTTLE_RATES = {
+        "default": {"user": "3/min", "api_key": "4/min", "anon": "2/min"},
+        "auth": {"anon": None},
+    }
+    url = reverse("job-list-create")
+    client = APIClient()
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["X-RateLimit-Limit"] == "2"
+    assert response["X-RateLimit-Remaining"] == "1"
+    assert response["X-RateLimit-Reset"] == "30"
+    assert client.get(url).status_code == 200
+    response = client.get(url)
+    assert response.status_code == 429
+    assert response["X-RateLimit-Remaining"] == "0"
+    assert int(response["Retry-After"]) == 30
+
+    # Other addresses and authenticated users have their own buckets
+    assert client.get(url, REMOTE_ADDR="10.0.0.2").status_code == 200
+    client.force_authenticate(user=user)
+    assert client.get(url)["X-RateLimit-Limit"] == "3"
+
+    # API keys count once verified, made up ones fall back to the IP
+    client = APIClient(REMOTE_ADDR="10.0.0.3")
+    client.credentials(HTTP_AUTHORIZATION=f"Api-Key {api_key}")
+    response = client.post(reverse("sign_out"), {"refresh": "x"})
+    assert response["X-RateLimit-Limit"] == "4"
+    response = client.get(url)
+    assert response["X-RateLimit-Remaining"] == "2"
+    client.credentials(HTTP_AUTHORIZATION="Api-Key made.up")
+    response = client.get(url)
+    assert response["X-RateLimit-Limit"] == "2"
+    assert response["X-RateLimit-Remaining"] == "1"
+
+    # Scopes without a limit for the client
+    response = APIClient().post(
+        reverse("token_obtain_pair"),
+        {"email": "testuser2@example.com", "password": "pass1234"},
+    )
+    assert response.status_code == 200
+    assert "X-RateLimit-Limit" not in response
+
+
+@pytest.mark.django_db
+def test_spoofed_forwarded_for_shares_bucket(settings):
+    """Test X-Forwarded-For only identifies clients behind trusted proxies."""
+    settings.THROTTLE_RATES = {"default": {"anon": "2/min"}}
+    url = reverse("job-list-create")
+    client = APIClient()
+    statuses = [
+        client.get(url, HTTP_X_FORWARDED_FOR=f"10.0.0.{i}").status_code
+        for i in range(4)
+    ]
+    assert statuses == [200, 200, 429, 429]
+
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}
+    # The proxy appends the address it saw, the rest is the client's
+    spoofed = "10.0.0.1, 192.0.2.7"
+    assert client.get(url, HTTP_X_FORWARDED_FOR=spoofed).status_code == 200
+    assert client.get(url, HTTP_X_FORWARDED_FOR=spoofed).status_code == 200
+    spoofed = "10.0.0.2, 192.0.2.7"
+    assert client.get(url, HTTP_X_FORWARDED_FOR=spoofed).status_code == 429
+    other = "192.0.2.8"
+    assert client.get(url, HTTP_X_FORWARDED_FOR=other).status_code == 200
+
+
+@pytest.mark.django_db
+def test_auth_endpoints_have_their_own_limit(settings, user):
+    """Test the token endpoints are throttled on the "auth" scope."""
+    settings.THROTTLE_RATES = {
+        **settings.THROTTLE_RATES,
+        "auth": {"anon": "1/min"},
+    }
+    client = APIClient()
+    url = reverse("token_obtain_pair")
+    credentials = {"email": "testuser2@example.com", "password": "wrong"}
+    assert client.post(url, credentials).status_code == 401
+    assert client.post(url, credentials).status_code == 429
+    assert client.get(reverse("job-list-create")).status_code == 200
+
+    settings.THROTTLE_ENABLED = False
+    assert client.post(url, credentials).status_code == 401
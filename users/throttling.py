@@ -0,0 +1,173 @@
+"""
+Request rate limits with per-process token buckets.
+
+Each client gets a bucket of `N` tokens per view scope, refilled
+continuously at `N` per period, and each request takes one; a request
+finding the bucket empty gets a 429 with Retry-After. Clients are
+identified by user when authenticated, else by API key once verified by
+users.permissions.HasAPIKey (so that made up keys don't earn fresh
+buckets), else by IP address: REMOTE_ADDR, or the X-Forwarded-For entry
+added by the last of the REST_FRAMEWORK["NUM_PROXIES"] trusted proxies,
+as clients can send any X-Forwarded-For.
+
+`THROTTLE_RATES` maps view scopes (a view's `throttle_scope`, "default"
+otherwise) to rates per kind of client, like "600/min"; None disables
+the limit. Buckets live in this process only: with several processes,
+the effective limit is multiplied by their number.
+
+The limit, tokens left and seconds until the bucket is full again are
+sent in X-RateLimit-Limit, -Remaining and -Reset headers by
+RateLimitHeadersMiddleware.
+"""
+
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from users.permissions import HasAPIKey, api_key_cache
+
+PERIODS = {"s": 1, "sec": 1, "min": 60, "h": 3600, "hour": 3600, "day": 86400}
+
+RateLimit = namedtuple("RateLimit", "limit remaining reset wait")
+
+
+class TokenBucketStore:
+    """
+    Thread-safe token buckets of at most `max_entries` clients, least
+    recently used first out (an evicted client starts over full).
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.buckets = OrderedDict()  # key -> (tokens, time of update)
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, rate):
+        """
+        Take a token from bucket `key`, holding up to `capacity` tokens
+        refilled at `rate` per second. Returns (allowed, tokens left).
+        """
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                tokens = capacity
+                if len(self.buckets) >= self.max_entries:
+                    self.buckets.popitem(last=False)
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                self.buckets.move_to_end(key)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+        return allowed, tokens
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+bucket_store = TokenBucketStore(settings.THROTTLE_MAX_CLIENTS)
+
+
+@functools.cache
+def parse_rate(rate):
+    """
+    (capacity, tokens per second) of a "N/period" rate.
+    """
+    count, _, period = rate.partition("/")
+    count = int(count)
+    return count, count / PERIODS[period]
+
+
+def get_rate(scope, kind):
+    rates = settings.THROTTLE_RATES
+    scope_rates = rates.get(scope, rates["default"])
+    rate = scope_rates.get(kind, rates["default"].get(kind))
+    return None if rate is None else parse_rate(rate)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket per view scope and client (see module docstring).
+    """
+
+    store = bucket_store
+    key_parser = HasAPIKey.key_parser
+
+    def get_client(self, request):
+        user = request.user
+        if user is not None and user.is_authenticated:
+            return "user", user.pk
+        key = self.key_parser.get(request)
+        if key and api_key_cache.is_verified(key):
+            return "api_key", key.partition(".")[0]
+        return "anon", self.get_ident(request)
+
+    def allow_request(self, request, view):
+        self.rate_limit = None
+        if not settings.THROTTLE_ENABLED:
+            return True
+        # Requests are limited once, also when an async view (see
+        # job.async_views) hands them to a sync one
+        rate_limit = getattr(request._request, "rate_limit", None)
+        if rate_limit is None:
+            scope = getattr(view, "throttle_scope", "default")
+            kind, client = self.get_client(request)
+            rate = get_rate(scope, kind)
+            if rate is None:
+                return True
+            capacity, refill = rate
+            allowed, tokens = self.store.consume(
+                f"{scope}:{kind}:{client}", capacity, refill
+            )
+            rate_limit = RateLimit(
+                limit=capacity,
+                remaining=int(tokens),
+                reset=math.ceil((capacity - tokens) / refill),
+                wait=None if allowed else (1 - tokens) / refill,
+            )
+            request._request.rate_limit = rate_limit
+        self.rate_limit = rate_limit
+        return rate_limit.wait is None
+
+    def wait(self):
+        return self.rate_limit.wait
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Add the X-RateLimit-* headers of throttled requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.add_headers(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_headers(request, await self.get_response(request))
+
+    @staticmethod
+    def add_headers(request, response):
+        rate_limit = getattr(request, "rate_limit", None)
+        if rate_limit is not None:
+            response["X-RateLimit-Limit"] = str(rate_limit.limit)
+            response["X-RateLimit-Remaining"] = str(rate_limit.remaining)
+            response["X-RateLimit-Reset"] = str(rate_limit.reset)
+        return response
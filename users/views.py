@@ -5,7 +5,6 @@ from rest_framework.permissions import AllowAny
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -14,8 +13,9 @@ from rest_framework_simplejwt.serializers import (
     TokenObtainPairSerializer,
     TokenRefreshSerializer,
 )
-from rest_framework_api_key.permissions import HasAPIKey
 
+from users.blacklist import RefreshToken
+from users.permissions import HasAPIKey
 from users.serializers import SignUpSerializer, EmailTokenObtainPairView
 
 
@@ -26,6 +26,7 @@ class SignUpView(generics.CreateAPIView):
 
     serializer_class = SignUpSerializer
     permission_classes = (AllowAny, HasAPIKey)
+    throttle_scope = "auth"
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -72,6 +73,23 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
 
     username_field = "email"
 
+    @classmethod
+    def get_token(cls, user):
+        # Claims read by users.authentication.ClaimsUser, so authenticated
+        # requests don't need to load the user
+        token = super().get_token(user)
+        token["email"] = user.email
+        token["is_staff"] = user.is_staff
+        return token
+
+
+class EmailTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer checking the in-memory token blacklist.
+    """
+
+    token_class = RefreshToken
+
 
 class EmailTokenObtainPairView(TokenObtainPairView):
     """
@@ -79,6 +97,7 @@ class EmailTokenObtainPairView(TokenObtainPairView):
     """
 
     serializer_class = EmailTokenObtainPairSerializer
+    throttle_scope = "auth"
 
 
 class EmailTokenRefreshView(TokenRefreshView):
@@ -86,4 +105,5 @@ class EmailTokenRefreshView(TokenRefreshView):
     Refresh JWT token.
     """
 
-    serializer_class = TokenRefreshSerializer
+    serializer_class = EmailTokenRefreshSerializer
+    throttle_scope = "auth"
@@ -0,0 +1,21 @@
+from django.contrib import admin
+
+from webhooks.models import WebhookEvent, WebhookSubscription
+
+
+@admin.register(WebhookSubscription)
+class WebhookSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ("url", "owner", "is_active", "created_at")
+    list_filter = ("is_active",)
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "type",
+        "subscription",
+        "status",
+        "attempts",
+        "next_attempt_at",
+    )
+    list_filter = ("status", "type")
@@ -0,0 +1,216 @@
+"""
+Delivery of job change events to webhook subscriptions.
+
+Job signals store one WebhookEvent per interested subscription in the
+job's transaction (see webhooks.signals), then queue the
+`deliver_webhooks` task once it commits. deliver_pending() claims due
+events, up to `WEBHOOK_BATCH_SIZE` per subscription in id order, and
+POSTs each batch as one JSON document:
+
+    {"events": [{"id": 1, "type": "job.created", "created_at": "...",
+                 "data": {...job...}}, ...]}
+
+signed with the subscription secret in the X-Webhook-Signature header
+("sha256=" + hex HMAC of the body). Batches go out from
+`WEBHOOK_CONCURRENCY` threads over pooled keep-alive connections. A 2xx
+response deletes the batch; otherwise the subscription backs off
+(`WEBHOOK_RETRY_BACKOFF` seconds doubled per attempt, at most
+`WEBHOOK_RETRY_MAX_DELAY`), holding back its later events so they
+arrive in order, and events that failed `WEBHOOK_MAX_ATTEMPTS` times
+are marked failed. Events may be delivered more than once;
+receivers can skip the ids they have seen.
+"""
+
+import functools
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from webhooks.models import WebhookEvent, WebhookSubscription
+from webhooks.pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+@functools.cache
+def _get_pool(max_idle, timeout, allow_private):
+    return ConnectionPool(max_idle, timeout, allow_private)
+
+
+def get_pool():
+    return _get_pool(
+        settings.WEBHOOK_CONCURRENCY,
+        settings.WEBHOOK_TIMEOUT,
+        settings.WEBHOOK_ALLOW_LOCAL_URLS,
+    )
+
+
+def sign(secret, body):
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def retry_delay(attempt):
+    return min(
+        settings.WEBHOOK_RETRY_BACKOFF * 2 ** (attempt - 1),
+        settings.WEBHOOK_RETRY_MAX_DELAY,
+    )
+
+
+def pending_events():
+    return WebhookEvent.objects.filter(
+        status__in=[WebhookEvent.PENDING, WebhookEvent.SENDING]
+    )
+
+
+def subscriptions_by_next_attempt():
+    """
+    Subscriptions with pending events, by the due time of their oldest:
+    events after it wait, so that a failing endpoint gets them in order.
+    """
+    oldest = (
+        pending_events()
+        .filter(subscription=OuterRef("pk"))
+        .order_by("id")
+        .values("next_attempt_at")[:1]
+    )
+    return (
+        WebhookSubscription.objects.annotate(next_attempt_at=Subquery(oldest))
+        .filter(next_attempt_at__isnull=False)
+        .order_by("next_attempt_at")
+    )
+
+
+def claim_batches():
+    """
+    Lease the next batch of due events of up to `WEBHOOK_CONCURRENCY`
+    subscriptions. Events being sent whose lease expired are due again.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.WEBHOOK_LEASE)
+    subscription_ids = list(
+        subscriptions_by_next_attempt()
+        .filter(next_attempt_at__lte=now)
+        .values_list("pk", flat=True)[: settings.WEBHOOK_CONCURRENCY]
+    )
+    batches = []
+    for subscription_id in subscription_ids:
+        rows = (
+            pending_events()
+            .filter(subscription_id=subscription_id)
+            .order_by("id")
+            .values_list("id", "next_attempt_at")[
+                : settings.WEBHOOK_BATCH_SIZE
+            ]
+        )
+        # The oldest events, up to the first one still backing off
+        ids = [
+            event_id
+            for event_id, _ in itertools.takewhile(
+                lambda row: row[1] <= now, rows
+            )
+        ]
+        # Concurrent dispatchers each win a disjoint set of rows
+        pending_events().filter(id__in=ids, next_attempt_at__lte=now).update(
+            status=WebhookEvent.SENDING,
+            next_attempt_at=lease,
+            attempts=F("attempts") + 1,
+        )
+        events = list(
+            WebhookEvent.objects.filter(
+                id__in=ids,
+                status=WebhookEvent.SENDING,
+                next_attempt_at=lease,
+            )
+            .select_related("subscription")
+            .order_by("id")
+        )
+        if events:
+            batches.append(events)
+    return batches
+
+
+def send_batch(events):
+    """
+    POST a batch to its subscription; returns an error message or None.
+    No database access: runs in the dispatcher threads.
+    """
+    subscription = events[0].subscription
+    body = json.dumps(
+        {
+            "events": [
+                {
+                    "id": event.pk,
+                    "type": event.type,
+                    "created_at": event.created_at,
+                    "data": event.payload,
+                }
+                for event in events
+            ]
+        },
+        cls=JSONEncoder,
+    ).encode()
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": "my-job-board-webhooks",
+        "X-Webhook-Signature": sign(subscription.secret, body),
+    }
+    try:
+        status, content = get_pool().post(subscription.url, body, headers)
+    except OSError as exc:
+        return f"{type(exc).__name__}: {exc}"
+    if not 200 <= status < 300:
+        return f"HTTP {status}: {content[:200].decode(errors='replace')}"
+    return None
+
+
+def record_result(events, error):
+    subscription = events[0].subscription
+    ids = [event.pk for event in events]
+    if error is None:
+        WebhookEvent.objects.filter(id__in=ids).delete()
+        return
+
+    logger.warning("Webhook delivery to %s failed: %s", subscription, error)
+    attempts = max(event.attempts for event in events)
+    retry_at = timezone.now() + timedelta(seconds=retry_delay(attempts))
+    batch = WebhookEvent.objects.filter(id__in=ids)
+    batch.filter(attempts__gte=settings.WEBHOOK_MAX_ATTEMPTS).update(
+        status=WebhookEvent.FAILED, last_error=error
+    )
+    batch.filter(attempts__lt=settings.WEBHOOK_MAX_ATTEMPTS).update(
+        status=WebhookEvent.PENDING, next_attempt_at=retry_at, last_error=error
+    )
+
+
+def deliver_pending():
+    """
+    Deliver every due event. Returns the number of events delivered and
+    the time the next pending event is due, or None.
+    """
+    delivered = 0
+    with ThreadPoolExecutor(settings.WEBHOOK_CONCURRENCY) as executor:
+        while batches := claim_batches():
+            # Only the HTTP requests run in threads, the database work
+            # stays on this thread and connection
+            for events, error in zip(
+                batches, executor.map(send_batch, batches)
+            ):
+                record_result(events, error)
+                if error is None:
+                    delivered += len(events)
+    next_attempt_at = (
+        subscriptions_by_next_attempt()
+        .values_list("next_attempt_at", flat=True)
+        .first()
+    )
+    return delivered, next_attempt_at
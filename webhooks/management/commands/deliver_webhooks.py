@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from webhooks.dispatch import deliver_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver the due webhook events. Deliveries are queued as tasks "
+        "when jobs change; run this periodically (e.g. from cron) to pick "
+        "up retries lost with a restarted process."
+    )
+
+    def handle(self, *args, **kwargs):
+        delivered, next_attempt_at = deliver_pending()
+        self.stdout.write(f"Delivered {delivered} webhook events.")
+        if next_attempt_at is not None:
+            self.stdout.write(f"Next attempt at {next_attempt_at}.")
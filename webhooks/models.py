@@ -0,0 +1,89 @@
+import secrets
+
+from django.conf import settings
+from django.db import models
+
+
+def generate_secret():
+    return secrets.token_urlsafe(32)
+
+
+class WebhookSubscription(models.Model):
+    """
+    Endpoint notified of job changes.
+    """
+
+    JOB_CREATED = "job.created"
+    JOB_UPDATED = "job.updated"
+    JOB_DELETED = "job.deleted"
+
+    EVENT_TYPES = (
+        (JOB_CREATED, "Job created"),
+        (JOB_UPDATED, "Job updated"),
+        (JOB_DELETED, "Job deleted"),
+    )
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="webhooks",
+    )
+    url = models.URLField(max_length=2000)
+    # Event types to deliver, all of them when empty
+    events = models.JSONField(default=list, blank=True)
+    # Key of the HMAC-SHA256 signature of each delivery
+    secret = models.CharField(default=generate_secret, editable=False)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.url
+
+    def wants(self, event_type):
+        return not self.events or event_type in self.events
+
+
+class WebhookEvent(models.Model):
+    """
+    Event waiting to be delivered to a subscription (see
+    webhooks.dispatch); deleted once delivered.
+    """
+
+    PENDING = "pending"
+    SENDING = "sending"
+    FAILED = "failed"
+
+    STATUS = (
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (FAILED, "Failed"),
+    )
+
+    subscription = models.ForeignKey(
+        WebhookSubscription,
+        on_delete=models.CASCADE,
+        related_name="pending_events",
+    )
+    type = models.CharField(choices=WebhookSubscription.EVENT_TYPES)
+    payload = models.JSONField()
+    status = models.CharField(choices=STATUS, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    # Due time of a pending event, lease expiry of one being sent
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Due events, and each subscription's in order
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status__in=["pending", "sending"]),
+                name="webhook_event_due_idx",
+            ),
+            models.Index(
+                fields=["subscription", "id"],
+                condition=models.Q(status__in=["pending", "sending"]),
+                name="webhook_event_sub_idx",
+            ),
+        ]
@@ -0,0 +1,102 @@
+"""
+Keep-alive HTTP connections reused across webhook deliveries.
+"""
+
+import http.client
+import socket
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from webhooks.validators import public_addresses
+
+# Errors of a kept-alive connection the server closed in the meantime
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class ConnectionPool:
+    """
+    Idle connections per origin, at most `max_idle` each. Connections
+    are taken out of the pool while in use, so threads never share one.
+    Unless `allow_private`, they only connect to public addresses (see
+    webhooks.validators).
+    """
+
+    def __init__(self, max_idle, timeout, allow_private=False):
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.allow_private = allow_private
+        self.idle = defaultdict(list)  # (scheme, host, port) -> connections
+        self.lock = threading.Lock()
+
+    def acquire(self, origin):
+        with self.lock:
+            if self.idle[origin]:
+                return self.idle[origin].pop(), True
+        scheme, host, port = origin
+        if scheme == "https":
+            connection = http.client.HTTPSConnection(
+                host, port, timeout=self.timeout
+            )
+        else:
+            connection = http.client.HTTPConnection(
+                host, port, timeout=self.timeout
+            )
+        # HTTPS still verifies the certificate of the host name
+        connection._create_connection = self.create_connection
+        return connection, False
+
+    def create_connection(self, address, timeout, source_address=None):
+        if self.allow_private:
+            return socket.create_connection(address, timeout, source_address)
+        # Connect to the address checked, not to another lookup's answer
+        *_, sockaddr = public_addresses(*address)[0]
+        return socket.create_connection(sockaddr[:2], timeout, source_address)
+
+    def release(self, origin, connection):
+        with self.lock:
+            if len(self.idle[origin]) < self.max_idle:
+                self.idle[origin].append(connection)
+                return
+        connection.close()
+
+    def post(self, url, body, headers):
+        """
+        POST `body` to `url` and return the response (status, body).
+        """
+        parts = urlsplit(url)
+        origin = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += f"?{parts.query}"
+
+        while True:
+            connection, reused = self.acquire(origin)
+            try:
+                connection.request("POST", path, body=body, headers=headers)
+                response = connection.getresponse()
+                content = response.read()
+            except STALE_CONNECTION_ERRORS:
+                connection.close()
+                if reused:
+                    continue  # Retry once per stale idle connection
+                raise
+            except BaseException:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self.release(origin, connection)
+            return response.status, content
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, defaultdict(list)
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
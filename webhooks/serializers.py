@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+from webhooks.models import WebhookSubscription
+from webhooks.validators import validate_webhook_url
+
+
+class WebhookSubscriptionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for WebhookSubscription; the secret is generated.
+    """
+
+    events = serializers.ListField(
+        child=serializers.ChoiceField(WebhookSubscription.EVENT_TYPES),
+        required=False,
+    )
+
+    class Meta:
+        model = WebhookSubscription
+        fields = ["id", "url", "events", "secret", "is_active", "created_at"]
+        read_only_fields = ["secret", "created_at"]
+
+    def validate_url(self, value):
+        validate_webhook_url(value)
+        return value
+
+    def validate_events(self, value):
+        return list(dict.fromkeys(value))
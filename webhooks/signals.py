@@ -0,0 +1,97 @@
+import contextlib
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import connections, router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from job.models import Job
+from job.serializers import JobSerializer
+from webhooks.models import WebhookEvent, WebhookSubscription
+from webhooks.tasks import deliver_webhooks
+
+_event_batch = ContextVar("webhook_event_batch", default=None)
+
+
+def queue_delivery():
+    deliver_webhooks.enqueue()
+
+
+def record_events(event_type, get_payload):
+    """
+    Record an event, whose payload `get_payload()` builds if any
+    subscription wants it.
+    """
+    batch = _event_batch.get()
+    if batch is None:
+        store_events([(event_type, get_payload)])
+    else:
+        batch.append((event_type, get_payload))
+
+
+@contextlib.contextmanager
+def batched_webhook_events():
+    """
+    Store the events recorded in the block with one subscription query
+    and one insert.
+    """
+    batch = []
+    token = _event_batch.set(batch)
+    try:
+        yield
+    finally:
+        _event_batch.reset(token)
+    if batch:
+        store_events(batch)
+
+
+def store_events(events):
+    """
+    Store the (type, payload getter) events for each interested
+    subscription, in the transaction of the change, and queue a delivery
+    once it commits.
+    """
+    subscriptions = list(WebhookSubscription.objects.filter(is_active=True))
+    now = timezone.now()
+    rows = []
+    for event_type, get_payload in events:
+        interested = [s for s in subscriptions if s.wants(event_type)]
+        if interested:
+            payload = get_payload()
+            rows += [
+                WebhookEvent(
+                    subscription=subscription,
+                    type=event_type,
+                    payload=payload,
+                    next_attempt_at=now,
+                )
+                for subscription in interested
+            ]
+    if not rows:
+        return
+    WebhookEvent.objects.bulk_create(rows)
+    using = router.db_for_write(WebhookEvent)
+    pending = connections[using].run_on_commit
+    # One delivery per transaction, however many jobs it changed
+    if not any(callback is queue_delivery for _, callback, _ in pending):
+        transaction.on_commit(queue_delivery, using=using)
+
+
+@receiver(post_save, sender=Job)
+def job_saved(sender, instance, created, **kwargs):
+    event_type = (
+        WebhookSubscription.JOB_CREATED
+        if created
+        else WebhookSubscription.JOB_UPDATED
+    )
+    record_events(event_type, lambda: JobSerializer(instance).data)
+
+
+@receiver(post_delete, sender=Job)
+def job_deleted(sender, instance, **kwargs):
+    # The pk is reset once the deletion completes
+    record_events(
+        WebhookSubscription.JOB_DELETED, partial(dict, id=instance.pk)
+    )
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from tasks.queue import task
+from webhooks.dispatch import deliver_pending
+
+# Due time (timestamp) of the scheduled retry run, in the shared cache
+SCHEDULED_KEY = "webhooks:delivery_scheduled_at"
+
+
+@task
+def deliver_webhooks(scheduled_at=None):
+    """
+    Deliver the due webhook events, then run again when the next is due.
+    """
+    if scheduled_at is not None and cache.get(SCHEDULED_KEY) == scheduled_at:
+        cache.delete(SCHEDULED_KEY)  # This is the scheduled run
+    delivered, next_attempt_at = deliver_pending()
+    if next_attempt_at is not None:
+        schedule_delivery(next_attempt_at)
+    return delivered
+
+
+def schedule_delivery(at):
+    """
+    Run deliver_webhooks at `at`, unless a run is already scheduled by
+    then: deliveries queued by each write must not each start their own
+    chain of retries during an endpoint outage.
+    """
+    timestamp = at.timestamp()
+    scheduled = cache.get(SCHEDULED_KEY)
+    if scheduled is not None and scheduled <= timestamp:
+        return
+    delay = max((at - timezone.now()).total_seconds(), 0)
+    # Expires in case the scheduled run is lost (e.g. thread backend)
+    cache.set(SCHEDULED_KEY, timestamp, timeout=delay + settings.WEBHOOK_LEASE)
+    deliver_webhooks.enqueue_in(delay, scheduled_at=timestamp)
@@ -0,0 +1,427 @@
+import hashlib
+import hmac
+import io
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from job.models import Job
+from tasks.models import Task
+from tasks.queue import get_backend
+from users.views import EmailTokenObtainPairSerializer
+from webhooks.dispatch import deliver_pending, get_pool
+from webhooks.models import WebhookEvent, WebhookSubscription
+from webhooks.tasks import SCHEDULED_KEY, deliver_webhooks
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        body = self.rfile.read(length)
+        server = self.server
+        with server.lock:
+            server.requests.append(
+                {
+                    "port": self.client_address[1],
+                    "path": self.path,
+                    "headers": dict(self.headers),
+                    "body": body,
+                }
+            )
+            failing = server.failures > 0
+            server.failures -= failing
+        content = b"unavailable" if failing else b"ok"
+        self.send_response(500 if failing else 200)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """Local HTTP server recording the deliveries."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.failures = 0  # Next requests answered with a 500
+    server.url = f"http://127.0.0.1:{server.server_port}/hook"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    get_pool().close()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def clear_delivery_schedule():
+    cache.delete(SCHEDULED_KEY)
+
+
+@pytest.fixture(autouse=True)
+def allow_local_urls(settings):
+    """Let the stub server on the loopback interface be subscribed."""
+    settings.WEBHOOK_ALLOW_LOCAL_URLS = True
+
+
+@pytest.fixture
+def user(db):
+    return get_user_model().objects.create_user(
+        email="hooks@example.com", password="pass1234"
+    )
+
+
+@pytest.fixture
+def subscription(user, stub_server):
+    return WebhookSubscription.objects.create(owner=user, url=stub_server.url)
+
+
+def create_job(user, title="Job"):
+    return Job.objects.create(
+        title=title,
+        location="Paris",
+        description="Desc",
+        contract_type="cdi",
+        owner=user,
+    )
+
+
+def delivered_events(server):
+    return [
+        event
+        for request in server.requests
+        for event in json.loads(request["body"])["events"]
+    ]
+
+
+@pytest.mark.django_db
+def test_subscription_api(user):
+    """Test users manage their own subscriptions, with a generated secret."""
+    client = APIClient()
+    client.force_authenticate(user=user)
+    response = client.post(
+        reverse("webhook-list-create"),
+        {"url": "https://example.com/hook", "events": ["job.created"]},
+        format="json",
+    )
+    assert response.status_code == 201
+    assert response.data["events"] == ["job.created"]
+    assert len(response.data["secret"]) > 20
+    pk = response.data["id"]
+
+    response = client.post(
+        reverse("webhook-list-create"),
+        {"url": "https://example.com/hook", "events": ["job.archived"]},
+        format="json",
+    )
+    assert response.status_code == 400
+
+    other = get_user_model().objects.create_user(
+        email="other@example.com", password="pass1234"
+    )
+    client.force_authenticate(user=other)
+    assert client.get(reverse("webhook-list-create")).data == []
+    response = client.get(reverse("webhook-detail", args=[pk]))
+    assert response.status_code == 404
+
+    client.force_authenticate(user=user)
+    response = client.patch(
+        reverse("webhook-detail", args=[pk]),
+        {"is_active": False, "secret": "chosen"},
+        format="json",
+    )
+    assert response.status_code == 200
+    subscription = WebhookSubscription.objects.get(pk=pk)
+    assert not subscription.is_active
+    assert subscription.secret != "chosen"
+
+
+@pytest.mark.django_db
+def test_subscription_api_with_access_token(user):
+    """Test subscribing with a real JWT, whose user is a ClaimsUser."""
+    client = APIClient()
+    refresh = EmailTokenObtainPairSerializer.get_token(user)
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+    response = client.post(
+        reverse("webhook-list-create"),
+        {"url": "https://example.com/hook"},
+        format="json",
+    )
+    assert response.status_code == 201
+    assert WebhookSubscription.objects.get().owner == user
+    response = client.get(reverse("webhook-list-create"))
+    assert len(response.data) == 1
+    detail = reverse("webhook-detail", args=[response.data[0]["id"]])
+    assert client.delete(detail).status_code == 204
+
+
+@pytest.mark.django_db
+def test_subscription_url_must_be_public(settings, user):
+    """Test URLs must be https and resolve to public addresses."""
+    settings.WEBHOOK_ALLOW_LOCAL_URLS = False
+    client = APIClient()
+    client.force_authenticate(user=user)
+    for url in [
+        "http://93.184.215.14/hook",
+        "https://127.0.0.1/hook",
+        "https://localhost/hook",
+        "https://10.1.2.3/hook",
+        "https://169.254.169.254/latest/meta-data",
+        "https://[::ffff:127.0.0.1]/hook",
+        "https://0.0.0.0/hook",
+    ]:
+        response = client.post(
+            reverse("webhook-list-create"), {"url": url}, format="json"
+        )
+        assert response.status_code == 400, url
+        assert "url" in response.data
+
+    response = client.post(
+        reverse("webhook-list-create"),
+        {"url": "https://93.184.215.14/hook"},
+        format="json",
+    )
+    assert response.status_code == 201
+    response = client.patch(
+        reverse("webhook-detail", args=[response.data["id"]]),
+        {"url": "https://192.168.0.1/hook"},
+        format="json",
+    )
+    assert response.status_code == 400
+    assert WebhookSubscription.objects.get().url.startswith("https://93.")
+
+
+@pytest.mark.django_db
+def test_delivery_refuses_private_address(
+    settings, user, subscription, stub_server
+):
+    """Test deliveries don't connect to hosts now resolving privately."""
+    settings.WEBHOOK_ALLOW_LOCAL_URLS = False
+    create_job(user)
+    assert deliver_pending()[0] == 0
+    assert stub_server.requests == []
+    event = WebhookEvent.objects.get()
+    assert event.status == WebhookEvent.PENDING
+    assert "ForbiddenAddress" in event.last_error
+
+
+@pytest.mark.django_db
+def test_job_changes_record_events(user):
+    """Test job changes store an event per interested subscription."""
+    everything = WebhookSubscription.objects.create(
+        owner=user, url="https://example.com/all"
+    )
+    deletions = WebhookSubscription.objects.create(
+        owner=user, url="https://example.com/deleted", events=["job.deleted"]
+    )
+    WebhookSubscription.objects.create(
+        owner=user, url="https://example.com/off", is_active=False
+    )
+    job = create_job(user)
+    job.title = "Renamed"
+    job.save()
+    job_id = job.pk
+    job.delete()
+
+    events = list(WebhookEvent.objects.order_by("id"))
+    assert [(e.subscription, e.type) for e in events] == [
+        (everything, "job.created"),
+        (everything, "job.updated"),
+        (everything, "job.deleted"),
+        (deletions, "job.deleted"),
+    ]
+    assert events[0].payload["title"] == "Job"
+    assert events[1].payload["title"] == "Renamed"
+    assert events[2].payload == {"id": job_id}
+
+
+@pytest.mark.django_db
+def test_bulk_import_records_events_per_chunk(user):
+    """Test bulk imports read subscriptions and store events once."""
+    subscription = WebhookSubscription.objects.create(
+        owner=user, url="https://example.com/all"
+    )
+    client = APIClient()
+    client.force_authenticate(user=user)
+    items = [
+        {
+            "title": f"Job {i}",
+            "location": "Paris",
+            "description": "Desc",
+            "contract_type": "cdi",
+        }
+        for i in range(10)
+    ]
+    with CaptureQueriesContext(connection) as captured:
+        response = client.post(reverse("job-bulk"), items, format="json")
+    assert response.status_code == 200
+    tables = [
+        table
+        for query in captured
+        for table in ("webhooks_webhooksubscription", "webhooks_webhookevent")
+        if f'"{table}"' in query["sql"]
+    ]
+    assert tables == [
+        "webhooks_webhooksubscription",
+        "webhooks_webhookevent",
+    ]
+    events = WebhookEvent.objects.order_by("id")
+    assert [event.payload["title"] for event in events] == [
+        item["title"] for item in items
+    ]
+    assert {event.subscription for event in events} == {subscription}
+
+
+@pytest.mark.django_db
+def test_deliver_batches_over_one_connection(
+    settings, user, subscription, stub_server
+):
+    """Test events are POSTed in signed batches, in order, kept alive."""
+    settings.WEBHOOK_BATCH_SIZE = 2
+    jobs = [create_job(user, f"Job {i}") for i in range(5)]
+
+    delivered, next_attempt_at = deliver_pending()
+
+    assert (delivered, next_attempt_at) == (5, None)
+    assert len(stub_server.requests) == 3
+    assert len({request["port"] for request in stub_server.requests}) == 1
+    for request in stub_server.requests:
+        assert request["path"] == "/hook"
+        expected = hmac.new(
+            subscription.secret.encode(), request["body"], hashlib.sha256
+        ).hexdigest()
+        signature = request["headers"]["X-Webhook-Signature"]
+        assert signature == f"sha256={expected}"
+    events = delivered_events(stub_server)
+    assert [event["data"]["id"] for event in events] == [
+        job.pk for job in jobs
+    ]
+    assert {event["type"] for event in events} == {"job.created"}
+    assert not WebhookEvent.objects.exists()
+
+
+@pytest.mark.django_db
+def test_failed_delivery_backs_off(settings, user, subscription, stub_server):
+    """Test failed batches are retried after a backoff, then given up."""
+    settings.WEBHOOK_MAX_ATTEMPTS = 2
+    stub_server.failures = 1
+    create_job(user)
+
+    before = timezone.now()
+    assert deliver_pending()[0] == 0
+    event = WebhookEvent.objects.get()
+    assert event.status == WebhookEvent.PENDING
+    assert event.attempts == 1
+    assert "HTTP 500" in event.last_error
+    assert event.next_attempt_at >= before + timedelta(
+        seconds=settings.WEBHOOK_RETRY_BACKOFF
+    )
+    # A later event for the endpoint waits too, to keep the order
+    create_job(user, "Later")
+    delivered, next_attempt_at = deliver_pending()
+    assert delivered == 0
+    assert next_attempt_at == event.next_attempt_at
+    assert len(stub_server.requests) == 1
+
+    WebhookEvent.objects.update(next_attempt_at=timezone.now())
+    assert deliver_pending() == (2, None)
+    assert len(stub_server.requests) == 2
+    assert len(delivered_events(stub_server)) == 3  # First one sent twice
+
+    stub_server.failures = 2
+    create_job(user, "Doomed")
+    deliver_pending()
+    WebhookEvent.objects.update(next_attempt_at=timezone.now())
+    assert deliver_pending() == (0, None)
+    event = WebhookEvent.objects.get()
+    assert (event.status, event.attempts) == (WebhookEvent.FAILED, 2)
+
+
+@pytest.mark.django_db
+def test_retries_scheduled_once(settings, user, subscription, stub_server):
+    """Test deliveries queued by many writes share one retry schedule."""
+    settings.TASKS_BACKEND = "database"
+    stub_server.failures = 100
+    create_job(user)
+    for _ in range(3):  # As queued by three transactions
+        deliver_webhooks()
+    retries = Task.objects.filter(name="webhooks.tasks.deliver_webhooks")
+    assert retries.count() == 1
+    retry = retries.get()
+    due = WebhookEvent.objects.get().next_attempt_at
+    assert abs(retry.run_at - due) < timedelta(seconds=1)
+
+    # The scheduled run schedules the next retry
+    Task.objects.exclude(pk=retry.pk).delete()
+    WebhookEvent.objects.update(next_attempt_at=timezone.now())
+    retries.update(run_at=timezone.now())
+    assert get_backend().run_next()
+    assert retries.count() == 1
+    scheduled_at = retries.get().kwargs["scheduled_at"]
+    assert scheduled_at > retry.kwargs["scheduled_at"]
+
+
+@pytest.mark.django_db
+def test_unreachable_endpoint(user, subscription, stub_server):
+    """Test connection errors are recorded for a retry."""
+    subscription.url = "http://127.0.0.1:1/hook"
+    subscription.save()
+    create_job(user)
+    assert deliver_pending()[0] == 0
+    event = WebhookEvent.objects.get()
+    assert event.status == WebhookEvent.PENDING
+    assert "ConnectionRefusedError" in event.last_error
+
+
+@pytest.mark.django_db
+def test_delivery_queued_once_per_transaction(
+    settings, user, subscription, django_capture_on_commit_callbacks
+):
+    """Test a transaction changing many jobs queues a single delivery."""
+    settings.TASKS_BACKEND = "database"
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            for i in range(3):
+                create_job(user, f"Job {i}")
+    assert WebhookEvent.objects.count() == 3
+    tasks = Task.objects.filter(name="webhooks.tasks.deliver_webhooks")
+    assert tasks.count() == 1
+
+
+@pytest.mark.django_db
+def test_delivered_after_commit(
+    user, subscription, stub_server, django_capture_on_commit_callbacks
+):
+    """Test committed job changes are delivered by the task."""
+    with django_capture_on_commit_callbacks(execute=True):
+        job = create_job(user)
+    events = delivered_events(stub_server)
+    assert [event["data"]["id"] for event in events] == [job.pk]
+    assert not WebhookEvent.objects.exists()
+
+
+@pytest.mark.django_db
+def test_deliver_webhooks_command(user, subscription, stub_server):
+    """Test the command delivers the due events."""
+    create_job(user)
+    out = io.StringIO()
+    call_command("deliver_webhooks", stdout=out)
+    assert "Delivered 1 webhook events." in out.getvalue()
+    assert len(stub_server.requests) == 1
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from webhooks.views import (
+    WebhookSubscriptionDetailView,
+    WebhookSubscriptionListCreateView,
+)
+
+urlpatterns = [
+    path(
+        "webhooks/",
+        WebhookSubscriptionListCreateView.as_view(),
+        name="webhook-list-create",
+    ),
+    path(
+        "webhooks/<int:pk>/",
+        WebhookSubscriptionDetailView.as_view(),
+        name="webhook-detail",
+    ),
+]
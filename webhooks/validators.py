@@ -0,0 +1,54 @@
+"""
+Webhook URLs must reach public HTTPS endpoints: subscriptions would
+otherwise let users make the server POST to its internal network.
+Addresses are checked when a subscription is saved, and again when
+deliveries connect, since DNS answers may change in between.
+"""
+
+import ipaddress
+import socket
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+
+class ForbiddenAddress(OSError):
+    """
+    Host resolving to a loopback, private, link-local or reserved address.
+    """
+
+
+def is_public(address):
+    ip = ipaddress.ip_address(address)
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def public_addresses(host, port):
+    """
+    Resolve `host` like socket.getaddrinfo(), raising ForbiddenAddress
+    unless every address is public.
+    """
+    infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    for *_, sockaddr in infos:
+        if not is_public(sockaddr[0]):
+            raise ForbiddenAddress(
+                f"{host} resolves to a non-public address {sockaddr[0]}"
+            )
+    return infos
+
+
+def validate_webhook_url(url):
+    if settings.WEBHOOK_ALLOW_LOCAL_URLS:
+        return
+    parts = urlsplit(url)
+    if parts.scheme != "https":
+        raise ValidationError("Webhook URLs must use https.")
+    try:
+        public_addresses(parts.hostname, parts.port or 443)
+    except ForbiddenAddress:
+        raise ValidationError("Webhook URLs must point to a public address.")
+    except (OSError, UnicodeError):
+        raise ValidationError("The webhook URL host could not be resolved.")
@@ -0,0 +1,37 @@
+from rest_framework import generics, permissions
+
+from webhooks.models import WebhookSubscription
+from webhooks.serializers import WebhookSubscriptionSerializer
+
+
+class WebhookSubscriptionListCreateView(generics.ListCreateAPIView):
+    """
+    List the current user's webhook subscriptions, or subscribe a URL to
+    job events (all of them unless `events` lists some).
+    """
+
+    serializer_class = WebhookSubscriptionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return WebhookSubscription.objects.filter(
+            owner_id=self.request.user.pk
+        ).order_by("id")
+
+    def perform_create(self, serializer):
+        # By id: request.user may be a ClaimsUser
+        serializer.save(owner_id=self.request.user.pk)
+
+
+class WebhookSubscriptionDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    Read, update or delete one of the current user's subscriptions.
+    """
+
+    serializer_class = WebhookSubscriptionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return WebhookSubscription.objects.filter(
+            owner_id=self.request.user.pk
+        )